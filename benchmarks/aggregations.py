@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""This benchmark times the Aggregations of a config that stand for
+expensive work, like opening a pool of database connections.  Each takes
+20ms.  It times the first config, then a number of reloads that change an
+option none of the Aggregations depend on:
+
+    undeclared - Aggregations without 'depends_on' are evaluated for every
+                 config, the way all of them used to be
+    declared - Aggregations that declare the keys they read are evaluated
+               again only if one of those keys has changed
+    parallel - the declared Aggregations, independent of one another, are
+               evaluated in a pool of threads"""
+
+import sys
+import time
+
+from configman import ConfigurationManager, Namespace
+from configman.tests.executors import WorkerPoolExecutor
+
+
+#------------------------------------------------------------------------------
+def connection_pool(all_options, local_namespace, args):
+    time.sleep(0.02)
+    return 'pool of %s:%s' % (local_namespace.host, local_namespace.port)
+
+
+#------------------------------------------------------------------------------
+def make_definitions(number_of_resources, depends_on):
+    definitions = Namespace()
+    definitions.add_option('log_level', default=10)
+    for i in xrange(number_of_resources):
+        definitions.namespace('resource_%d' % i)
+        a_namespace = definitions['resource_%d' % i]
+        a_namespace.add_option('host', default='db%d' % i)
+        a_namespace.add_option('port', default=5432)
+        a_namespace.add_aggregation(
+            'pool',
+            connection_pool,
+            depends_on=depends_on
+        )
+    return definitions
+
+
+#------------------------------------------------------------------------------
+def timed(number_of_resources, number_of_reloads, depends_on, executor=None):
+    config_manager = ConfigurationManager(
+        make_definitions(number_of_resources, depends_on),
+        values_source_list=[],
+        argv_source=[],
+        aggregation_executor=executor,
+    )
+    start = time.time()
+    config_manager.get_config()
+    first = time.time() - start
+    start = time.time()
+    for i in xrange(number_of_reloads):
+        config = config_manager.update_published_config({'log_level': i})
+        assert config.resource_0.pool == 'pool of db0:5432'
+    return first, time.time() - start
+
+
+#==============================================================================
+if __name__ == "__main__":
+    number_of_resources = 8
+    number_of_reloads = 10
+    if len(sys.argv) > 1:
+        number_of_resources = int(sys.argv[1])
+    print '%d aggregations, %d reloads' % (
+        number_of_resources,
+        number_of_reloads
+    )
+    pool = WorkerPoolExecutor(number_of_resources)
+    for name, depends_on, executor in (
+        ('undeclared', None, None),
+        ('declared', ['host', 'port'], None),
+        ('parallel', ['host', 'port'], pool),
+    ):
+        first, reloads = timed(
+            number_of_resources,
+            number_of_reloads,
+            depends_on,
+            executor
+        )
+        print '%-12s first config %7.3fs  reloads %7.3fs' % (
+            name,
+            first,
+            reloads
+        )
@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""This benchmark times building, iterating and deleting the keys of a large
+tree of nested DotDicts.  It compares DotDict, which remembers the order of
+its keys in a plain list, with an equivalent class that keeps the order in an
+OrderedSet, as DotDict used to.
+
+The tree has a number of namespaces, each holding an equal share of the
+total number of keys.  The keys are deleted in the order of insertion, in
+reverse order and in random order.  Give a single namespace to see how the
+deletions scale with the number of keys in one DotDict."""
+
+import random
+import sys
+import time
+
+from configman.dotdict import DotDict
+from configman.orderedset import OrderedSet
+
+
+#==============================================================================
+class OrderedSetDotDict(DotDict):
+    """a DotDict that tracks the order of its keys with an OrderedSet"""
+    #--------------------------------------------------------------------------
+    def __init__(self, initializer=None):
+        super(OrderedSetDotDict, self).__init__(initializer)
+        self.__dict__['_key_order'] = OrderedSet(self.__dict__['_key_order'])
+
+    #--------------------------------------------------------------------------
+    def __setattr__(self, key, value):
+        self._key_order.add(key)
+        self.__dict__[key] = value
+
+    #--------------------------------------------------------------------------
+    def __delattr__(self, key):
+        self._key_order.discard(key)
+        object.__delattr__(self, key)
+
+
+#------------------------------------------------------------------------------
+def build(dot_dict_class, number_of_keys, number_of_namespaces):
+    keys_per_namespace = number_of_keys // number_of_namespaces
+    tree = dot_dict_class()
+    for i in xrange(number_of_namespaces):
+        namespace = dot_dict_class()
+        tree['namespace_%d' % i] = namespace
+        for j in xrange(keys_per_namespace):
+            namespace['key_%d' % j] = j
+    return tree
+
+
+#------------------------------------------------------------------------------
+def iterate(tree):
+    for key in tree.keys_breadth_first():
+        pass
+
+
+#------------------------------------------------------------------------------
+def in_order(keys):
+    return keys
+
+
+#------------------------------------------------------------------------------
+def in_reverse_order(keys):
+    return keys[::-1]
+
+
+#------------------------------------------------------------------------------
+def in_random_order(keys):
+    random.Random(0).shuffle(keys)
+    return keys
+
+
+#------------------------------------------------------------------------------
+def delete(tree, order):
+    for namespace in tree.values():
+        for key in order(list(namespace)):
+            del namespace[key]
+
+
+#------------------------------------------------------------------------------
+def timed(a_function, *args):
+    start = time.time()
+    result = a_function(*args)
+    return result, time.time() - start
+
+
+#==============================================================================
+if __name__ == "__main__":
+    number_of_keys = 100000
+    number_of_namespaces = 100
+    if len(sys.argv) > 1:
+        number_of_keys = int(sys.argv[1])
+    if len(sys.argv) > 2:
+        number_of_namespaces = int(sys.argv[2])
+    print '%d keys in %d namespaces' % (number_of_keys, number_of_namespaces)
+    for dot_dict_class in (OrderedSetDotDict, DotDict):
+        tree, build_time = timed(
+            build,
+            dot_dict_class,
+            number_of_keys,
+            number_of_namespaces
+        )
+        _, iterate_time = timed(iterate, tree)
+        print '%-18s build %7.3fs  iterate %7.3fs' % (
+            dot_dict_class.__name__,
+            build_time,
+            iterate_time
+        )
+        for order in (in_order, in_reverse_order, in_random_order):
+            tree = build(dot_dict_class, number_of_keys, number_of_namespaces)
+            _, delete_time = timed(delete, tree, order)
+            print '%-18s delete %-16s %7.3fs' % (
+                '',
+                order.__name__,
+                delete_time
+            )
@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""This benchmark times repeated calls to 'get_config', the way request
+handlers call it, for option definitions that include an Aggregation.  It
+compares the cached 'get_config' with the one configman used to have: it
+generated the config on every call, and a second time whenever there were
+Aggregations.
+
+A call answered from the cache still checks every Option for a change, so
+its cost grows with the number of options.  The last lines show the time of
+a cached call for definitions of a growing size."""
+
+import sys
+import time
+
+from configman import ConfigurationManager, Namespace
+from configman.dotdict import DotDictWithAcquisition
+
+
+#==============================================================================
+class RegeneratingConfigurationManager(ConfigurationManager):
+    """a ConfigurationManager with the former, uncached 'get_config'"""
+    #--------------------------------------------------------------------------
+    def get_config(self, mapping_class=DotDictWithAcquisition):
+        config = self._generate_config(mapping_class)
+        if self._aggregate(self.option_definitions, config, config):
+            return self._generate_config(mapping_class)
+        return config
+
+
+#------------------------------------------------------------------------------
+def connection_string(all_options, local_namespace, args):
+    return 'host=%s port=%s' % (local_namespace.host, local_namespace.port)
+
+
+#------------------------------------------------------------------------------
+def make_definitions(number_of_namespaces):
+    definitions = Namespace()
+    for i in xrange(number_of_namespaces):
+        definitions.namespace('namespace_%d' % i)
+        a_namespace = definitions['namespace_%d' % i]
+        for j in xrange(8):
+            a_namespace.add_option('option_%d' % j, default=j)
+        a_namespace.add_option('host', default='localhost')
+        a_namespace.add_option('port', default=5432)
+    definitions.namespace_0.add_aggregation('dsn', connection_string)
+    return definitions
+
+
+#==============================================================================
+if __name__ == "__main__":
+    number_of_namespaces = 100
+    number_of_calls = 200
+    if len(sys.argv) > 1:
+        number_of_calls = int(sys.argv[1])
+    definitions = make_definitions(number_of_namespaces)
+    print '%d calls, %d options' % (
+        number_of_calls,
+        number_of_namespaces * 10
+    )
+    for manager_class in (
+        RegeneratingConfigurationManager,
+        ConfigurationManager
+    ):
+        config_manager = manager_class(
+            definitions,
+            values_source_list=[],
+            argv_source=[],
+            cache_config=True,
+        )
+        start = time.time()
+        for i in xrange(number_of_calls):
+            config = config_manager.get_config()
+            assert config.namespace_0.dsn == 'host=localhost port=5432'
+        print '%-34s %8.3fs' % (manager_class.__name__, time.time() - start)
+    for number_of_namespaces in (10, 100, 1000):
+        config_manager = ConfigurationManager(
+            make_definitions(number_of_namespaces),
+            values_source_list=[],
+            argv_source=[],
+            cache_config=True,
+        )
+        config_manager.get_config()
+        start = time.time()
+        for i in xrange(number_of_calls):
+            config_manager.get_config()
+        print 'cached call, %5d options %17.1fus' % (
+            number_of_namespaces * 10,
+            (time.time() - start) / number_of_calls * 1000000
+        )
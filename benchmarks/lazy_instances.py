@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""This benchmark times getting a config for an app that lists a number of
+storage backends with 'str_to_classes_in_namespaces' and instantiate_classes
+and then uses only two of them.  Each backend takes 10ms to construct, as if
+it opened a connection.  It compares the eager instances, constructed in
+'get_config', with the LazyInstance proxies, constructed when first used."""
+
+import sys
+import time
+
+from configman import ConfigurationManager, Namespace
+from configman.converters import str_to_classes_in_namespaces
+
+
+#==============================================================================
+class StorageBackend(object):
+    def __init__(self, config):
+        time.sleep(0.01)
+        self.config = config
+
+    def save(self, item):
+        return item
+
+
+#------------------------------------------------------------------------------
+def timed(number_of_backends, lazy_instances):
+    definitions = Namespace()
+    definitions.add_option(
+        'destinations',
+        default=', '.join(
+            ['%s.StorageBackend' % __name__] * number_of_backends
+        ),
+        from_string_converter=str_to_classes_in_namespaces(
+            'storage%d',
+            'backend',
+            instantiate_classes=True,
+            lazy_instances=lazy_instances
+        )
+    )
+    config_manager = ConfigurationManager(
+        definitions,
+        values_source_list=[],
+        argv_source=[],
+    )
+    start = time.time()
+    config = config_manager.get_config()
+    config.storage0.backend_instance.save('x')
+    config.storage1.backend_instance.save('y')
+    return time.time() - start
+
+
+#==============================================================================
+if __name__ == "__main__":
+    number_of_backends = 20
+    if len(sys.argv) > 1:
+        number_of_backends = int(sys.argv[1])
+    print '%d storage backends, 2 used' % number_of_backends
+    for name, lazy_instances in (('eager', False), ('lazy', True)):
+        print '%-6s %8.3fs' % (name, timed(number_of_backends, lazy_instances))
@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""This benchmark measures the memory used by a large number of Options.  It
+compares the compact, __slots__ based Option with an equivalent class that
+stores its attributes in a per instance __dict__, as Option used to.
+
+Both classes are made with the same constructor arguments.  If the
+'tracemalloc' module is available, it is used to measure the memory actually
+allocated.  It isn't part of Python 2, so there the memory is estimated with
+sys.getsizeof on each object and its __dict__.  The estimate leaves out the
+names, docs and values, which are the same objects for both classes."""
+
+import sys
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+from configman.option import Option
+
+
+#==============================================================================
+class DictOption(object):
+    """an Option stand-in with a per instance __dict__ and one attribute per
+    boolean flag"""
+    def __init__(self, name, default, doc, from_string_converter):
+        self.name = name
+        self.short_form = None
+        self.default = default
+        self.doc = doc
+        self.from_string_converter = from_string_converter
+        self.to_string_converter = None
+        self.value = default
+        self.is_argument = False
+        self.exclude_from_print_conf = False
+        self.exclude_from_dump_conf = False
+        self.likely_to_be_changed = False
+        self.not_for_definition = False
+        self.reference_value_from = None
+        self.secret = False
+        self.has_changed = False
+
+
+#------------------------------------------------------------------------------
+def make_options(option_class, number_of_options):
+    return [
+        option_class(
+            name='option_%d' % i,
+            default=i,
+            doc='the option option_%d' % i,
+            from_string_converter=int
+        )
+        for i in xrange(number_of_options)
+    ]
+
+
+#------------------------------------------------------------------------------
+def estimated_size(an_object):
+    size = sys.getsizeof(an_object)
+    try:
+        size += sys.getsizeof(an_object.__dict__)
+    except AttributeError:
+        pass
+    return size
+
+
+#------------------------------------------------------------------------------
+def measure(option_class, number_of_options):
+    if tracemalloc is not None:
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        options = make_options(option_class, number_of_options)
+        after = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        # the names, docs and default values are made alike for both
+        # classes, they're included in the measurement
+        return after - before
+    options = make_options(option_class, number_of_options)
+    return sum(estimated_size(x) for x in options)
+
+
+#==============================================================================
+if __name__ == "__main__":
+    number_of_options = 50000
+    if len(sys.argv) > 1:
+        number_of_options = int(sys.argv[1])
+    if tracemalloc is None:
+        print "tracemalloc unavailable, estimating with sys.getsizeof"
+    for option_class in (DictOption, Option):
+        total = measure(option_class, number_of_options)
+        print '%-10s %10d options %12d bytes %8.1f bytes/option' % (
+            option_class.__name__,
+            number_of_options,
+            total,
+            float(total) / number_of_options
+        )
@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""This benchmark times the overlay of a few value sources, each overriding
+a handful of options, onto a large number of option definitions.  It
+compares the overlay that asks each value source for its values once and
+intersects its keys with the keys of the options, with the overlay that
+configman used to have: asking every value source for every key and
+catching the KeyError of each miss."""
+
+import sys
+import time
+
+from configman import ConfigurationManager, Namespace
+from configman.dotdict import DotDict, DotDictWithAcquisition
+
+
+#==============================================================================
+class ProbingConfigurationManager(ConfigurationManager):
+    """a ConfigurationManager with the former, key by key overlay"""
+    #--------------------------------------------------------------------------
+    def _overlay_value_sources(self, keys):
+        for key in keys:
+            for source_index, a_value_source in enumerate(
+                self.values_source_list
+            ):
+                try:
+                    val_src_dict = a_value_source.get_values(
+                        self,
+                        True,
+                        self.value_source_object_hook
+                    )
+                    raw_value = val_src_dict[key]
+                    opt = self.option_definitions[key]
+                    opt.has_changed = opt.default != raw_value
+                    opt.default = raw_value
+                    self._provenance[key] = (source_index, raw_value)
+                except KeyError:
+                    pass
+
+
+#------------------------------------------------------------------------------
+def make_definitions(number_of_namespaces, options_per_namespace):
+    definitions = Namespace()
+    for i in xrange(number_of_namespaces):
+        definitions.namespace('namespace_%d' % i)
+        a_namespace = definitions['namespace_%d' % i]
+        for j in xrange(options_per_namespace):
+            a_namespace.add_option('option_%d' % j, default=j)
+    return definitions
+
+
+#------------------------------------------------------------------------------
+def make_value_sources(number_of_sources, number_of_namespaces):
+    return [
+        dict(
+            ('namespace_%d.option_%d' % ((i + j) % number_of_namespaces, j),
+             str(i * j))
+            for j in xrange(5)
+        )
+        for i in xrange(number_of_sources)
+    ]
+
+
+#------------------------------------------------------------------------------
+def timed(manager_class, definitions, value_sources, object_hook):
+    start = time.time()
+    manager_class(
+        definitions,
+        values_source_list=value_sources,
+        argv_source=[],
+        use_auto_help=False,
+        use_admin_controls=False,
+        value_source_object_hook=object_hook,
+    )
+    return time.time() - start
+
+
+#==============================================================================
+if __name__ == "__main__":
+    number_of_namespaces = 100
+    options_per_namespace = 20
+    number_of_sources = 4
+    if len(sys.argv) > 1:
+        number_of_namespaces = int(sys.argv[1])
+    definitions = make_definitions(number_of_namespaces, options_per_namespace)
+    value_sources = make_value_sources(number_of_sources, number_of_namespaces)
+    print '%d options, %d value sources of 5 values' % (
+        number_of_namespaces * options_per_namespace,
+        number_of_sources
+    )
+    for object_hook in (DotDict, DotDictWithAcquisition):
+        for manager_class in (
+            ProbingConfigurationManager,
+            ConfigurationManager
+        ):
+            print '%-28s %-24s %8.3fs' % (
+                manager_class.__name__,
+                object_hook.__name__,
+                timed(manager_class, definitions, value_sources, object_hook)
+            )
@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""This benchmark compares two ways for a worker process to get a config:
+constructing a ConfigurationManager from the definitions and calling its
+'get_config', or unpickling a config that was made once and pickled.  The
+size of the pickle is shown along with the time to load it.  The option
+definitions themselves are also pickled, for workers that need the
+Options rather than the values.
+
+The definitions have 50 namespaces of 20 options each by default, including
+a class option in each namespace."""
+
+import cPickle
+import sys
+import time
+
+from configman import ConfigurationManager, Namespace
+from configman.converters import class_converter
+
+
+#------------------------------------------------------------------------------
+def make_definitions(number_of_namespaces, options_per_namespace):
+    n = Namespace()
+    n.add_option('app_name', default='benchmark')
+    for i in xrange(number_of_namespaces):
+        a_namespace = Namespace(doc='namespace %d' % i)
+        a_namespace.add_option(
+            'cls',
+            default='configman.dotdict.DotDict',
+            from_string_converter=class_converter
+        )
+        for j in xrange(options_per_namespace - 1):
+            a_namespace.add_option(
+                'option_%d' % j,
+                default=j,
+                doc='option %d of namespace %d' % (j, i)
+            )
+        n['namespace_%d' % i] = a_namespace
+    return n
+
+
+#------------------------------------------------------------------------------
+def construct(definitions):
+    return ConfigurationManager(
+        definitions,
+        values_source_list=[],
+        argv_source=[],
+    ).get_config()
+
+
+#------------------------------------------------------------------------------
+def best_time(function, *args):
+    best = None
+    for i in xrange(5):
+        start = time.time()
+        function(*args)
+        elapsed = time.time() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+#==============================================================================
+if __name__ == "__main__":
+    number_of_namespaces = 50
+    options_per_namespace = 20
+    if len(sys.argv) > 1:
+        number_of_namespaces = int(sys.argv[1])
+    if len(sys.argv) > 2:
+        options_per_namespace = int(sys.argv[2])
+    print '%d namespaces of %d options' % (
+        number_of_namespaces,
+        options_per_namespace
+    )
+    print '%-28s %8.4fs' % (
+        'construct and get_config',
+        best_time(
+            lambda: construct(
+                make_definitions(number_of_namespaces, options_per_namespace)
+            )
+        )
+    )
+    config_manager = ConfigurationManager(
+        make_definitions(number_of_namespaces, options_per_namespace),
+        values_source_list=[],
+        argv_source=[],
+    )
+    for name, an_object in (
+        ('config', config_manager.get_config()),
+        ('option definitions', config_manager.option_definitions),
+    ):
+        pickled = cPickle.dumps(an_object, cPickle.HIGHEST_PROTOCOL)
+        print '%-28s %8.4fs %8d bytes' % (
+            'unpickle %s' % name,
+            best_time(cPickle.loads, pickled),
+            len(pickled)
+        )
@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""This benchmark times the construction of a ConfigurationManager for the
+shared resource layout: many namespaces whose options all take their
+defaults, by 'reference_value_from', from one common 'resource.postgresql'
+namespace.  Some of the namespaces override a referenced value of their own.
+Each namespace also has a class option, so the overlay needs several passes
+as the classes are expanded."""
+
+import sys
+import time
+
+from configman import ConfigurationManager, Namespace, RequiredConfig
+from configman.converters import class_converter
+
+
+#==============================================================================
+class Crontab(RequiredConfig):
+    required_config = Namespace()
+    required_config.add_option(
+        'schedule',
+        default='daily',
+        reference_value_from='resource.postgresql'
+    )
+
+
+#------------------------------------------------------------------------------
+def make_definitions(number_of_namespaces):
+    definitions = Namespace()
+    for i in xrange(number_of_namespaces):
+        definitions.namespace('app_%d' % i)
+        a_namespace = definitions['app_%d' % i]
+        for name, default in (
+            ('host', 'localhost'),
+            ('port', 5432),
+            ('user', 'postgres'),
+            ('password', 'secret'),
+            ('database', 'app'),
+        ):
+            a_namespace.add_option(
+                name,
+                default=default,
+                reference_value_from='resource.postgresql'
+            )
+        a_namespace.add_option(
+            'crontab_class',
+            default=Crontab,
+            from_string_converter=class_converter
+        )
+    return definitions
+
+
+#==============================================================================
+if __name__ == "__main__":
+    number_of_namespaces = 200
+    if len(sys.argv) > 1:
+        number_of_namespaces = int(sys.argv[1])
+    definitions = make_definitions(number_of_namespaces)
+    value_sources = [
+        {
+            'resource.postgresql.host': 'db1',
+            'resource.postgresql.port': '6543',
+        },
+        dict(
+            ('app_%d.host' % i, 'db%d' % i)
+            for i in xrange(0, number_of_namespaces, 10)
+        ),
+    ]
+    start = time.time()
+    config_manager = ConfigurationManager(
+        definitions,
+        values_source_list=value_sources,
+        argv_source=[],
+    )
+    elapsed = time.time() - start
+    config = config_manager.get_config()
+    assert config.app_1.host == 'db1'
+    assert config.app_10.host == 'db10'
+    assert config.app_1.port == 6543
+    print '%d namespaces referencing resource.postgresql %8.3fs' % (
+        number_of_namespaces,
+        elapsed
+    )
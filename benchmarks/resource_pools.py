@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""This benchmark measures the throughput of transactions run through the
+resource factories of configman.resources.  The resources are fake database
+connections, like the FakeDatabaseConnection of demo/advanced_demo3.py, that
+take a millisecond to connect and a tenth of a millisecond for each query.
+
+Several threads each run many transactions with the factory's 'run' method,
+first with a ResourceFactory that connects for every transaction, then with
+a ThreadLocalResourcePool and a BoundedResourcePool smaller than the number
+of threads.
+
+By default, 8 threads run 500 transactions each."""
+
+import sys
+import threading
+import time
+
+from configman import ConfigurationManager, Namespace
+from configman.resources import (
+    ResourceFactory,
+    ThreadLocalResourcePool,
+    BoundedResourcePool,
+    add_resource,
+)
+
+
+#==============================================================================
+class FakeDatabaseConnection(object):
+    """a stand in for a database connection with a slow connect"""
+    connections = 0
+    lock = threading.Lock()
+
+    #--------------------------------------------------------------------------
+    def __init__(self, config):
+        time.sleep(0.001)
+        with FakeDatabaseConnection.lock:
+            FakeDatabaseConnection.connections += 1
+
+    #--------------------------------------------------------------------------
+    def query(self, query):
+        time.sleep(0.0001)
+        return query
+
+    #--------------------------------------------------------------------------
+    def close(self):
+        pass
+
+
+#------------------------------------------------------------------------------
+def transaction(connection):
+    return connection.query('select * from life')
+
+
+#------------------------------------------------------------------------------
+def timed(factory_class, threads, transactions):
+    n = Namespace()
+    add_resource(
+        n,
+        'database',
+        default=factory_class,
+        creator='%s.FakeDatabaseConnection' % __name__
+    )
+    values = {}
+    if issubclass(factory_class, BoundedResourcePool):
+        values['max_size'] = max(1, threads // 2)
+    config_manager = ConfigurationManager(
+        n,
+        values_source_list=[values],
+        argv_source=[],
+    )
+    FakeDatabaseConnection.connections = 0
+
+    with config_manager.context() as config:
+        def work():
+            for i in xrange(transactions):
+                config.database.run(transaction)
+        workers = [threading.Thread(target=work) for i in xrange(threads)]
+        start = time.time()
+        for a_worker in workers:
+            a_worker.start()
+        for a_worker in workers:
+            a_worker.join()
+        elapsed = time.time() - start
+    return elapsed, FakeDatabaseConnection.connections
+
+
+#==============================================================================
+if __name__ == "__main__":
+    threads = 8
+    transactions = 500
+    if len(sys.argv) > 1:
+        threads = int(sys.argv[1])
+    if len(sys.argv) > 2:
+        transactions = int(sys.argv[2])
+    total = threads * transactions
+    print '%d threads running %d transactions each' % (threads, transactions)
+    for factory_class in (
+        ResourceFactory,
+        ThreadLocalResourcePool,
+        BoundedResourcePool,
+    ):
+        elapsed, connections = timed(factory_class, threads, transactions)
+        print '%-24s %8.0f transactions/s %6d connections' % (
+            factory_class.__name__,
+            total / elapsed,
+            connections
+        )
@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""This benchmark times the end of a ConfigurationManager's 'context': the
+closing of the resources of the config.  Each resource is an Aggregation
+that takes 50ms to close, like a pool draining its connections, and one of
+them hangs for 10s.  The Aggregations declare that they depend on nothing.
+
+The resources are closed one after another, then concurrently in a thread
+executor with a timeout of a quarter of a second for each close.
+
+By default there are 20 resources."""
+
+import sys
+import time
+
+from configman import ConfigurationManager, Namespace
+from configman.tests.executors import ThreadExecutor
+
+
+#==============================================================================
+class SlowToClose(object):
+    #--------------------------------------------------------------------------
+    def __init__(self, delay):
+        self.delay = delay
+
+    #--------------------------------------------------------------------------
+    def close(self):
+        time.sleep(self.delay)
+
+
+#------------------------------------------------------------------------------
+def make_resource(delay):
+    def a_resource(config, local_config, args):
+        return SlowToClose(delay)
+    return a_resource
+
+
+#------------------------------------------------------------------------------
+def timed(number_of_resources, hang, executor=None, timeout=None):
+    n = Namespace()
+    for i in xrange(number_of_resources):
+        n.add_aggregation(
+            'resource_%d' % i,
+            make_resource(0.05),
+            depends_on=()
+        )
+    if hang:
+        n.add_aggregation('hanging', make_resource(10.0), depends_on=())
+    config_manager = ConfigurationManager(
+        n,
+        values_source_list=[],
+        argv_source=[],
+        close_executor=executor,
+        close_timeout=timeout,
+    )
+    with config_manager.context():
+        start = time.time()
+    return time.time() - start, config_manager.shutdown_summary
+
+
+#==============================================================================
+if __name__ == "__main__":
+    number_of_resources = 20
+    if len(sys.argv) > 1:
+        number_of_resources = int(sys.argv[1])
+    print '%d resources taking 50ms each to close' % number_of_resources
+    for name, hang, executor, timeout in (
+        ('one after another', False, None, None),
+        ('concurrently', False, ThreadExecutor(), None),
+        ('concurrently, one hangs', True, ThreadExecutor(), 0.25),
+    ):
+        elapsed, summary = timed(number_of_resources, hang, executor, timeout)
+        print '%-26s %8.3fs %3d closed %d timed out' % (
+            name,
+            elapsed,
+            len(summary.results),
+            len(summary.timeouts)
+        )
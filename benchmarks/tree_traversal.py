@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""This benchmark times listing every key of a tree of nested DotDicts.  It
+compares 'keys_breadth_first', now built on the iterative 'walk_tree', with
+the recursive generator that it used to be.  The recursive generator passes
+every key up through one generator per level and formats a new string at
+each level, so a deep tree costs it the square of its depth.  Past the
+recursion limit it fails altogether.
+
+Two trees are walked: a deep one, a chain of namespaces each holding one
+key, and a wide one with a fan out of 10 at each level."""
+
+import sys
+import time
+
+from configman.dotdict import DotDict
+
+
+#------------------------------------------------------------------------------
+def recursive_keys_breadth_first(a_dot_dict, include_dicts=False):
+    """the former, recursive DotDict.keys_breadth_first"""
+    namespaces = []
+    for key in a_dot_dict._keys_in_order():
+        if isinstance(getattr(a_dot_dict, key), DotDict):
+            namespaces.append(key)
+            if include_dicts:
+                yield key
+        else:
+            yield key
+    for a_namespace in namespaces:
+        for key in recursive_keys_breadth_first(
+            a_dot_dict[a_namespace],
+            include_dicts
+        ):
+            yield '%s.%s' % (a_namespace, key)
+
+
+#------------------------------------------------------------------------------
+def iterative_keys_breadth_first(a_dot_dict, include_dicts=False):
+    return a_dot_dict.keys_breadth_first(include_dicts)
+
+
+#------------------------------------------------------------------------------
+def make_deep_tree(depth):
+    tree = DotDict()
+    current = tree
+    for i in xrange(depth):
+        current['key'] = i
+        current['next'] = DotDict()
+        current = current['next']
+    return tree
+
+
+#------------------------------------------------------------------------------
+def make_wide_tree(depth, fan_out):
+    tree = DotDict()
+    if depth == 1:
+        for i in xrange(fan_out):
+            tree['key_%d' % i] = i
+        return tree
+    for i in xrange(fan_out):
+        tree['namespace_%d' % i] = make_wide_tree(depth - 1, fan_out)
+    return tree
+
+
+#------------------------------------------------------------------------------
+def timed(a_walker, tree):
+    start = time.time()
+    try:
+        number_of_keys = sum(1 for key in a_walker(tree))
+    except RuntimeError:
+        return 'recursion limit exceeded'
+    return '%8.3fs %8d keys' % (time.time() - start, number_of_keys)
+
+
+#==============================================================================
+if __name__ == "__main__":
+    depths = [250, 900, 2000]
+    if len(sys.argv) > 1:
+        depths = [int(x) for x in sys.argv[1:]]
+    trees = [
+        ('deep %d' % depth, make_deep_tree(depth))
+        for depth in depths
+    ]
+    trees.append(('wide 10**5', make_wide_tree(5, 10)))
+    for name, tree in trees:
+        for a_walker in (
+            recursive_keys_breadth_first,
+            iterative_keys_breadth_first
+        ):
+            print '%-12s %-30s %s' % (name, a_walker.__name__, timed(
+                a_walker,
+                tree
+            ))
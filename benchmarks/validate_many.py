@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""This benchmark times the validation of many json config files against the
+same definitions with an increasing number of worker processes."""
+
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from configman.namespace import Namespace
+from configman.validation import validate_many
+
+
+#------------------------------------------------------------------------------
+def make_definitions(number_of_options):
+    definitions = Namespace()
+    for i in xrange(number_of_options):
+        definitions.add_option('option_%d' % i, default=i)
+    return definitions
+
+
+#------------------------------------------------------------------------------
+def make_files(directory, number_of_files, number_of_options):
+    paths = []
+    for i in xrange(number_of_files):
+        pathname = os.path.join(directory, 'host_%d.json' % i)
+        with open(pathname, 'w') as f:
+            json.dump(
+                dict(
+                    ('option_%d' % j, str(i + j))
+                    for j in xrange(0, number_of_options, 10)
+                ),
+                f
+            )
+        paths.append(pathname)
+    return paths
+
+
+#==============================================================================
+if __name__ == "__main__":
+    number_of_files = 2000
+    number_of_options = 200
+    if len(sys.argv) > 1:
+        number_of_files = int(sys.argv[1])
+    directory = tempfile.mkdtemp()
+    try:
+        definitions = make_definitions(number_of_options)
+        paths = make_files(directory, number_of_files, number_of_options)
+        workers = 1
+        while workers <= multiprocessing.cpu_count():
+            start = time.time()
+            results = validate_many(definitions, paths, workers=workers)
+            elapsed = time.time() - start
+            assert all(r.is_valid for r in results)
+            print '%3d workers %8.3fs %10.1f files/s' % (
+                workers,
+                elapsed,
+                number_of_files / elapsed
+            )
+            workers *= 2
+    finally:
+        shutil.rmtree(directory)
@@ -13,7 +13,10 @@ with open(path.join(path.dirname(__file__), 'version.txt')) as f:
 #    from configman import Namespace, ConfigurationManager
 #
 
-from configman.config_manager import ConfigurationManager
+from configman.config_manager import (
+    ConfigurationManager,
+    CompiledDefinitions
+)
 from configman.required_config import RequiredConfig
 from configman.namespace import Namespace
 from configman.config_file_future_proxy import ConfigFileFutureProxy
@@ -23,6 +26,10 @@ from configman.converters import (
     timedelta_converter
 )
 from configman.environment import environment
+from configman.validation import (
+    validate_many,
+    collect_report
+)
 from configman.command_line import command_line
 
 
@@ -25,3 +25,7 @@ class OptionError(ConfigmanException):
 
 class CannotConvertError(ConfigmanException):
     pass
+
+
+class ResourceUnavailableError(ConfigmanException):
+    pass
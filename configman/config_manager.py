@@ -9,6 +9,9 @@ import inspect
 import os.path
 import contextlib
 import functools
+import hashlib
+import threading
+import types
 import warnings
 
 #==============================================================================
@@ -16,32 +19,287 @@ import warnings
 # import these symbols from here rather than their origin definition location.
 # PyFlakes may erroneously flag some of these as unused
 from configman.command_line import command_line
-from configman.converters import to_string_converters
-from configman.config_exceptions import NotAnOptionError
+from configman.converters import (
+    to_string_converters,
+    batch_convert,
+    reusing_class_list_proxies
+)
+from configman.config_exceptions import (
+    NotAnOptionError,
+    CannotConvertError
+)
 from configman.config_file_future_proxy import ConfigFileFutureProxy
 from configman.def_sources import setup_definitions
 from configman.dotdict import (
     DotDict,
     DotDictWithAcquisition,
-    iteritems_breadth_first
+    branch_items,
+    iteritems_breadth_first,
+    walk_tree,
+    PRE_ORDER,
 )
 from configman.environment import environment
+from configman.lazy_instance import materialized
 from configman.namespace import Namespace
 from configman.option import (
     Option,
-    Aggregation
+    Aggregation,
+    DISCOVER_DEPENDENCIES,
 )
 # The following is not used directly in this file, but made available as
 # a type to be imported from this module
 from configman.required_config import RequiredConfig
+from configman.shutdown import close_order, close_resources
 from configman.value_sources import (
     config_filename_from_commandline,
     wrap_with_value_source_api,
     dispatch_request_to_write,
     file_extension_dispatch,
+    value_source_name,
+    value_source_line_number,
+)
+
+
+# the value of a key that an Aggregation depends on when the key isn't in the
+# config
+_MISSING = object()
+
+
+# the evaluation of an Aggregation that was skipped because its inputs were
+# unchanged
+_UNCHANGED = object()
+
+
+# the '__getitem__' functions of the mapping classes whose values can be found
+# from the set of their keys, see '_find_value_source_hits'
+_KEY_SET_LOOKUPS = (
+    DotDict.__getitem__.__func__,
+    DotDictWithAcquisition.__getitem__.__func__,
 )
 
 
+# the types of the values that are their own stable form, see '_stable_form'
+_PLAIN_TYPES = frozenset((
+    str,
+    unicode,
+    int,
+    long,
+    float,
+    bool,
+    type(None),
+))
+
+
+# the types of the values that '_stable_form' gives by their names
+_NAMED_TYPES = (
+    type,
+    types.ClassType,
+    types.FunctionType,
+    types.BuiltinFunctionType,
+    types.ModuleType,
+)
+
+
+#------------------------------------------------------------------------------
+def _stable_form(value):
+    """return a form of the value whose repr, for a fingerprint, is the same
+    from one run to the next.  Classes, functions and modules are given by
+    their names rather than by reprs that hold their addresses.  A class
+    made at run time, like the proxy classes of
+    'str_to_classes_in_namespaces', shares its name with every other class
+    made by the same code, so it is also given by what it holds."""
+    if type(value) in _PLAIN_TYPES:
+        return value
+    if isinstance(value, (list, tuple)):
+        return (type(value).__name__, tuple(_stable_form(x) for x in value))
+    if isinstance(value, _NAMED_TYPES):
+        module_name = getattr(value, '__module__', '')
+        name = '%s.%s' % (module_name, value.__name__)
+        module = sys.modules.get(module_name)
+        if getattr(module, value.__name__, None) is value:
+            return name
+        return (name, _class_contents(value))
+    return repr(value)
+
+
+#------------------------------------------------------------------------------
+def _class_contents(a_class):
+    """return what tells apart the classes that share a name: the string
+    from its 'to_str', like the list of classes of a class list proxy, or
+    else the keys of its 'required_config'"""
+    try:
+        return a_class.to_str()
+    except (AttributeError, KeyError, TypeError):
+        pass
+    required_config = getattr(a_class, 'required_config', None)
+    if isinstance(required_config, DotDict):
+        return tuple(required_config.keys_breadth_first())
+    if isinstance(required_config, collections.Mapping):
+        return tuple(sorted(required_config))
+    return None
+
+
+#------------------------------------------------------------------------------
+def as_definition_source_list(definition_source):
+    """return the definition source in the form of a list of definition
+    sources"""
+    # instead of allowing mutables as default keyword argument values...
+    if definition_source is None:
+        return []
+    elif (
+        isinstance(definition_source, collections.Sequence) and
+        not isinstance(definition_source, basestring)
+    ):
+        return list(definition_source)
+    else:
+        return [definition_source]
+
+
+#------------------------------------------------------------------------------
+def setup_definition_sources(definition_source_list, option_definitions):
+    """set up the definitions from each of the definition sources in the
+    Namespace 'option_definitions'"""
+    for a_definition_source in definition_source_list:
+        try:
+            safe_copy_of_def_source = a_definition_source.safe_copy()
+        except AttributeError:
+            # apparently, the definition source was not in the form of a
+            # Namespace object.  This isn't a show stopper, but we don't
+            # know how to make a copy of this object safely: we know from
+            # experience that the stock copy.copy method leads to grief
+            # as many sub-objects within an option definition source can
+            # not be copied that way (classes, for example).
+            # The only action we can take is to trust and continue with the
+            # original copy of the definition source.
+            safe_copy_of_def_source = a_definition_source
+        setup_definitions(
+            safe_copy_of_def_source,
+            option_definitions
+        )
+
+
+#------------------------------------------------------------------------------
+def _same_value(value, other_value):
+    """True if the two values are the same object, or are equal and of the
+    same type.  The type matters: 1 and True are equal, but a converter may
+    not treat them alike."""
+    return value is other_value or (
+        type(value) is type(other_value) and value == other_value
+    )
+
+
+#==============================================================================
+class CompiledDefinitions(object):
+    """the option definitions of a list of definition sources, set up once
+    and with every default converted.  It can be given as the definition
+    source to any number of ConfigurationManagers.  Each copies the compiled
+    Options and overlays only its own value sources, so only the Options
+    that its value sources change are converted again.  The copy is not
+    free: each ConfigurationManager still pays for one copy of every Option,
+    what is saved is converting their defaults.
+    Classes brought in by the values of Options are still expanded by each
+    ConfigurationManager, as their values may differ.
+
+    The help and admin options are not compiled, they depend on the
+    arguments of each ConfigurationManager."""
+
+    #--------------------------------------------------------------------------
+    def __init__(self, definition_source):
+        """parameters:
+            definition_source - a namespace or list of namespaces from which
+                                the definitions of the configuration
+                                parameters are fetched"""
+        self.option_definitions = Namespace()
+        setup_definition_sources(
+            as_definition_source_list(definition_source),
+            self.option_definitions
+        )
+        # the compiled Options by their keys in the form 'x.y.z'
+        self.options_by_key = {}
+        for key in self.option_definitions.keys_breadth_first():
+            an_option = self.option_definitions[key]
+            if isinstance(an_option, Option):
+                an_option.set_value(an_option.default)
+                self.options_by_key[key] = an_option
+
+
+#==============================================================================
+class ReferenceValueGraph(object):
+    """the links made by the 'reference_value_from' attribute of Options.
+    Each link goes from the key of a referencing Option to the key of the
+    Option whose default it takes, both in the form 'x.y.z'.  A referenced
+    key may itself reference another, so the links form a graph that must be
+    resolved in topological order."""
+
+    #--------------------------------------------------------------------------
+    def __init__(self):
+        # the referenced key for each referencing key
+        self.referenced_keys = {}
+        # the list of referencing keys for each referenced key
+        self.referencing_keys = collections.defaultdict(list)
+        # the paths of the namespaces already tagged as holding referenced
+        # values
+        self._namespaces = set()
+
+    #--------------------------------------------------------------------------
+    def add_link(self, key, referenced_key):
+        self.referenced_keys[key] = referenced_key
+        self.referencing_keys[referenced_key].append(key)
+
+    #--------------------------------------------------------------------------
+    def new_namespaces(self, referenced_key):
+        """return the paths of the enclosing namespaces of a referenced key
+        that haven't been returned before, innermost first"""
+        parts = referenced_key.split('.')[:-1]
+        new_paths = []
+        for i in range(len(parts), 0, -1):
+            a_path = '.'.join(parts[:i])
+            if a_path in self._namespaces:
+                break  # its enclosing namespaces have been returned too
+            self._namespaces.add(a_path)
+            new_paths.append(a_path)
+        return new_paths
+
+    #--------------------------------------------------------------------------
+    def _depth(self, key):
+        """the number of links to follow from a key to a key that doesn't
+        reference another"""
+        depth = 0
+        seen = set([key])
+        while key in self.referenced_keys:
+            key = self.referenced_keys[key]
+            if key in seen:
+                break  # a cycle of references, there is no default to take
+            seen.add(key)
+            depth += 1
+        return depth
+
+    #--------------------------------------------------------------------------
+    def levels(self, keys):
+        """return the keys, joined by every key that references any of them
+        directly or indirectly, as a list of lists in topological order.  The
+        first list holds the keys that reference nothing among them, each
+        following list holds the keys that reference keys in the lists
+        before it.  Within a list, the keys keep their order."""
+        ordered_keys = []
+        seen = set()
+        queue = collections.deque(keys)
+        while queue:
+            key = queue.popleft()
+            if key in seen:
+                continue
+            seen.add(key)
+            ordered_keys.append(key)
+            queue.extend(self.referencing_keys.get(key, ()))
+        levels = []
+        for key in ordered_keys:
+            depth = self._depth(key)
+            while len(levels) <= depth:
+                levels.append([])
+            levels[depth].append(key)
+        return [a_level for a_level in levels if a_level]
+
+
 #==============================================================================
 class ConfigurationManager(object):
 
@@ -62,13 +320,20 @@ class ConfigurationManager(object):
         config_pathname='.',
         config_optional=True,
         value_source_object_hook=DotDict,
+        value_source_executor=None,
+        help_cache_pathname=None,
+        aggregation_executor=None,
+        close_executor=None,
+        close_timeout=None,
+        cache_config=False,
     ):
         """create and initialize a configman object.
 
         parameters:
           definition_source - a namespace or list of namespaces from which
                               configman is to fetch the definitions of the
-                              configuration parameters.
+                              configuration parameters.  It may also be a
+                              CompiledDefinitions.
           values_source_list - (optional) a hierarchical list of sources for
                                values for the configuration parameters.
                                As values are copied from these sources,
@@ -109,18 +374,40 @@ class ConfigurationManager(object):
                                      representation of a value source.
                                      This is used to enable any special
                                      processing, like key translations.
+          value_source_executor - an executor, like those from the module
+                                  'concurrent.futures', in which the value
+                                  sources are loaded concurrently.  If None,
+                                  they are loaded one after another.
+          help_cache_pathname - the pathname of a file in which to cache the
+                                rendered help output between runs.  If None,
+                                the help output is cached only in memory.
+          aggregation_executor - an executor, like those from the module
+                                 'concurrent.futures', in which Aggregations
+                                 with known dependencies that don't depend on
+                                 one another are evaluated concurrently.  If
+                                 None, they are evaluated one after another.
+          close_executor - an executor, like those from the module
+                           'concurrent.futures', in which the resources of a
+                           'context' that don't depend on one another are
+                           closed concurrently.  If None, they are closed one
+                           after another.
+          close_timeout - with a 'close_executor', the most seconds to wait
+                          for each resource to close at the end of a
+                          'context'.  If None, there is no limit.
+          cache_config - if True, 'get_config' returns the same config again
+                         while the option definitions are unchanged.  The
+                         callers then share it and must treat it as read
+                         only.
                             """
 
-        # instead of allowing mutables as default keyword argument values...
-        if definition_source is None:
+        if isinstance(definition_source, CompiledDefinitions):
+            compiled_definitions = definition_source
             definition_source_list = []
-        elif (
-            isinstance(definition_source, collections.Sequence) and
-            not isinstance(definition_source, basestring)
-        ):
-            definition_source_list = list(definition_source)
         else:
-            definition_source_list = [definition_source]
+            compiled_definitions = None
+            definition_source_list = as_definition_source_list(
+                definition_source
+            )
 
         if argv_source is None:
             self.argv_source = sys.argv[1:]
@@ -135,6 +422,9 @@ class ConfigurationManager(object):
 
         self.value_source_object_hook = value_source_object_hook
 
+        self.help_cache_pathname = help_cache_pathname
+        self._help_cache = None  # the fingerprint and text of the last help
+
         self.app_name = app_name
         self.app_version = app_version
         self.app_description = app_description
@@ -144,7 +434,47 @@ class ConfigurationManager(object):
 
         self._config = None  # eventual container for DOM-like config object
 
-        self.option_definitions = Namespace()
+        self.cache_config = cache_config
+        # the configs made by 'get_config' by their mapping classes, each with
+        # the option definitions and the fingerprint of them it was made from
+        self._config_cache = {}
+
+        self.aggregation_executor = aggregation_executor
+        # what each Aggregation, by the path of its key, was last evaluated
+        # from: its function, its 'depends_on', the commandline arguments,
+        # the keys that it depends on, the values of those keys and the
+        # value that it returned.  An Aggregation is evaluated again only
+        # if any of these have changed.
+        self._aggregation_inputs = {}
+
+        self.close_executor = close_executor
+        self.close_timeout = close_timeout
+        # the ShutdownSummary of the end of the last 'context'
+        self.shutdown_summary = None
+
+        # the most recently published config.  Readers fetch it with a single
+        # attribute access, writers serialize on the lock and replace it.
+        self._published_config = None
+        self._publication_lock = threading.Lock()
+
+        # where the default of each option key came from, if not from the
+        # definitions: a tuple of the index of the value source in the
+        # values_source_list and the value as the value source gave it.
+        # A side table keeps the Options small and recording cheap, the
+        # rest of the story is worked out by 'explain' when asked.
+        self._provenance = {}
+
+        if compiled_definitions is None:
+            self.option_definitions = Namespace()
+            # the Options that are known to be converted from their defaults
+            self._compiled_options = {}
+        else:
+            # copies of the compiled Options, their values already converted
+            self.option_definitions = \
+                compiled_definitions.option_definitions.safe_copy(
+                    keep_docs=True
+                )
+            self._compiled_options = compiled_definitions.options_by_key
         self.definition_source_list = definition_source_list
 
         if values_source_list is None:
@@ -169,6 +499,7 @@ class ConfigurationManager(object):
             'admin.print_conf',
             'admin.strict',
             'admin.expose_secrets',
+            'admin.explain',
         ]
         self.options_banned_from_help = options_banned_from_help
 
@@ -180,23 +511,10 @@ class ConfigurationManager(object):
 
         # iterate through the option definitions to create the nested dict
         # hierarchy of all the options called 'option_definitions'
-        for a_definition_source in self.definition_source_list:
-            try:
-                safe_copy_of_def_source = a_definition_source.safe_copy()
-            except AttributeError:
-                # apparently, the definition source was not in the form of a
-                # Namespace object.  This isn't a show stopper, but we don't
-                # know how to make a copy of this object safely: we know from
-                # experience that the stock copy.copy method leads to grief
-                # as many sub-objects within an option definition source can
-                # not be copied that way (classes, for example).
-                # The only action we can take is to trust and continue with the
-                # original copy of the definition source.
-                safe_copy_of_def_source = a_definition_source
-            setup_definitions(
-                safe_copy_of_def_source,
-                self.option_definitions
-            )
+        setup_definition_sources(
+            self.definition_source_list,
+            self.option_definitions
+        )
 
         if use_admin_controls:
             # the name of the config file needs to be loaded from the command
@@ -210,10 +528,12 @@ class ConfigurationManager(object):
 
         self.values_source_list = wrap_with_value_source_api(
             values_source_list,
-            self
+            self,
+            value_source_executor
         )
 
-        known_keys = self._overlay_expand()
+        with reusing_class_list_proxies():
+            known_keys = self._overlay_expand()
         self._check_for_mismatches(known_keys)
 
         # the app_name, app_version and app_description are to come from
@@ -246,60 +566,272 @@ class ConfigurationManager(object):
             self.dump_conf()
             admin_tasks_done = True
 
+        if use_admin_controls and self._get_option('admin.explain').value:
+            self.print_explanation(self._get_option('admin.explain').value)
+            admin_tasks_done = True
+
         if quit_after_admin and admin_tasks_done:
             sys.exit()
 
+    #--------------------------------------------------------------------------
+    @classmethod
+    def create(cls, executor, *args, **kwargs):
+        """construct a ConfigurationManager in an executor so that the
+        caller isn't blocked by the reading of config files and the importing
+        of modules.  The remaining arguments are those of the constructor.
+        Returns the future that the executor's 'submit' method returns.
+
+        parameters:
+            executor - an object with a 'submit' method that works like that
+                       of the executors from 'concurrent.futures'
+        """
+        return executor.submit(cls, *args, **kwargs)
+
     #--------------------------------------------------------------------------
     @contextlib.contextmanager
     def context(self, mapping_class=DotDictWithAcquisition):
-        """return a config as a context that calls close on every item when
-        it goes out of scope"""
+        """return a config as a context that closes every item that has a
+        'close' method when it goes out of scope.  The items are closed in
+        the reverse of the order that they were created, an Aggregation
+        before the items that it depends on.  With a 'close_executor', the
+        items that don't depend on one another are closed concurrently.  A
+        failed close doesn't stop the others.  The outcome of every close is
+        kept in the ShutdownSummary 'shutdown_summary'.  Then the first
+        exception raised by a close is raised again, unless the context
+        itself ended with an exception."""
         config = None
         try:
-            config = self.get_config(mapping_class=mapping_class)
+            # the items of this config are closed at the end of the context,
+            # so it is made for the context alone rather than taken from the
+            # cache of 'get_config'
+            config = self._build_config(
+                self.option_definitions,
+                mapping_class,
+                reuse_aggregations=False
+            )
             yield config
-        finally:
+        except:
             if config:
-                self._walk_and_close(config)
+                self._close_config(config)
+            raise
+        else:
+            failures = self._close_config(config).failures
+            if failures:
+                raise failures[0].error
 
     #--------------------------------------------------------------------------
     def get_config(self, mapping_class=DotDictWithAcquisition):
-        config = self._generate_config(mapping_class)
-        if self._aggregate(self.option_definitions, config, config):
-            # state changed, must regenerate
-            return self._generate_config(mapping_class)
-        else:
-            return config
+        """return the config, a tree of mappings of the class 'mapping_class'
+        holding the values of the options.  With 'cache_config', the config
+        is generated once and returned again by later calls for as long as
+        the keys of the option definitions are unchanged and the values of
+        the Options, the functions of the Aggregations and the commandline
+        arguments are the very same objects.  Being shared, that config
+        should be treated as read only.  Checking that takes a walk over
+        every Namespace, Option and Aggregation, so even a call answered
+        from the cache costs time in proportion to the number of options.
+        It is still much cheaper than generating the config.
+
+        parameters:
+            mapping_class - the mapping type used for the config"""
+        option_definitions = self.option_definitions
+        if not self.cache_config:
+            return self._build_config(option_definitions, mapping_class)
+        fingerprint = self._definitions_fingerprint(option_definitions)
+        try:
+            cached_definitions, cached_fingerprint, config = \
+                self._config_cache[mapping_class]
+            if (
+                cached_definitions is option_definitions
+                and self._same_fingerprint(cached_fingerprint, fingerprint)
+            ):
+                return config
+        except KeyError:
+            pass
+        config = self._build_config(option_definitions, mapping_class)
+        self._config_cache[mapping_class] = (
+            option_definitions,
+            fingerprint,
+            config
+        )
+        return config
+
+    #--------------------------------------------------------------------------
+    def _definitions_fingerprint(self, option_definitions):
+        """return what a config generated from the option definitions depends
+        on: a list of the commandline arguments and the generations of the
+        Namespaces, which count the changes to their keys, and a list of the
+        Namespaces, the values of the Options and the functions of the
+        Aggregations.  Reading them is much cheaper than generating a config,
+        and it notices any change to a value, whether made through the
+        methods of the Options or by assigning to their attributes."""
+        generations = [tuple(self.args)]
+        objects = []
+        stack = [option_definitions]
+        while stack:
+            a_namespace = stack.pop()
+            generations.append(a_namespace._generation)
+            objects.append(a_namespace)
+            for key, val in branch_items(a_namespace):
+                if isinstance(val, Option):
+                    objects.append(val.value)
+                elif isinstance(val, Namespace):
+                    stack.append(val)
+                elif isinstance(val, Aggregation):
+                    objects.append(val.function)
+        return generations, objects
+
+    #--------------------------------------------------------------------------
+    @staticmethod
+    def _same_fingerprint(a_fingerprint, another_fingerprint):
+        """True if the fingerprints have equal generations and the very same
+        objects.  Values that are merely equal, like 1 and 1.0, may still
+        differ in the config."""
+        generations, objects = a_fingerprint
+        other_generations, other_objects = another_fingerprint
+        return (
+            generations == other_generations
+            and len(objects) == len(other_objects)
+            and all(a is b for a, b in zip(objects, other_objects))
+        )
+
+    #--------------------------------------------------------------------------
+    @property
+    def published_config(self):
+        """the current generation of the config.  This is meant for threads
+        that read the config while another thread may change it with
+        'update_published_config'.  A published config is never changed, so
+        a reader that holds on to one sees a consistent set of values.
+        Fetching it takes no lock: it is a single attribute access."""
+        config = self._published_config
+        if config is None:
+            config = self.publish_config()
+        return config
+
+    #--------------------------------------------------------------------------
+    def publish_config(self, mapping_class=DotDictWithAcquisition):
+        """generate a new config from the current option definitions and make
+        it the published config.
+
+        parameters:
+            mapping_class - the mapping type used for the config"""
+        with self._publication_lock:
+            config = self._build_config(self.option_definitions, mapping_class)
+            self._published_config = config
+        return config
+
+    #--------------------------------------------------------------------------
+    def update_published_config(
+        self,
+        new_values,
+        mapping_class=DotDictWithAcquisition
+    ):
+        """publish a new generation of the config with some values changed.
+        The changes are applied to a copy of the option definitions and a new
+        config is generated from that copy.  Only then are the definitions
+        and the published config replaced.  Neither the previously published
+        config nor any config generated earlier is changed.
+
+        parameters:
+            new_values - a mapping of option names in the form 'x.y.z' to
+                         their new values.  Strings are converted with the
+                         options' from_string_converters.
+            mapping_class - the mapping type used for the config"""
+        with self._publication_lock:
+            next_definitions = self.option_definitions.safe_copy(
+                keep_docs=True
+            )
+            for name, value in new_values.iteritems():
+                try:
+                    next_definitions.set_value(name, value)
+                except KeyError:
+                    raise NotAnOptionError(
+                        '%s is not a known option name' % name
+                    )
+            config = self._build_config(next_definitions, mapping_class)
+            self.option_definitions = next_definitions
+            self._published_config = config
+        return config
 
     #--------------------------------------------------------------------------
     def output_summary(self, output_stream=sys.stdout):
         """outputs a usage tip and the list of acceptable commands.
         This is useful as the output of the 'help' option.
 
+        The summary is rendered from the rows made by '_help_rows' and
+        written with a single write.  The rendered text is cached in memory
+        and, if 'help_cache_pathname' was given, on disk.  The cache is keyed
+        on a fingerprint of the option definitions and their values, so it
+        is used only while they are unchanged, and a cached text is found
+        without making the rows.
+
         parameters:
             output_stream - an open file-like object suitable for use as the
                             target of a print statement
         """
-        if self.app_name or self.app_description:
-            print >> output_stream, 'Application:',
-        if self.app_name:
-            print >> output_stream, self.app_name, self.app_version
-        if self.app_description:
-            print >> output_stream, self.app_description
-        if self.app_name or self.app_description:
-            print >> output_stream, ''
+        fingerprint = self._help_fingerprint()
+        if self._help_cache and self._help_cache[0] == fingerprint:
+            text = self._help_cache[1]
+        else:
+            text = self._read_help_cache(fingerprint)
+            if text is None:
+                text = self._render_help(self._help_rows())
+                self._write_help_cache(fingerprint, text)
+            self._help_cache = (fingerprint, text)
+        output_stream.write(text)
 
+    #--------------------------------------------------------------------------
+    def _help_fingerprint(self):
+        """return a digest of everything that the help output is made from:
+        the application heading, the options banned from help and the
+        attributes and values of the Options.  It is taken straight from the
+        definitions, none of the values are converted to strings."""
+        parts = [
+            self.app_name,
+            self.app_version,
+            self.app_description,
+            self.app_invocation_name,
+            tuple(self.options_banned_from_help),
+        ]
+        for path, an_option in walk_tree(
+            self.option_definitions,
+            branch_type=Namespace
+        ):
+            if isinstance(an_option, Option):
+                parts.append((
+                    path,
+                    an_option.short_form,
+                    an_option.doc,
+                    # 'is_argument', 'secret' and the other flags at once
+                    an_option._flags,
+                    _stable_form(an_option.default),
+                    _stable_form(an_option.value),
+                ))
+        return hashlib.md5(repr(parts)).hexdigest()
+
+    #--------------------------------------------------------------------------
+    def _help_rows(self):
+        """return everything that goes into the help output as a tuple of
+        the application heading, the usage arguments and the option rows.
+        Each usage argument is a tuple of its kind, 'required', 'constant' or
+        'optional', and its text.  Each option row is a tuple of its name,
+        short form, doc and formatted default, which is None if there is no
+        default to show."""
+        heading = (
+            self.app_name,
+            self.app_version,
+            self.app_description,
+            self.app_invocation_name,
+        )
         names_list = self.get_option_names()
-        print >> output_stream, \
-            "usage:\n%s [OPTIONS]... " % self.app_invocation_name,
-        bracket_count = 0
+        arguments = []
         # this section prints the non-switch command line arguments
         for key in names_list:
             an_option = self.option_definitions[key]
             if an_option.is_argument:
                 if an_option.default is None:
                     # there's no option, assume the user must set this
-                    print >> output_stream, an_option.name,
+                    arguments.append(('required', str(an_option.name)))
                 elif (inspect.isclass(an_option.value)
                       or inspect.ismodule(an_option.value)
                 ):
@@ -308,34 +840,24 @@ class ConfigurationManager(object):
                     # loaded and we're looking to show the help for it.
                     # display show it as a constant already provided rather
                     # than as an option the user must provide
-                    print >> output_stream, an_option.default,
+                    arguments.append(('constant', str(an_option.default)))
                 else:
                     # this is an argument that the user may alternatively
                     # provide
-                    print >> output_stream, "[ %s" % an_option.name,
-                    bracket_count += 1
-        print >> output_stream, ']' * bracket_count, '\n'
+                    arguments.append(('optional', str(an_option.name)))
 
         names_list.sort()
-        if names_list:
-            print >> output_stream, 'OPTIONS:'
-
-        pad = ' ' * 4
-
+        try:
+            expose_secrets = \
+                self.option_definitions.admin.expose_secrets.default
+        except KeyError:
+            expose_secrets = False
+        options = []
         for name in names_list:
             if name in self.options_banned_from_help:
                 continue
-            option = self._get_option(name)
-
-            line = ' ' * 2  # always start with 2 spaces
-            if option.short_form:
-                line += '-%s, ' % option.short_form
-            line += '--%s' % name
-            line += '\n'
-
+            option = self.option_definitions[name]
             doc = option.doc if option.doc is not None else ''
-            if doc:
-                line += '%s%s\n' % (pad, doc)
             try:
                 value = option.value
                 type_of_value = type(value)
@@ -345,13 +867,95 @@ class ConfigurationManager(object):
                 default = option.value
             if default is not None:
                 if ((option.secret or 'password' in name.lower())
-                    and not self.option_definitions.admin.expose_secrets.default):
+                    and not expose_secrets):
                     default = '*********'
-                if name not in ('help',):
+                if name in ('help',):
                     # don't bother with certain dead obvious ones
-                    line += '%s(default: %s)\n' % (pad, default)
+                    default = None
+                elif not isinstance(default, basestring):
+                    default = str(default)
+            options.append((name, option.short_form, doc, default))
+        return heading, tuple(arguments), tuple(options)
 
-            print >> output_stream, line
+    #--------------------------------------------------------------------------
+    @staticmethod
+    def _render_help(rows):
+        """render the rows from '_help_rows' as the text of the help output"""
+        (
+            (app_name, app_version, app_description, app_invocation_name),
+            arguments,
+            options
+        ) = rows
+        lines = []
+        if app_name and app_description:
+            lines.append('Application: %s %s\n%s\n\n' % (
+                app_name,
+                app_version,
+                app_description
+            ))
+        elif app_name:
+            lines.append('Application: %s %s\n\n' % (app_name, app_version))
+        elif app_description:
+            lines.append('Application: %s\n\n' % app_description)
+
+        lines.append('usage:\n%s [OPTIONS]... ' % app_invocation_name)
+        bracket_count = 0
+        for kind, text in arguments:
+            if kind == 'optional':
+                lines.append(' [ %s' % text)
+                bracket_count += 1
+            else:
+                lines.append(' %s' % text)
+        lines.append(' %s \n\n' % (']' * bracket_count))
+
+        if options:
+            lines.append('OPTIONS:\n')
+        pad = ' ' * 4
+        for name, short_form, doc, default in options:
+            line = ' ' * 2  # always start with 2 spaces
+            if short_form:
+                line += '-%s, ' % short_form
+            line += '--%s' % name
+            line += '\n'
+            if doc:
+                line += '%s%s\n' % (pad, doc)
+            if default is not None:
+                line += '%s(default: %s)\n' % (pad, default)
+            lines.append(line)
+            lines.append('\n')
+        return ''.join(lines)
+
+    #--------------------------------------------------------------------------
+    def _read_help_cache(self, fingerprint):
+        """return the help text from the on disk cache if it was rendered
+        from definitions with the same fingerprint, otherwise None"""
+        if not self.help_cache_pathname:
+            return None
+        try:
+            with open(self.help_cache_pathname) as f:
+                if f.readline().rstrip('\n') != fingerprint:
+                    return None
+                return f.read()
+        except IOError:
+            return None
+
+    #--------------------------------------------------------------------------
+    def _write_help_cache(self, fingerprint, text):
+        """save the help text to the on disk cache.  A cache that can't be
+        written is not an error, the help is just rendered again next time"""
+        if not self.help_cache_pathname:
+            return
+        if isinstance(text, unicode):
+            text = text.encode('utf8')
+        temporary_pathname = '%s.%d' % (self.help_cache_pathname, os.getpid())
+        try:
+            with open(temporary_pathname, 'w') as f:
+                f.write('%s\n' % fingerprint)
+                f.write(text)
+            # the rename is atomic, other processes never see a partial cache
+            os.rename(temporary_pathname, self.help_cache_pathname)
+        except (IOError, OSError):
+            pass
 
     #--------------------------------------------------------------------------
     def print_conf(self):
@@ -448,6 +1052,98 @@ class ConfigurationManager(object):
 
         dispatch_request_to_write(config_file_type, option_defs, opener)
 
+    #--------------------------------------------------------------------------
+    def explain(self, key):
+        """return a dict that tells where the value of an option came from.
+
+        parameters:
+            key - the name of an option in the form 'x.y.z'
+
+        The keys of the dict are:
+            'key' - the name of the option
+            'value' - the value of the option as a string
+            'source' - the name of the value source that supplied the value
+                       or 'default' if it came from the option's definition
+            'source_index' - the index of the value source in the
+                             values_source_list or None
+            'line' - the line number within the value source if it knows it,
+                     otherwise None
+            'raw_value' - the value as the value source gave it, before
+                          conversion, or None
+        Secret values are hidden unless admin.expose_secrets is set."""
+        an_option = self._get_option(key)
+        if not isinstance(an_option, Option):
+            raise NotAnOptionError('%s is not an Option' % key)
+        explanation = {
+            'key': key,
+            'value': str(an_option),
+            'source': 'default',
+            'source_index': None,
+            'line': None,
+            'raw_value': None,
+        }
+        try:
+            source_index, raw_value = self._provenance[key]
+        except KeyError:
+            pass
+        else:
+            a_value_source = self.values_source_list[source_index]
+            if not isinstance(raw_value, basestring):
+                raw_value = repr(raw_value)
+            explanation['source'] = value_source_name(a_value_source)
+            explanation['source_index'] = source_index
+            explanation['line'] = value_source_line_number(
+                a_value_source,
+                key
+            )
+            explanation['raw_value'] = raw_value
+        if an_option.secret and not self._secrets_exposed():
+            explanation['value'] = '*' * 16
+            if explanation['raw_value'] is not None:
+                explanation['raw_value'] = '*' * 16
+        return explanation
+
+    #--------------------------------------------------------------------------
+    def explain_all(self):
+        """return a mapping of the name of every option to the dict that
+        'explain' returns for it"""
+        return dict(
+            (key, self.explain(key))
+            for key in self.option_definitions.keys_breadth_first()
+            if isinstance(self.option_definitions[key], Option)
+        )
+
+    #--------------------------------------------------------------------------
+    def print_explanation(self, key, output_stream=None):
+        """write where the value of an option came from to the output stream,
+        stdout by default, in a human readable form"""
+        if output_stream is None:
+            output_stream = sys.stdout
+        explanation = self.explain(key)
+        print >> output_stream, '%s=%s' % (key, explanation['value'])
+        if explanation['source_index'] is None:
+            print >> output_stream, '    from the default in the definition'
+            return
+        if explanation['line'] is None:
+            print >> output_stream, '    from %s (value source %d)' % (
+                explanation['source'],
+                explanation['source_index']
+            )
+        else:
+            print >> output_stream, '    from %s line %d (value source %d)' % (
+                explanation['source'],
+                explanation['line'],
+                explanation['source_index']
+            )
+        print >> output_stream, '    given as %s' % explanation['raw_value']
+
+    #--------------------------------------------------------------------------
+    def _secrets_exposed(self):
+        try:
+            return self._get_option('admin.expose_secrets').value
+        except NotAnOptionError:
+            return False
+
     #--------------------------------------------------------------------------
     def log_config(self, logger):
         """write out the current configuration to a log-like object.
@@ -489,13 +1185,23 @@ class ConfigurationManager(object):
                 if isinstance(self.option_definitions[x], Option)]
 
     #--------------------------------------------------------------------------
-    def _create_reference_value_from_links(self, keys, known_keys):
+    def _create_reference_value_from_links(
+        self,
+        keys,
+        known_keys,
+        reference_graph
+    ):
         """this method steps through the option definitions looking for
-        alt paths.  On finding one, it creates the 'reference_value_from' links
-        within the option definitions and populates it with copied options."""
+        alt paths.  On finding one, it records the link in the
+        ReferenceValueGraph and, if the referenced option doesn't yet exist,
+        creates it within the option definitions and populates it with a
+        copied option.  It returns the set of the keys of the created
+        options."""
         # a set of known reference_value_from_links
         set_of_reference_value_from_links = set()
         for key in (k for k in keys if k not in known_keys):
+            if key in reference_graph.referenced_keys:
+                continue  # this link is already known
             an_option = self.option_definitions[key]
             if an_option.reference_value_from:
 
@@ -503,6 +1209,7 @@ class ConfigurationManager(object):
                     an_option.reference_value_from,
                     an_option.name
                 ))
+                reference_graph.add_link(key, reference_name)
                 if reference_name in self.option_definitions:
                     continue  # this referenced value has already been defined
                               # no need to repeat it - skip on to the next key
@@ -518,8 +1225,9 @@ class ConfigurationManager(object):
                 self.option_definitions.add_option(reference_option)
 
         for a_reference_value_from in set_of_reference_value_from_links:
-            for x in range(a_reference_value_from.count('.')):
-                namespace_path = a_reference_value_from.rsplit('.', x + 1)[0]
+            for namespace_path in reference_graph.new_namespaces(
+                a_reference_value_from
+            ):
                 self.option_definitions[namespace_path].ref_value_namespace()
 
         return set_of_reference_value_from_links
@@ -542,7 +1250,9 @@ class ConfigurationManager(object):
         """
         new_keys_discovered = True  # loop control, False breaks the loop
         known_keys = set()  # a set of keys that have been expanded
-        all_reference_values = {}
+        # the 'reference_value_from' links between the options, it grows as
+        # options are discovered
+        reference_graph = ReferenceValueGraph()
 
         while new_keys_discovered:  # loop until nothing more is done
             # keys holds a list of all keys in the option definitons in
@@ -559,72 +1269,66 @@ class ConfigurationManager(object):
             set_of_reference_value_from_links = \
                 self._create_reference_value_from_links(
                     keys,
-                    known_keys
+                    known_keys,
+                    reference_graph
                 )
-            for a_ref_value_key in set_of_reference_value_from_links:
-                if a_ref_value_key not in all_reference_values:
-                    all_reference_values[a_ref_value_key] = []
             all_keys = list(set_of_reference_value_from_links) + keys
 
             # overlay process:
             # fetch all the default values from the value sources before
-            # applying the from string conversions
-            #
-
-            for key in (k for k in all_keys if k not in known_keys):
-                #if not isinstance(an_option, Option):
-                #   continue  # aggregations and other types are ignored
-                # loop through all the value sources looking for values
-                # that match this current key.
-                if self.option_definitions[key].reference_value_from:
-                    reference_value_from = (
-                        self.option_definitions[key].reference_value_from
-                    )
-                    top_key = key.split('.')[-1]
-                    self.option_definitions[key].default = (
-                        self.option_definitions[reference_value_from]
-                        [top_key].default
-                    )
-                    all_reference_values[
-                        '.'.join((reference_value_from, top_key))
-                    ].append(
-                        key
-                    )
-
-                for a_value_source in self.values_source_list:
+            # applying the from string conversions.  The keys are overlaid
+            # in topological order of their reference links, so that the
+            # final default of a referenced key is copied to the keys that
+            # reference it before their own value sources are overlaid.
+            # A referencing key that has already been expanded is resolved
+            # again, once, whenever the key that it references is overlaid.
+            pending_keys = [k for k in all_keys if k not in known_keys]
+            for level_keys in reference_graph.levels(pending_keys):
+                known_keys.difference_update(level_keys)
+                for key in level_keys:
+                    referenced_key = reference_graph.referenced_keys.get(key)
+                    if referenced_key is None:
+                        continue
+                    self.option_definitions[key].default = \
+                        self.option_definitions[referenced_key].default
                     try:
-                        # get all the option values from this value source
-                        val_src_dict = a_value_source.get_values(
-                            self,
-                            True,
-                            self.value_source_object_hook
-                        )
-                        # get the Option for this key
-                        opt = self.option_definitions[key]
-                        # overlay the default with the new value from
-                        # the value source.  This assignment may come
-                        # via acquisition, so the key given may not have
-                        # been an exact match for what was returned.
-                        opt.has_changed = opt.default != val_src_dict[key]
-                        opt.default = val_src_dict[key]
-                        if key in all_reference_values:
-                            # make sure that this value gets propagated to keys
-                            # even if the keys have already been overlaid
-                            known_keys -= set(all_reference_values[key])
-                    except KeyError, x:
-                        pass  # okay, that source doesn't have this value
+                        self._provenance[key] = \
+                            self._provenance[referenced_key]
+                    except KeyError:
+                        self._provenance.pop(key, None)
+                self._overlay_value_sources(level_keys)
 
             # expansion process:
             # step through all the keys converting them to their proper
             # types and bringing in any new keys in the process
-            for key in (k for k in all_keys if k not in known_keys):
+            keys_to_expand = [k for k in all_keys if k not in known_keys]
+            converted_values = self._convert_in_batches(
+                [
+                    k for k in keys_to_expand
+                    if not self._is_compiled_option(k)
+                ]
+            )
+            for key in keys_to_expand:
                 # mark this key as having been seen and processed
                 known_keys.add(key)
-                an_option = self.option_definitions[key]
                 #if not isinstance(an_option, Option):
                 #    continue  # aggregations, namespaces are ignored
                 # apply the from string conversion to make the real value
-                an_option.set_value(an_option.default)
+                if self._is_compiled_option(key):
+                    # no value source has changed this Option since it was
+                    # compiled, its value is already converted
+                    an_option = self.option_definitions[key]
+                elif key in converted_values:
+                    an_option = self.option_definitions[key]
+                    an_option.set_converted_value(converted_values[key])
+                else:
+                    an_option = self.option_definitions[key]
+                    try:
+                        an_option.set_value(an_option.default)
+                    except CannotConvertError, x:
+                        if not self._conversion_failed(key, x):
+                            raise
+                        continue
                 # new values have been seen, don't let loop break
                 new_keys_discovered = True
                 try:
@@ -661,9 +1365,7 @@ class ConfigurationManager(object):
                     # seen and in the known_keys set.  They must be marked
                     # as unseen so that the new default doesn't overwrite any
                     # of the overlays that have already taken place.
-                    known_keys = known_keys.difference(
-                        known_keys.intersection(new_requirements.keys())
-                    )
+                    known_keys.difference_update(new_requirements.keys())
                     # add the new Options to the namespace
                     new_namespace = new_requirements.safe_copy(
                         an_option.reference_value_from
@@ -678,9 +1380,180 @@ class ConfigurationManager(object):
                     pass
         return known_keys
 
+    #--------------------------------------------------------------------------
+    def _overlay_value_sources(self, keys):
+        """overlay the values from each of the value sources, in order of
+        precedence, onto the defaults of the Options for the keys.  Each
+        value source is asked for its values once, the keys that it has
+        values for are found by set intersection and only those Options
+        are updated."""
+        if not keys:
+            return
+        for source_index, a_value_source in enumerate(
+            self.values_source_list
+        ):
+            # get all the option values from this value source
+            val_src_dict = a_value_source.get_values(
+                self,
+                True,
+                self.value_source_object_hook
+            )
+            hits = self._find_value_source_hits(val_src_dict, keys)
+            for key in keys:
+                if key not in hits:
+                    continue  # okay, that source doesn't have this value
+                # overlay the default with the new value from the value
+                # source.  This assignment may come via acquisition, so the
+                # key given may not have been an exact match for what was
+                # returned.
+                raw_value = hits[key]
+                opt = self.option_definitions[key]
+                opt.has_changed = opt.default != raw_value
+                opt.default = raw_value
+                self._provenance[key] = (source_index, raw_value)
+
+    #--------------------------------------------------------------------------
+    @staticmethod
+    def _find_value_source_hits(val_src_dict, keys):
+        """return a dict of the keys, in the form 'x.y.z', for which the
+        mapping from a value source has a value, mapped to that value.
+
+        For the mapping classes of this package, the dotted keys of the
+        mapping are collected in a single walk and intersected with the
+        keys.  With acquisition, a key that isn't an exact match may still
+        find its value in an enclosing mapping, so only the remaining keys
+        whose last part is the name of something within the mapping are
+        looked up.  The mappings of any other class are asked for each key in
+        turn."""
+        lookup = getattr(
+            val_src_dict.__class__.__getitem__,
+            '__func__',
+            None
+        )
+        if lookup not in _KEY_SET_LOOKUPS:
+            hits = {}
+            for key in keys:
+                try:
+                    hits[key] = val_src_dict[key]
+                except KeyError:
+                    pass
+            return hits
+        values_by_key = {}
+        names = set()
+        for path, value in walk_tree(
+            val_src_dict,
+            include_branches=True,
+            branch_type=DotDict
+        ):
+            values_by_key['.'.join(path)] = value
+            names.add(path[-1])
+        hits = dict(
+            (key, values_by_key[key])
+            for key in values_by_key.viewkeys() & set(keys)
+        )
+        if lookup is DotDictWithAcquisition.__getitem__.__func__:
+            for key in keys:
+                if key in hits or key.rsplit('.', 1)[-1] not in names:
+                    continue
+                try:
+                    hits[key] = val_src_dict[key]
+                except KeyError:
+                    pass
+        return hits
+
+    #--------------------------------------------------------------------------
+    def _conversion_failed(self, key, error):
+        """called when the from string conversion of the option 'key' raises
+        the CannotConvertError 'error'.  If this returns False, the error is
+        raised.  If it returns True, the option is left unconverted and
+        the overlay continues with the next option."""
+        return False
+
+    #--------------------------------------------------------------------------
+    def _is_compiled_option(self, key):
+        """True if the Option for the key still has the default, converter
+        and value of its copy in the CompiledDefinitions this manager was
+        created from, so its value is already converted.  A default or value
+        that a value source gave again, equal and of the same type, counts as
+        unchanged."""
+        compiled_option = self._compiled_options.get(key)
+        if compiled_option is None:
+            return False
+        an_option = self.option_definitions[key]
+        return (
+            an_option.from_string_converter
+            is compiled_option.from_string_converter
+            and _same_value(an_option.default, compiled_option.default)
+            and _same_value(an_option.value, compiled_option.value)
+        )
+
+    #--------------------------------------------------------------------------
+    def _convert_in_batches(self, keys):
+        """group the options that have string defaults by their from string
+        converter and convert each group with a single call to the converter's
+        batch entry point.  Returns a mapping of keys to converted values.
+        Any group that fails to convert is left out of the mapping so that the
+        options are converted individually by 'set_value', which will report
+        the specific failure."""
+        options_by_converter = collections.defaultdict(list)
+        for key in keys:
+            an_option = self.option_definitions[key]
+            converter = an_option.from_string_converter
+            if (
+                not isinstance(an_option.default, basestring)
+                or not hasattr(converter, 'batch')
+            ):
+                continue
+            try:
+                options_by_converter[converter].append(
+                    (key, an_option.default)
+                )
+            except TypeError:
+                # an unhashable converter, it will be used individually
+                pass
+        converted_values = {}
+        for converter, key_default_pairs in options_by_converter.iteritems():
+            try:
+                values = batch_convert(
+                    converter,
+                    [default for key, default in key_default_pairs]
+                )
+            except (ValueError, TypeError, CannotConvertError):
+                continue
+            for (key, default), value in zip(key_default_pairs, values):
+                converted_values[key] = value
+        return converted_values
+
     #--------------------------------------------------------------------------
     def _check_for_mismatches(self, known_keys):
         """check for bad options from value sources"""
+        for a_value_source, unmatched_keys, acquired_keys in \
+                self._find_mismatches(known_keys):
+            if not unmatched_keys:
+                continue
+            # anything left in the unmatched_key set is a badly formed key.
+            # issue a warning
+            if self.option_definitions.admin.strict.default:
+                # raise hell...
+                if len(unmatched_keys) > 1:
+                    raise NotAnOptionError(
+                        "%s are not valid Options" % unmatched_keys
+                    )
+                elif len(unmatched_keys) == 1:
+                    raise NotAnOptionError(
+                        "%s is not a valid Option" % unmatched_keys.pop()
+                    )
+            else:
+                warnings.warn(
+                    'Invalid options: %s' % ', '.join(unmatched_keys)
+                )
+
+    #--------------------------------------------------------------------------
+    def _find_mismatches(self, known_keys):
+        """a generator that yields a tuple for each value source that doesn't
+        always ignore mismatches: the value source, the set of its keys that
+        match no option and a mapping of its keys that were matched only by
+        acquisition to the lists of option keys that they matched."""
         for a_value_source in self.values_source_list:
             try:
                 if a_value_source.always_ignore_mismatches:
@@ -718,51 +1591,113 @@ class ConfigurationManager(object):
             # used during acquisition.
             # remove keys of the form 'y.z' if they match a known key of the
             # form 'x.y.z'
+            acquired_keys = {}
             for key in unmatched_keys.copy():
-                key_is_okay = reduce(
-                    lambda x, y: x or y,
-                    (known_key.endswith(key) for known_key in known_keys)
-                )
-                if key_is_okay:
+                matching_known_keys = [
+                    known_key for known_key in known_keys
+                    if known_key.endswith(key)
+                ]
+                if matching_known_keys:
                     unmatched_keys.remove(key)
-            # anything left in the unmatched_key set is a badly formed key.
-            # issue a warning
-            if unmatched_keys:
-                if self.option_definitions.admin.strict.default:
-                    # raise hell...
-                    if len(unmatched_keys) > 1:
-                        raise NotAnOptionError(
-                            "%s are not valid Options" % unmatched_keys
-                        )
-                    elif len(unmatched_keys) == 1:
-                        raise NotAnOptionError(
-                            "%s is not a valid Option" % unmatched_keys.pop()
-                        )
-                else:
-                    warnings.warn(
-                        'Invalid options: %s' % ', '.join(unmatched_keys)
-                    )
+                    acquired_keys[key] = sorted(matching_known_keys)
+            yield a_value_source, unmatched_keys, acquired_keys
 
     #--------------------------------------------------------------------------
-    @staticmethod
-    def _walk_and_close(a_dict):
-        for val in a_dict.itervalues():
-            if isinstance(val, collections.Mapping):
-                ConfigurationManager._walk_and_close(val)
-            if hasattr(val, 'close') and not inspect.isclass(val):
-                val.close()
+    def _close_config(self, config):
+        """close the items of the config with the 'close_executor' and
+        return the ShutdownSummary, also kept as 'shutdown_summary'.  A
+        warning lists any closes that failed or timed out."""
+        summary = close_resources(
+            close_order(self._closable_resources(config)),
+            self.close_executor,
+            self.close_timeout
+        )
+        self.shutdown_summary = summary
+        if not summary.is_clean:
+            warnings.warn(str(summary))
+        return summary
+
+    #--------------------------------------------------------------------------
+    def _closable_resources(self, config):
+        """return the items of the config that have a 'close' method as a
+        list of tuples of their paths, the items and the key tuples that
+        they depend on, in the order that they were created: the values of
+        the Options, then those of the Aggregations in the order of their
+        evaluation.  The values of Options depend on nothing, an Aggregation
+        depends on what it is known to read or, if that's unknown, on
+        everything created before it."""
+        aggregation_dependencies = collections.OrderedDict(
+            (path, self._aggregation_dependencies((path, val, None)))
+            for path, val in walk_tree(
+                self.option_definitions,
+                order=PRE_ORDER,
+                branch_type=Namespace
+            )
+            if isinstance(val, Aggregation)
+        )
+        option_values = []
+        aggregation_values = {}
+        seen = set()
+        for path, val in walk_tree(
+            config,
+            order=PRE_ORDER,
+            include_branches=True
+        ):
+            # a LazyInstance is closed only if its instance was constructed
+            val = materialized(val)
+            if (
+                not hasattr(val, 'close')
+                or inspect.isclass(val)
+                or id(val) in seen
+            ):
+                continue
+            seen.add(id(val))
+            if path in aggregation_dependencies:
+                aggregation_values[path] = val
+            else:
+                option_values.append((path, val, ()))
+        return option_values + [
+            (path, aggregation_values[path], dependencies)
+            for path, dependencies in aggregation_dependencies.iteritems()
+            if path in aggregation_values
+        ]
 
     #--------------------------------------------------------------------------
-    def _generate_config(self, mapping_class):
+    def _generate_config(self, mapping_class, option_definitions=None):
         """This routine generates a copy of the DotDict based config"""
+        if option_definitions is None:
+            option_definitions = self.option_definitions
         config = mapping_class()
         self._walk_config_copy_values(
-            self.option_definitions,
+            option_definitions,
             config,
             mapping_class
         )
         return config
 
+    #--------------------------------------------------------------------------
+    def _build_config(
+        self,
+        option_definitions,
+        mapping_class,
+        reuse_aggregations=True
+    ):
+        """generate a config from the option definitions and run the
+        aggregations.  Each Aggregation is evaluated once and its value
+        stored in the config, so an Aggregation sees the values of those
+        that come before it.  If 'reuse_aggregations' is True, the value of
+        an Aggregation whose dependencies haven't changed since it was last
+        evaluated is used again.  If it is False, the values aren't kept for
+        reuse either, as they may be closed with the config."""
+        config = self._generate_config(mapping_class, option_definitions)
+        self._aggregate(
+            option_definitions,
+            config,
+            config,
+            reuse_aggregations
+        )
+        return config
+
     #--------------------------------------------------------------------------
     def _setup_auto_help(self):
         help_option = Option(name='help', doc='print this', default=False)
@@ -811,6 +1746,12 @@ class ConfigurationManager(object):
             default=False,
             doc='should options marked secret get written out or hidden?'
         )
+        admin.add_option(
+            name='explain',
+            default='',
+            doc='the name of an option (x.y.z) whose value is to be traced '
+                'back to where it came from'
+        )
         # only offer the config file admin options if they've been requested in
         # the values source list
         if ConfigFileFutureProxy in values_source_list:
@@ -824,30 +1765,236 @@ class ConfigurationManager(object):
 
     #--------------------------------------------------------------------------
     def _walk_config_copy_values(self, source, destination, mapping_class):
-        for key, val in source.items():
-            value_type = type(val)
+        # the destination mappings by the paths of their Namespaces
+        destinations = {(): destination}
+        for path, val in walk_tree(
+            source,
+            include_branches=True,
+            branch_type=Namespace
+        ):
             if isinstance(val, Option) or isinstance(val, Aggregation):
-                destination[key] = val.value
-            elif value_type == Namespace:
-                destination[key] = d = mapping_class()
-                self._walk_config_copy_values(val, d, mapping_class)
+                destinations[path[:-1]][path[-1]] = val.value
+            elif isinstance(val, Namespace):
+                destinations[path[:-1]][path[-1]] = d = mapping_class()
+                destinations[path] = d
 
     #--------------------------------------------------------------------------
-    def _aggregate(self, source, base_namespace, local_namespace):
-        aggregates_found = False
-        for key, val in source.items():
+    def _aggregate(
+        self,
+        source,
+        base_namespace,
+        local_namespace,
+        reuse_aggregations=True
+    ):
+        """evaluate the Aggregations of the option definitions 'source' in
+        order and store their values in the config 'base_namespace'.  An
+        Aggregation whose inputs are unchanged since its last evaluation
+        keeps its value.  With an 'aggregation_executor', consecutive
+        Aggregations whose dependencies are known and don't include one
+        another are evaluated together in the executor."""
+        # the Aggregations with the paths of their keys and the mappings of
+        # their namespaces within the config
+        aggregations = []
+        # the local namespaces by the paths of their Namespaces
+        local_namespaces = {(): local_namespace}
+        for path, val in walk_tree(
+            source,
+            order=PRE_ORDER,
+            include_branches=True,
+            branch_type=Namespace
+        ):
             if isinstance(val, Namespace):
-                new_aggregates_found = self._aggregate(
-                    val,
-                    base_namespace,
-                    local_namespace[key]
-                )
-                aggregates_found = new_aggregates_found or aggregates_found
+                local_namespaces[path] = \
+                    local_namespaces[path[:-1]][path[-1]]
             elif isinstance(val, Aggregation):
-                val.aggregate(base_namespace, local_namespace, self.args)
-                aggregates_found = True
+                aggregations.append(
+                    (path, val, local_namespaces[path[:-1]])
+                )
             # skip Options, we're only dealing with Aggregations
-        return aggregates_found
+        args = tuple(self.args)
+        index = 0
+        while index < len(aggregations):
+            batch = aggregations[index:index + 1]
+            if self.aggregation_executor is not None:
+                dependencies = self._aggregation_dependencies(
+                    aggregations[index]
+                )
+                while (
+                    dependencies is not None
+                    and index + len(batch) < len(aggregations)
+                ):
+                    candidate = aggregations[index + len(batch)]
+                    dependencies = self._aggregation_dependencies(candidate)
+                    if dependencies is None or self._depends_on_any(
+                        dependencies,
+                        batch
+                    ):
+                        break
+                    batch.append(candidate)
+            if reuse_aggregations:
+                unchanged = [
+                    self._aggregation_unchanged(
+                        path,
+                        an_aggregation,
+                        base_namespace,
+                        local_mapping,
+                        args
+                    )
+                    for path, an_aggregation, local_mapping in batch
+                ]
+            else:
+                unchanged = [False] * len(batch)
+            if len(batch) > 1:
+                futures = [
+                    None if is_unchanged
+                    else self.aggregation_executor.submit(
+                        an_aggregation.aggregate,
+                        base_namespace,
+                        local_mapping,
+                        self.args
+                    )
+                    for (path, an_aggregation, local_mapping), is_unchanged
+                    in zip(batch, unchanged)
+                ]
+                evaluations = [
+                    _UNCHANGED if a_future is None else a_future.result()
+                    for a_future in futures
+                ]
+            elif unchanged[0]:
+                evaluations = [_UNCHANGED]
+            else:
+                path, an_aggregation, local_mapping = batch[0]
+                evaluations = [an_aggregation.aggregate(
+                    base_namespace,
+                    local_mapping,
+                    self.args
+                )]
+            for (path, an_aggregation, local_mapping), reads in zip(
+                batch,
+                evaluations
+            ):
+                local_mapping[path[-1]] = an_aggregation.value
+                if reads is _UNCHANGED or not reuse_aggregations:
+                    # a value that isn't to be reused isn't recorded, it
+                    # may be closed before the next evaluation
+                    continue
+                if reads is None:
+                    self._aggregation_inputs.pop(path, None)
+                    continue
+                self._aggregation_inputs[path] = (
+                    an_aggregation.function,
+                    an_aggregation.depends_on,
+                    args,
+                    reads,
+                    self._read_aggregation_inputs(
+                        reads,
+                        base_namespace,
+                        local_mapping
+                    ),
+                    an_aggregation.value,
+                )
+            index += len(batch)
+        return bool(aggregations)
+
+    #--------------------------------------------------------------------------
+    def _aggregation_dependencies(self, an_aggregation_tuple):
+        """return the keys, in the form 'x.y.z' from the root of the config,
+        that an Aggregation is known to depend on.  Return None if they are
+        unknown."""
+        path, an_aggregation, local_mapping = an_aggregation_tuple
+        if an_aggregation.depends_on is None:
+            return None
+        if an_aggregation.depends_on == DISCOVER_DEPENDENCIES:
+            try:
+                function, depends_on, args, reads, values, value = \
+                    self._aggregation_inputs[path]
+            except KeyError:
+                return None  # they are discovered by the first evaluation
+            if function is not an_aggregation.function:
+                return None
+        else:
+            reads = [(True, key) for key in an_aggregation.depends_on]
+        local_prefix = path[:-1]
+        return [
+            tuple(key.split('.')) if not is_local or not key
+            else local_prefix + tuple(key.split('.'))
+            for is_local, key in reads
+        ]
+
+    #--------------------------------------------------------------------------
+    @staticmethod
+    def _depends_on_any(dependencies, aggregation_tuples):
+        """True if any of the dependencies may be the key of one of the
+        Aggregations.  Acquisition can find a key in an enclosing namespace,
+        so the keys are compared by their last parts, and a dependency on a
+        whole namespace includes everything within it."""
+        names = set(path[-1] for path, a, m in aggregation_tuples)
+        paths = [path for path, a, m in aggregation_tuples]
+        for a_dependency in dependencies:
+            if a_dependency and a_dependency[-1] in names:
+                return True
+            for a_path in paths:
+                if a_path[:len(a_dependency)] == a_dependency:
+                    return True
+        return False
+
+    #--------------------------------------------------------------------------
+    def _aggregation_unchanged(
+        self,
+        path,
+        an_aggregation,
+        base_namespace,
+        local_mapping,
+        args
+    ):
+        """True if the Aggregation was last evaluated with the same function,
+        'depends_on', commandline arguments and values of the keys that it
+        depends on.  Its value from then is restored."""
+        try:
+            function, depends_on, last_args, reads, values, value = \
+                self._aggregation_inputs[path]
+        except KeyError:
+            return False
+        if (
+            function is not an_aggregation.function
+            or depends_on != an_aggregation.depends_on
+            or last_args != args
+            or self._read_aggregation_inputs(
+                reads,
+                base_namespace,
+                local_mapping
+            ) != values
+        ):
+            return False
+        an_aggregation.value = value
+        return True
+
+    #--------------------------------------------------------------------------
+    @staticmethod
+    def _read_aggregation_inputs(reads, base_namespace, local_mapping):
+        """return a list of the current values of the keys that an
+        Aggregation depends on.  A nested mapping is represented by its
+        keys and values."""
+        values = []
+        for is_local, key in reads:
+            if is_local:
+                mapping = local_mapping
+            else:
+                mapping = base_namespace
+            try:
+                if key:
+                    value = mapping[key]
+                else:
+                    value = mapping
+            except KeyError:
+                value = _MISSING
+            if isinstance(value, collections.Mapping):
+                value = [
+                    (path, a_value)
+                    for path, a_value in walk_tree(value)
+                ]
+            values.append(value)
+        return values
 
     #--------------------------------------------------------------------------
     @staticmethod
@@ -4,9 +4,16 @@
 
 import sys
 import re
+import array
+import contextlib
 import datetime
+import functools
+import itertools
+import threading
+import time
 import types
 import json
+import weakref
 
 from configman.datetime_util import (
     datetime_from_ISO_string,
@@ -164,7 +171,8 @@ class_converter = str_to_python_object  # for backward compatibility
 def str_to_classes_in_namespaces(
     template_for_namespace="cls%d",
     name_of_class_option='cls',
-    instantiate_classes=False
+    instantiate_classes=False,
+    lazy_instances=False
 ):
     """take a comma delimited  list of class names, convert each class name
     into an actual class as an option within a numbered namespace.  This
@@ -215,12 +223,20 @@ def str_to_classes_in_namespaces(
                               Namespace will contain elements for the class, as
                               well as an aggregator that will instantiate the
                               class.
+        lazy_instances - a boolean to determine if the aggregators give
+                         LazyInstance proxies, that construct the instances
+                         only when they are first used, rather than the
+                         instances themselves.  By default, they give the
+                         instances.  A proxy is not of the type of its
+                         class, so code that checks types, like 'type(x) is
+                         Alpha', should leave this False.
                               """
 
     # these are only used within this method.  No need to pollute the module
     # scope with them and avoid potential circular imports
     from configman.namespace import Namespace
     from configman.required_config import RequiredConfig
+    from configman.lazy_instance import LazyInstance
 
     #--------------------------------------------------------------------------
     def class_list_converter(class_list_str):
@@ -236,6 +252,24 @@ def str_to_classes_in_namespaces(
         else:
             raise TypeError('must be derivative of a basestring')
 
+        # the same class list string may be converted many times during the
+        # overlay/expansion process.  Returning the identical proxy class each
+        # time means that the option's value doesn't appear to change and its
+        # requirements don't have to be regenerated.
+        proxies = getattr(_class_list_proxies, 'cache', None)
+        cache_key = (
+            template_for_namespace,
+            name_of_class_option,
+            instantiate_classes,
+            lazy_instances,
+            tuple(class_list)
+        )
+        if proxies is not None:
+            try:
+                return proxies[cache_key]
+            except KeyError:
+                pass
+
         #======================================================================
         class InnerClassList(RequiredConfig):
             """This nested class is a proxy list for the classes.  It collects
@@ -265,7 +299,17 @@ def str_to_classes_in_namespaces(
                     default=a_class,
                     from_string_converter=class_converter
                 )
-                if instantiate_classes:
+                if instantiate_classes and lazy_instances:
+                    # add an aggregator to instantiate the class when the
+                    # instance is first used
+                    required_config[namespace_name].add_aggregation(
+                        "%s_instance" % name_of_class_option,
+                        lambda c, lc, a: LazyInstance(
+                            lc[name_of_class_option],
+                            lc
+                        )
+                    )
+                elif instantiate_classes:
                     # add an aggregator to instantiate the class
                     required_config[namespace_name].add_aggregation(
                         "%s_instance" % name_of_class_option,
@@ -283,9 +327,36 @@ def str_to_classes_in_namespaces(
                     if isinstance(v, Namespace)
                 )
 
+        if proxies is not None:
+            proxies[cache_key] = InnerClassList
         return InnerClassList  # result of class_list_converter
     return class_list_converter  # result of classes_in_namespaces_converter
 
+# the proxy classes created by 'str_to_classes_in_namespaces' within the
+# 'reusing_class_list_proxies' block active in this thread, keyed by the
+# converter parameters and the normalized list of class names
+_class_list_proxies = threading.local()
+
+
+#------------------------------------------------------------------------------
+@contextlib.contextmanager
+def reusing_class_list_proxies():
+    """within this block, the converters of 'str_to_classes_in_namespaces'
+    return the very same proxy class each time they convert the same class
+    list in this thread.  A ConfigurationManager converts within this block
+    while it overlays and expands its options.  The proxy classes are
+    forgotten when the outermost block ends, so no two ConfigurationManagers
+    share a proxy class and its 'required_config', and a class list is
+    looked up again once a module is reloaded."""
+    proxies = getattr(_class_list_proxies, 'cache', None)
+    if proxies is None:
+        _class_list_proxies.cache = {}
+    try:
+        yield
+    finally:
+        if proxies is None:
+            _class_list_proxies.cache = None
+
 # for backward compatibility
 classes_in_namespaces_converter = str_to_classes_in_namespaces
 
@@ -299,22 +370,36 @@ regex_converter = str_to_regular_expression  # for backward compatibility
 compiled_regexp_type = type(re.compile(r'x'))
 
 
+#------------------------------------------------------------------------------
+def _split_list_items(input_str, item_separator=','):
+    """split a string into its stripped, non-empty list items"""
+    if not isinstance(input_str, basestring):
+        raise ValueError(input_str)
+    input_str = str_quote_stripper(input_str)
+    return [
+        x for x in (y.strip() for y in input_str.split(item_separator)) if x
+    ]
+
+
+#------------------------------------------------------------------------------
+def _identity(x):
+    return x
+
+
 #------------------------------------------------------------------------------
 def str_to_list(
     input_str,
-    item_converter=lambda x: x,
+    item_converter=_identity,
     item_separator=',',
     list_to_collection_converter=None,
 ):
     """ a conversion function for list
     """
-    if not isinstance(input_str, basestring):
-        raise ValueError(input_str)
-    input_str = str_quote_stripper(input_str)
-    result = [
-        item_converter(x.strip())
-        for x in input_str.split(item_separator) if x.strip()
-    ]
+    items = _split_list_items(input_str, item_separator)
+    if item_converter is _identity:
+        result = items
+    else:
+        result = map(item_converter, items)
     if list_to_collection_converter is not None:
         return list_to_collection_converter(result)
     return result
@@ -322,6 +407,103 @@ def str_to_list(
 list_converter = str_to_list  # for backward compatibility
 
 
+#------------------------------------------------------------------------------
+def str_to_list_batch(input_strs):
+    """the batch entry point for 'str_to_list'"""
+    return [_split_list_items(x) for x in input_strs]
+
+str_to_list.batch = str_to_list_batch
+
+
+#------------------------------------------------------------------------------
+# array.array typecodes for item types that can be stored in a compact array
+array_typecodes = {
+    int: 'l',
+    long: 'l',
+    float: 'd',
+}
+
+
+#------------------------------------------------------------------------------
+def str_to_typed_list(
+    item_type=str,
+    item_separator=',',
+    as_array=False,
+):
+    """create a converter for lists whose items all share a single type, for
+    example a list of port numbers.  Unlike 'str_to_list', the items are
+    converted with a single 'map' over the split string rather than through
+    a Python level item converter.  Since every item has the same type, many
+    such lists can be converted at once: the batch entry point splits all of
+    the strings, converts all of the items with a single 'map' and then
+    slices the results back into one list per string.
+
+    parameters:
+        item_type - the type of each item in the list.  It must be a callable
+                    that accepts a string.
+        item_separator - the string that separates items in the list
+        as_array - if True and the item_type is numeric, the result will be
+                   an 'array.array' rather than a list.  For very long lists
+                   of numbers this is much more compact.
+    """
+    if as_array:
+        try:
+            typecode = array_typecodes[item_type]
+        except KeyError:
+            raise CannotConvertError(
+                "%s cannot be stored in an array" % to_str(item_type)
+            )
+        to_collection = functools.partial(array.array, typecode)
+    else:
+        to_collection = None
+
+    #--------------------------------------------------------------------------
+    def typed_list_converter(input_str):
+        result = map(item_type, _split_list_items(input_str, item_separator))
+        if to_collection is not None:
+            return to_collection(result)
+        return result
+
+    #--------------------------------------------------------------------------
+    def typed_list_batch_converter(input_strs):
+        split_strs = [_split_list_items(x, item_separator) for x in input_strs]
+        all_items = map(item_type, itertools.chain.from_iterable(split_strs))
+        results = []
+        start = 0
+        for items in split_strs:
+            end = start + len(items)
+            if to_collection is None:
+                results.append(all_items[start:end])
+            else:
+                results.append(to_collection(all_items[start:end]))
+            start = end
+        return results
+
+    typed_list_converter.batch = typed_list_batch_converter
+    typed_list_converter.item_type = item_type
+    return typed_list_converter
+
+typed_list_converter = str_to_typed_list
+
+
+#------------------------------------------------------------------------------
+def batch_convert(converter, input_strs):
+    """convert a sequence of strings with a single call to the converter's
+    batch entry point.  Converters without a 'batch' attribute are applied
+    to each string in turn.
+
+    parameters:
+        converter - a from string converter function
+        input_strs - a sequence of strings to be converted
+    """
+    try:
+        batch = converter.batch
+    except (AttributeError, KeyError):
+        # KeyError - a DotDict derivative used as a converter
+        return map(converter, input_strs)
+    return batch(input_strs)
+
+
 #------------------------------------------------------------------------------
 #
 #   To string section
@@ -349,6 +531,13 @@ str_to_instance_of_type_converters = {
 from_string_converters = str_to_instance_of_type_converters
 
 
+# the strings of classes and functions by the objects themselves.  They are
+# converted often, like every class option when a config file is written,
+# and the probes below fail by raising exceptions, which is slow.
+_class_and_function_strings = weakref.WeakKeyDictionary()
+_class_and_function_types = (type, types.ClassType, types.FunctionType)
+
+
 #------------------------------------------------------------------------------
 def arbitrary_object_to_string(a_thing):
     """take a python object of some sort, and convert it into a human readable
@@ -360,6 +549,27 @@ def arbitrary_object_to_string(a_thing):
     # is it already a string?
     if isinstance(a_thing, basestring):
         return a_thing
+    if (
+        isinstance(a_thing, _class_and_function_types)
+        and not hasattr(a_thing, 'to_str')
+    ):
+        try:
+            return _class_and_function_strings[a_thing]
+        except (KeyError, TypeError):
+            # TypeError - an unhashable class
+            pass
+        a_string = _object_to_string(a_thing)
+        try:
+            _class_and_function_strings[a_thing] = a_string
+        except TypeError:
+            pass
+        return a_string
+    return _object_to_string(a_thing)
+
+
+#------------------------------------------------------------------------------
+def _object_to_string(a_thing):
+    """the probes of 'arbitrary_object_to_string'"""
     # does it have a to_str function?
     try:
         return a_thing.to_str()
@@ -429,6 +639,7 @@ to_string_converters = {
     unicode: unicode,
     list: list_to_str,
     tuple: list_to_str,
+    array.array: list_to_str,
     bool: lambda x: 'True' if x else 'False',
     dict: json.dumps,
     datetime.datetime: datetime_to_ISO_string,
@@ -441,12 +652,180 @@ to_string_converters = {
 }
 
 
+#==============================================================================
+class ConverterRegistry(object):
+    """This class resolves the from string and to string converters for a
+    type.  A type is looked up exactly: a type that has no converter of its
+    own converts from strings with itself and to strings with
+    'arbitrary_object_to_string'.  Optionally, a type that has no converter
+    of its own is resolved by walking its method resolution order, so a
+    subclass of a type with a registered converter uses that converter.  The
+    resolution for each type is cached, so the walk happens only once per
+    type.
+
+    Optionally, the registry will count the calls to each converter and
+    accumulate the time spent within them.  This shows which conversions
+    dominate the startup time and the writing of config files."""
+
+    #--------------------------------------------------------------------------
+    def __init__(
+        self,
+        from_string_converters,
+        to_string_converters,
+        resolve_by_mro=False
+    ):
+        """parameters:
+            from_string_converters - a mapping of types to the functions that
+                                     convert strings into instances of
+                                     those types
+            to_string_converters - a mapping of types to the functions that
+                                   convert instances of those types into
+                                   strings
+            resolve_by_mro - if True, a type without converters of its own
+                             uses those of the nearest type in its method
+                             resolution order.  This changes the converters
+                             of subclasses like namedtuples and
+                             OrderedDicts."""
+        self.from_string_converters = from_string_converters
+        self.to_string_converters = to_string_converters
+        self.resolve_by_mro = resolve_by_mro
+        self._from_string_cache = {}
+        self._to_string_cache = {}
+        self.collect_statistics = False
+        self.statistics = {}
+
+    #--------------------------------------------------------------------------
+    def register_from_string_converter(self, a_type, converter):
+        self.from_string_converters[a_type] = converter
+        self.clear_cache()
+
+    #--------------------------------------------------------------------------
+    def register_to_string_converter(self, a_type, converter):
+        self.to_string_converters[a_type] = converter
+        self.clear_cache()
+
+    #--------------------------------------------------------------------------
+    def clear_cache(self):
+        """forget all cached resolutions.  This must be called if either of
+        the converter mappings is changed directly rather than through the
+        'register_*' methods."""
+        self._from_string_cache.clear()
+        self._to_string_cache.clear()
+
+    #--------------------------------------------------------------------------
+    def _resolve(self, a_type, converters):
+        """return the converter for 'a_type', or with 'resolve_by_mro', for
+        the nearest type in its mro, and that type.  Returns (None, None) if
+        there is none."""
+        if self.resolve_by_mro:
+            types_to_try = getattr(a_type, '__mro__', (a_type,))
+        else:
+            types_to_try = (a_type,)
+        for a_base in types_to_try:
+            try:
+                return converters[a_base], a_base
+            except (KeyError, TypeError):
+                # TypeError - an unhashable type
+                pass
+        return None, None
+
+    #--------------------------------------------------------------------------
+    def get_from_string_converter(self, a_type):
+        """return the function that will convert a string into an instance of
+        'a_type'.  If there is none, the type itself is used as the
+        converter."""
+        try:
+            return self.from_string_converters[a_type]
+        except KeyError:
+            pass
+        try:
+            return self._from_string_cache[a_type]
+        except KeyError:
+            converter, base_type = self._resolve(
+                a_type,
+                self.from_string_converters
+            )
+            if converter is None or converter is base_type:
+                # when the base type is its own converter (int, str...),
+                # the subclass' own constructor is the better converter
+                converter = a_type
+            self._from_string_cache[a_type] = converter
+            return converter
+
+    #--------------------------------------------------------------------------
+    def get_to_string_converter(self, a_type):
+        """return the function that will convert an instance of 'a_type' into
+        a string.  If there is none, 'arbitrary_object_to_string' is used."""
+        try:
+            return self.to_string_converters[a_type]
+        except KeyError:
+            pass
+        try:
+            return self._to_string_cache[a_type]
+        except KeyError:
+            converter, base_type = self._resolve(
+                a_type,
+                self.to_string_converters
+            )
+            if converter is None:
+                converter = arbitrary_object_to_string
+            self._to_string_cache[a_type] = converter
+            return converter
+
+    #--------------------------------------------------------------------------
+    def timed_call(self, converter, value):
+        """call the converter on the value, counting the call and
+        accumulating the time spent within it"""
+        start_time = time.time()
+        try:
+            return converter(value)
+        finally:
+            self._record(converter, time.time() - start_time)
+
+    #--------------------------------------------------------------------------
+    def _record(self, converter, elapsed_time):
+        try:
+            counters = self.statistics[converter]
+        except KeyError:
+            counters = self.statistics[converter] = [0, 0.0]
+        except TypeError:
+            # an unhashable converter, it can't be counted
+            return
+        counters[0] += 1
+        counters[1] += elapsed_time
+
+    #--------------------------------------------------------------------------
+    def convert_to_str(self, a_thing):
+        converter = self.get_to_string_converter(type(a_thing))
+        if self.collect_statistics:
+            return self.timed_call(converter, a_thing)
+        return converter(a_thing)
+
+    #--------------------------------------------------------------------------
+    def statistics_report(self):
+        """return a list of 3-tuples (converter name, number of calls,
+        cumulative seconds) sorted with the most expensive converter first"""
+        report = [
+            (arbitrary_object_to_string(converter), calls, seconds)
+            for converter, (calls, seconds) in self.statistics.iteritems()
+        ]
+        report.sort(key=lambda x: x[2], reverse=True)
+        return report
+
+    #--------------------------------------------------------------------------
+    def reset_statistics(self):
+        self.statistics.clear()
+
+
+converter_registry = ConverterRegistry(
+    from_string_converters,
+    to_string_converters
+)
+
+
 #------------------------------------------------------------------------------
 def to_str(a_thing):
-    try:
-        return to_string_converters[type(a_thing)](a_thing)
-    except KeyError:
-        return arbitrary_object_to_string(a_thing)
+    return converter_registry.convert_to_str(a_thing)
 
 #------------------------------------------------------------------------------
 converters_requiring_quotes = [eval, regex_converter]
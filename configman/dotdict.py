@@ -4,27 +4,114 @@
 
 
 import collections
+import re
 import weakref
 
-from configman.orderedset import OrderedSet
-from configman.memoize import memoize
+
+# what takes the place of a deleted key in the key order of a DotDict until
+# the key order is compacted
+_DELETED = object()
+
+
+# the orders in which 'walk_tree' can visit the items of nested mappings
+BREADTH_FIRST = 'breadth_first'
+PRE_ORDER = 'pre_order'
+POST_ORDER = 'post_order'
+
+
+#------------------------------------------------------------------------------
+def branch_items(a_mapping):
+    """return a list of the (key, value) items directly within a mapping.  For
+    a DotDict, the values are taken straight from its __dict__."""
+    if isinstance(a_mapping, DotDict):
+        a_dict = a_mapping.__dict__
+        return [(key, a_dict[key]) for key in a_mapping._keys_in_order()]
+    return a_mapping.items()
+
+
+#------------------------------------------------------------------------------
+def walk_tree(
+    a_mapping,
+    order=BREADTH_FIRST,
+    include_branches=False,
+    branch_type=collections.Mapping,
+    sort=None
+):
+    """a generator that yields a tuple of the path and the value for every
+    item within a tree of nested mappings.  The path is a tuple of the keys
+    that lead to the item, join it with '.' for the form X.Y.Z only when
+    that is needed.  The tree is walked with an explicit stack, so its depth
+    isn't limited by the recursion limit.
+
+    parameters:
+        a_mapping - the root of the tree
+        order - BREADTH_FIRST: the items of a mapping are yielded before the
+                    items of the mappings nested within it, which then
+                    follow in order.
+                PRE_ORDER: depth first, a nested mapping is yielded before
+                    its items.
+                POST_ORDER: depth first, a nested mapping is yielded after
+                    its items.
+        include_branches - if True, the nested mappings are yielded too
+        branch_type - the type, or tuple of types, of the values that are
+                      nested mappings to be walked into
+        sort - an optional function that accepts the list of the (key,
+               value) items of one mapping and returns the items in the
+               order in which they are to be visited.  It may leave items
+               out.
+    """
+    if order == BREADTH_FIRST:
+        stack = [((), a_mapping)]
+        while stack:
+            path, current = stack.pop()
+            items = branch_items(current)
+            if sort is not None:
+                items = sort(items)
+            branches = []
+            for key, value in items:
+                item_path = path + (key,)
+                if isinstance(value, branch_type):
+                    branches.append((item_path, value))
+                    if include_branches:
+                        yield item_path, value
+                else:
+                    yield item_path, value
+            # pushed in reverse so that they come off the stack in order
+            branches.reverse()
+            stack.extend(branches)
+        return
+
+    def items_iterator(current):
+        items = branch_items(current)
+        if sort is not None:
+            items = sort(items)
+        return iter(items)
+
+    pre_order = include_branches and order == PRE_ORDER
+    post_order = include_branches and order == POST_ORDER
+    stack = [((), a_mapping, items_iterator(a_mapping))]
+    while stack:
+        path, current, iterator = stack[-1]
+        for key, value in iterator:
+            item_path = path + (key,)
+            if isinstance(value, branch_type):
+                if pre_order:
+                    yield item_path, value
+                stack.append((item_path, value, items_iterator(value)))
+                break
+            yield item_path, value
+        else:
+            stack.pop()
+            if post_order and path:
+                yield path, current
 
 
 #------------------------------------------------------------------------------
 def iteritems_breadth_first(a_mapping, include_dicts=False):
     """a generator that returns all the keys in a set of nested
     Mapping instances.  The keys take the form X.Y.Z"""
-    subordinate_mappings = []
-    for key, value in a_mapping.iteritems():
-        if isinstance(value, collections.Mapping):
-            subordinate_mappings.append((key, value))
-            if include_dicts:
-                yield key, value
-        else:
-            yield key, value
-    for key, a_map in subordinate_mappings:
-        for sub_key, value in iteritems_breadth_first(a_map, include_dicts):
-            yield '%s.%s' % (key, sub_key), value
+    for path, value in walk_tree(a_mapping, include_branches=include_dicts):
+        yield '.'.join(path), value
 
 
 #------------------------------------------------------------------------------
@@ -99,14 +186,20 @@ class DotDict(collections.MutableMapping):
         parameters:
             initializer - a mapping of keys and values to be added to this
                           mapping."""
-        self.__dict__['_key_order'] = OrderedSet()
+        # the keys in order of insertion.  The values are held in __dict__, so
+        # a plain list is all that is needed to remember the order.  A deleted
+        # key leaves a hole that is skipped and later compacted away.
+        self.__dict__['_key_order'] = []
+        # the index of each key within the key order.  It is made by the
+        # first deletion, so that deleting a key takes constant time.  None
+        # while no key has been deleted since the last compaction.
+        self.__dict__['_key_positions'] = None
         if isinstance(initializer, collections.Mapping):
-            for key, value in iteritems_breadth_first(
-                initializer,
-                include_dicts=True
-            ):
+            # a single depth first pass: each nested mapping is copied by the
+            # constructor of its own level, so every leaf is assigned once
+            for key, value in initializer.iteritems():
                 if isinstance(value, collections.Mapping):
-                    self[key] = self.__class__(value)
+                    self[key] = self.__class__(initializer=value)
                 else:
                     self[key] = value
         elif initializer is not None:
@@ -115,8 +208,14 @@ class DotDict(collections.MutableMapping):
     #--------------------------------------------------------------------------
     def __setattr__(self, key, value):
         """this function saves keys into the mapping's __dict__."""
-        self._key_order.add(key)
-        self.__dict__[key] = value
+        a_dict = self.__dict__
+        if key not in a_dict:
+            key_order = a_dict['_key_order']
+            key_positions = a_dict['_key_positions']
+            if key_positions is not None:
+                key_positions[key] = len(key_order)
+            key_order.append(key)
+        a_dict[key] = value
 
     #--------------------------------------------------------------------------
     def __getattr__(self, key):
@@ -134,14 +233,42 @@ class DotDict(collections.MutableMapping):
 
     #--------------------------------------------------------------------------
     def __delattr__(self, key):
-        try:
-            self._key_order.discard(key)
-        except ValueError:
-            # we must be trying to delete something that wasn't a key
-            # the next line will catch the error if it still is one
-            pass
+        a_dict = self.__dict__
+        key_order = a_dict['_key_order']
+        key_positions = a_dict['_key_positions']
+        if key_positions is None:
+            key_positions = a_dict['_key_positions'] = dict(
+                (a_key, index) for index, a_key in enumerate(key_order)
+            )
+        index = key_positions.pop(key, None)
+        # if it wasn't a key, the last line raises the error if it still is
+        # one
+        if index is not None:
+            if index == len(key_order) - 1:
+                key_order.pop()
+            else:
+                key_order[index] = _DELETED
+                if len(key_order) > 2 * len(key_positions) + 8:
+                    # most of the key order is holes
+                    self._keys_in_order()
         super(DotDict, self).__delattr__(key)
 
+    #--------------------------------------------------------------------------
+    def _keys_in_order(self):
+        """return the list of the keys in order of insertion, compacting
+        away the holes left by deleted keys first.  Like a dict, a DotDict
+        must not have keys deleted while it is being iterated over."""
+        a_dict = self.__dict__
+        key_order = a_dict['_key_order']
+        key_positions = a_dict['_key_positions']
+        if key_positions is not None and len(key_positions) != len(key_order):
+            key_order = a_dict['_key_order'] = [
+                key for key in key_order if key is not _DELETED
+            ]
+            # remade by the next deletion
+            a_dict['_key_positions'] = None
+        return key_order
+
     #--------------------------------------------------------------------------
     def __getitem__(self, key):
         """define the square bracket operator to refer to the object's __dict__
@@ -192,28 +319,49 @@ class DotDict(collections.MutableMapping):
         making sure that it ignores the special '_' keys.  We want those items
         ignored or we risk infinite recursion, not with this function, but
         with the clients of this class deep within configman"""
-        return iter(self._key_order)
+        return iter(self._keys_in_order())
 
     #--------------------------------------------------------------------------
     def __len__(self):
         """makes the len function also ignore the '_' keys"""
-        return len(self._key_order)
+        key_positions = self.__dict__['_key_positions']
+        if key_positions is not None:
+            return len(key_positions)
+        return len(self.__dict__['_key_order'])
+
+    #--------------------------------------------------------------------------
+    def __reduce__(self):
+        """pickle only the keys and the values.  Anything else in the
+        __dict__, like the '_parent' of a DotDictWithAcquisition, is rebuilt
+        by __setstate__ when the mapping is unpickled."""
+        key_order = self._keys_in_order()
+        return (
+            self.__class__,
+            (),
+            (
+                tuple(key_order),
+                tuple(self.__dict__[key] for key in key_order),
+            )
+        )
+
+    #--------------------------------------------------------------------------
+    def __setstate__(self, state):
+        # the keys were valid when pickled, so the __dict__ is filled
+        # directly rather than through __setattr__
+        keys, values = state
+        self.__dict__.update(zip(keys, values))
+        self._key_order.extend(keys)
 
     #--------------------------------------------------------------------------
     def keys_breadth_first(self, include_dicts=False):
         """a generator that returns all the keys in a set of nested
         DotDict instances.  The keys take the form X.Y.Z"""
-        namespaces = []
-        for key in self._key_order:
-            if isinstance(getattr(self, key), DotDict):
-                namespaces.append(key)
-                if include_dicts:
-                    yield key
-            else:
-                yield key
-        for a_namespace in namespaces:
-            for key in self[a_namespace].keys_breadth_first(include_dicts):
-                yield '%s.%s' % (a_namespace, key)
+        for path, value in walk_tree(
+            self,
+            include_branches=include_dicts,
+            branch_type=DotDict
+        ):
+            yield '.'.join(path)
 
     #--------------------------------------------------------------------------
     def assign(self, key, value):
@@ -324,6 +472,16 @@ class DotDictWithAcquisition(DotDict):
             value.__dict__['_parent'] = weakref.proxy(self)
         super(DotDictWithAcquisition, self).__setattr__(key, value)
 
+    #--------------------------------------------------------------------------
+    def __setstate__(self, state):
+        super(DotDictWithAcquisition, self).__setstate__(state)
+        # DotDict is an abstract base class, checking the mro directly is
+        # much faster than isinstance for the many values that aren't
+        # mappings
+        for value in state[1]:
+            if DotDict in type(value).__mro__:
+                value.__dict__['_parent'] = weakref.proxy(self)
+
     #--------------------------------------------------------------------------
     def __getattr__(self, key):
         """if a key is not found in the __dict__ using the regular python
@@ -345,11 +503,78 @@ class DotDictWithAcquisition(DotDict):
             raise KeyError(key)
 
 
+#------------------------------------------------------------------------------
+def _substrings_interact(a, b):
+    """True if one string contains the other or if they can overlap when
+    placed side by side - a suffix of one being a prefix of the other"""
+    if a in b or b in a:
+        return True
+    for i in range(1, min(len(a), len(b))):
+        if a[-i:] == b[:i] or b[-i:] == a[:i]:
+            return True
+    return False
+
+
+#------------------------------------------------------------------------------
+def compile_key_translator(translation_tuples):
+    """return a function that applies a sequence of substring substitutions
+    to a key.  When none of the substitutions can feed into one another, the
+    whole sequence is compiled into a single regular expression so that a key
+    is rewritten in one pass rather than with one 'str.replace' per tuple.
+    If a replacement string could be matched by a later original substring,
+    or a substring is replaced by nothing, the substitutions are order
+    dependent and the function falls back to applying them one at a time.
+
+    parameters:
+        translation_tuples - a sequence of 2-tuples of the form:
+                             (original_substring, substitution_string)
+    """
+    translation_tuples = tuple(
+        (original, replacement)
+        for original, replacement in translation_tuples
+        if original
+    )
+    if not translation_tuples:
+        return lambda key: key
+
+    originals = [original for original, replacement in translation_tuples]
+    replacements = [
+        replacement
+        for original, replacement in translation_tuples
+    ]
+    # removing a substring joins its neighbours, which may then match any
+    # of the other originals
+    order_dependent = (
+        len(translation_tuples) > 1 and '' in replacements
+    ) or any(
+        _substrings_interact(original, other)
+        for i, original in enumerate(originals)
+        for other in originals[:i] + originals[i + 1:] + replacements
+    ) or len(set(originals)) != len(originals)
+    if order_dependent:
+        def sequential_translator(key):
+            for original, replacement in translation_tuples:
+                key = key.replace(original, replacement)
+            return key
+        return sequential_translator
+
+    # the originals cannot overlap one another, so the order of the
+    # alternatives within the pattern doesn't matter
+    replacement_by_original = dict(translation_tuples)
+    pattern = re.compile('|'.join(re.escape(x) for x in originals))
+    substitute = lambda match: replacement_by_original[match.group(0)]
+
+    def regex_translator(key):
+        return pattern.sub(substitute, key)
+    return regex_translator
+
+
 #------------------------------------------------------------------------------
 def create_key_translating_dot_dict(
     new_class_name,
     translation_tuples,
-    base_class=DotDict
+    base_class=DotDict,
+    max_cache_size=1000
 ):
     """this function will generate a DotDict derivative class that has key
     translation built in.  If the key is not found, translations (as specified
@@ -357,43 +582,116 @@ def create_key_translating_dot_dict(
     tried again.  Only on failure of this second lookup will the KeyError
     exception be raised.
 
+    The translation tuples are compiled once, when the class is created, and
+    translated keys are kept in a bounded cache owned by the new class.  The
+    square bracket operator translates the whole key before splitting it on
+    the '.' namespace separator, so a translation may make nested keys: with
+    the tuple ('__', '.'), d['db__host'] is d.db.host.
+
+    Calling this again with the same parameters returns the same class.  That
+    is how an instance of the class is unpickled: its class is made again
+    from the parameters, which must be picklable themselves.
+
     parameters:
         new_class_name - the name of the returned class
         translation_tuples - a sequence of 2-tuples of the form:
                              (original_substring, substitution_string)
         base_class - the baseclass on which this new class is to be based
+        max_cache_size - the number of translated keys to hold in the cache
+                         before it is thrown out and a new one started
     """
+    translation_tuples = tuple(tuple(x) for x in translation_tuples)
+    class_parameters = (
+        new_class_name,
+        translation_tuples,
+        base_class,
+        max_cache_size
+    )
+    try:
+        return _key_translating_classes[class_parameters]
+    except KeyError:
+        pass
+
     #==========================================================================
     class DotDictWithKeyTranslations(base_class):
 
+        _translator = staticmethod(compile_key_translator(translation_tuples))
+        _translation_cache = {}
+
         def __init__(self, *args, **kwargs):
             self.__dict__['_translation_tuples'] = translation_tuples
             super(DotDictWithKeyTranslations, self).__init__(*args, **kwargs)
 
         #----------------------------------------------------------------------
-        @memoize()
-        def _translate_key(self, key):
-            for original, replacement in self._translation_tuples:
-                key = key.replace(original, replacement)
-            return key
+        @classmethod
+        def translate_key(cls, key):
+            """return the key as it is stored within this mapping"""
+            cache = DotDictWithKeyTranslations._translation_cache
+            try:
+                return cache[key]
+            except KeyError:
+                if len(cache) >= max_cache_size:
+                    cache.clear()
+                translated_key = cache[key] = cls._translator(key)
+                return translated_key
+            except TypeError:
+                # unhashable keys can't be cached, but they can't be
+                # translated either
+                return key
+
+        # for backwards compatibility with code that used the old name
+        _translate_key = translate_key
+
+        #----------------------------------------------------------------------
+        def __getitem__(self, key):
+            # translate the whole key at once, a translation may produce
+            # the '.' namespace separator
+            return super(DotDictWithKeyTranslations, self).__getitem__(
+                self.translate_key(key)
+            )
+
+        #----------------------------------------------------------------------
+        def __setitem__(self, key, value):
+            super(DotDictWithKeyTranslations, self).__setitem__(
+                self.translate_key(key),
+                value
+            )
+
+        #----------------------------------------------------------------------
+        def __delitem__(self, key):
+            super(DotDictWithKeyTranslations, self).__delitem__(
+                self.translate_key(key)
+            )
+
+        #----------------------------------------------------------------------
+        def __reduce__(self):
+            # the class isn't found by its name in a module, so it is made
+            # again from the parameters
+            a_class, args, state = \
+                super(DotDictWithKeyTranslations, self).__reduce__()
+            return (
+                _unpickle_key_translating_dot_dict,
+                (class_parameters, args),
+                state
+            )
 
         #----------------------------------------------------------------------
         def assign(self, key, value):
             super(DotDictWithKeyTranslations, self).assign(
-                self._translate_key(key),
+                self.translate_key(key),
                 value
             )
 
         #----------------------------------------------------------------------
         def __setattr__(self, key, value):
             super(DotDictWithKeyTranslations, self).__setattr__(
-                self._translate_key(key),
+                self.translate_key(key),
                 value
             )
 
         #----------------------------------------------------------------------
         def __getattr__(self, key):
-            alt_key = self._translate_key(key)
+            alt_key = self.translate_key(key)
             if alt_key == key:
                 return super(DotDictWithKeyTranslations, self).__getattr__(key)
             try:
@@ -404,8 +702,21 @@ def create_key_translating_dot_dict(
         #----------------------------------------------------------------------
         def __delattr__(self, key):
             super(DotDictWithKeyTranslations, self).__delattr__(
-                self._translate_key(key)
+                self.translate_key(key)
             )
 
     DotDictWithKeyTranslations.__name__ = new_class_name
+    _key_translating_classes[class_parameters] = DotDictWithKeyTranslations
     return DotDictWithKeyTranslations
+
+# the classes made by 'create_key_translating_dot_dict' keyed by the
+# parameters that made them
+_key_translating_classes = {}
+
+
+#------------------------------------------------------------------------------
+def _unpickle_key_translating_dot_dict(class_parameters, args):
+    """return an empty instance of the class made by
+    'create_key_translating_dot_dict' with the parameters, for
+    DotDictWithKeyTranslations.__reduce__"""
+    return create_key_translating_dot_dict(*class_parameters)(*args)
@@ -0,0 +1,172 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""a stand in for an instance of a class that is constructed only when it is
+first used"""
+
+import threading
+
+
+#==============================================================================
+class LazyInstance(object):
+    """a proxy for an instance of a class.  The instance is constructed on
+    the first access to one of its attributes, or on the first use of one of
+    the common protocols: calling, iteration, indexing, 'len', 'in', 'with',
+    'str' and truth testing.  It is constructed exactly once, even when
+    several threads use the proxy at the same time.  From then on, the proxy
+    passes everything through to the instance.
+
+    'isinstance' sees the class of the instance without constructing it.
+    Equality and hashing are those of the proxy itself, so comparing configs
+    doesn't construct anything.
+
+        lazy = LazyInstance(Postgres, local_config)
+        isinstance(lazy, Postgres)  # True, nothing is constructed yet
+        lazy.connection()  # Postgres(local_config) is constructed now
+    """
+    __slots__ = (
+        '_lazy_class',
+        '_lazy_args',
+        '_lazy_kwargs',
+        '_lazy_instance',
+        '_lazy_lock',
+    )
+
+    #--------------------------------------------------------------------------
+    def __init__(self, a_class, *args, **kwargs):
+        """parameters:
+            a_class - the class to instantiate
+            args, kwargs - the parameters for its constructor"""
+        object.__setattr__(self, '_lazy_class', a_class)
+        object.__setattr__(self, '_lazy_args', args)
+        object.__setattr__(self, '_lazy_kwargs', kwargs)
+        object.__setattr__(self, '_lazy_instance', None)
+        object.__setattr__(self, '_lazy_lock', threading.Lock())
+
+    #--------------------------------------------------------------------------
+    def _lazy_materialize(self):
+        instance = self._lazy_instance
+        if instance is not None:
+            return instance
+        with self._lazy_lock:
+            # another thread may have constructed it while this one waited
+            instance = self._lazy_instance
+            if instance is None:
+                instance = self._lazy_class(
+                    *self._lazy_args,
+                    **self._lazy_kwargs
+                )
+                object.__setattr__(self, '_lazy_instance', instance)
+                # the parameters are no longer needed
+                object.__setattr__(self, '_lazy_args', ())
+                object.__setattr__(self, '_lazy_kwargs', {})
+        return instance
+
+    #--------------------------------------------------------------------------
+    @property
+    def __class__(self):
+        return self._lazy_class
+
+    #--------------------------------------------------------------------------
+    def __getattr__(self, name):
+        return getattr(self._lazy_materialize(), name)
+
+    #--------------------------------------------------------------------------
+    def __setattr__(self, name, value):
+        setattr(self._lazy_materialize(), name, value)
+
+    #--------------------------------------------------------------------------
+    def __delattr__(self, name):
+        delattr(self._lazy_materialize(), name)
+
+    #--------------------------------------------------------------------------
+    def __call__(self, *args, **kwargs):
+        return self._lazy_materialize()(*args, **kwargs)
+
+    #--------------------------------------------------------------------------
+    def __enter__(self):
+        return self._lazy_materialize().__enter__()
+
+    #--------------------------------------------------------------------------
+    def __exit__(self, exc_type, exc_value, traceback):
+        return self._lazy_materialize().__exit__(
+            exc_type,
+            exc_value,
+            traceback
+        )
+
+    #--------------------------------------------------------------------------
+    def __iter__(self):
+        return iter(self._lazy_materialize())
+
+    #--------------------------------------------------------------------------
+    def __len__(self):
+        return len(self._lazy_materialize())
+
+    #--------------------------------------------------------------------------
+    def __getitem__(self, key):
+        return self._lazy_materialize()[key]
+
+    #--------------------------------------------------------------------------
+    def __setitem__(self, key, value):
+        self._lazy_materialize()[key] = value
+
+    #--------------------------------------------------------------------------
+    def __delitem__(self, key):
+        del self._lazy_materialize()[key]
+
+    #--------------------------------------------------------------------------
+    def __contains__(self, item):
+        return item in self._lazy_materialize()
+
+    #--------------------------------------------------------------------------
+    def __nonzero__(self):
+        return bool(self._lazy_materialize())
+
+    #--------------------------------------------------------------------------
+    def __str__(self):
+        return str(self._lazy_materialize())
+
+    #--------------------------------------------------------------------------
+    def __reduce_ex__(self, protocol):
+        # object.__reduce_ex__ would consult the '__class__' property and end
+        # up asking the instance.  The lock can't be pickled, the proxy is
+        # made again around the instance, or around the parameters if it
+        # isn't yet constructed.
+        return (
+            _unpickle_lazy_instance,
+            (
+                self._lazy_class,
+                self._lazy_args,
+                self._lazy_kwargs,
+                self._lazy_instance,
+            )
+        )
+
+    #--------------------------------------------------------------------------
+    def __repr__(self):
+        instance = self._lazy_instance
+        if instance is None:
+            return '<LazyInstance of %s, not constructed>' % (
+                self._lazy_class.__name__
+            )
+        return repr(instance)
+
+
+#------------------------------------------------------------------------------
+def _unpickle_lazy_instance(a_class, args, kwargs, instance):
+    """return a LazyInstance from the state made by
+    LazyInstance.__reduce_ex__"""
+    lazy = LazyInstance(a_class, *args, **kwargs)
+    object.__setattr__(lazy, '_lazy_instance', instance)
+    return lazy
+
+
+#------------------------------------------------------------------------------
+def materialized(an_object):
+    """return the object, or for a LazyInstance, its instance if it has been
+    constructed and None if it hasn't.  This never constructs an instance."""
+    if type(an_object) is LazyInstance:
+        return object.__getattribute__(an_object, '_lazy_instance')
+    return an_object
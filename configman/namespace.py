@@ -2,7 +2,7 @@
 # License, v. 2.0. If a copy of the MPL was not distributed with this
 # file, You can obtain one at http://mozilla.org/MPL/2.0/.
 
-from configman.dotdict import DotDict
+from configman.dotdict import DotDict, walk_tree
 from configman.option import Option, Aggregation
 
 
@@ -11,6 +11,11 @@ class Namespace(DotDict):
 
     #--------------------------------------------------------------------------
     def __init__(self, doc='', initializer=None):
+        # the generation counts the changes to the keys of this namespace.  It
+        # allows derived information, like the requirements merged by
+        # RequiredConfig.get_required_config, to be cached until a key is
+        # added, replaced or removed.
+        object.__setattr__(self, '_generation', 0)
         super(Namespace, self).__init__(initializer=initializer)
         object.__setattr__(self, '_doc', doc)  # force into attributes
         object.__setattr__(self, '_reference_value_from', False)
@@ -23,6 +28,26 @@ class Namespace(DotDict):
         else:
             o = Option(name=name, default=value, value=value)
         super(Namespace, self).__setattr__(name, o)
+        object.__setattr__(self, '_generation', self._generation + 1)
+
+    #--------------------------------------------------------------------------
+    def __delattr__(self, name):
+        super(Namespace, self).__delattr__(name)
+        object.__setattr__(self, '_generation', self._generation + 1)
+
+    #--------------------------------------------------------------------------
+    def __reduce__(self):
+        a_class, args, state = super(Namespace, self).__reduce__()
+        return (
+            a_class,
+            (self._doc,),
+            state + (self._reference_value_from,)
+        )
+
+    #--------------------------------------------------------------------------
+    def __setstate__(self, state):
+        super(Namespace, self).__setstate__(state[:2])
+        object.__setattr__(self, '_reference_value_from', state[2])
 
     #--------------------------------------------------------------------------
     def add_option(self, name, *args, **kwargs):
@@ -48,8 +73,8 @@ class Namespace(DotDict):
         setattr(current_namespace, an_option.name, an_option)
 
     #--------------------------------------------------------------------------
-    def add_aggregation(self, name, function, secret=False):
-        an_aggregation = Aggregation(name, function, secret)
+    def add_aggregation(self, name, function, secret=False, depends_on=None):
+        an_aggregation = Aggregation(name, function, secret, depends_on)
         setattr(self, name, an_aggregation)
 
     #--------------------------------------------------------------------------
@@ -75,24 +100,58 @@ class Namespace(DotDict):
             candidate.set_value(value)
 
     #--------------------------------------------------------------------------
-    def safe_copy(self, reference_value_from=None):
-        new_namespace = Namespace()
-        if self._reference_value_from:
-            new_namespace.ref_value_namespace()
-        for key, opt in self.iteritems():
+    def safe_copy(self, reference_value_from=None, keep_docs=False):
+        """return a copy of this Namespace that is safe to change.  Nested
+        Namespaces and Options are copied, so no change to the copy, through
+        its methods or by assigning to the attributes of its Options, reaches
+        this Namespace.  The Options are copied slot by slot rather than
+        constructed again.
+
+        parameters:
+            reference_value_from - given to any Option directly within this
+                                   Namespace that doesn't already have a
+                                   reference_value_from
+            keep_docs - if True, the copied Namespaces keep their docs"""
+        new_namespace = self._empty_copy(keep_docs)
+        # the copies of the nested Namespaces by their paths
+        copies = {(): new_namespace}
+        for path, opt in walk_tree(
+            self,
+            include_branches=True,
+            branch_type=Namespace
+        ):
+            destination = copies[path[:-1]]
+            key = path[-1]
             if isinstance(opt, Option):
-                new_namespace[key] = opt.copy()
+                opt = opt.copy()
                 # assign a new reference_value if one has not been defined
-                if not new_namespace[key].reference_value_from:
-                    new_namespace[key].reference_value_from = \
-                        reference_value_from
+                if (
+                    reference_value_from
+                    and len(path) == 1
+                    and not opt.reference_value_from
+                ):
+                    opt.reference_value_from = reference_value_from
+                destination[key] = opt
             elif isinstance(opt, Aggregation):
-                new_namespace.add_aggregation(
+                destination.add_aggregation(
                     opt.name,
-                    opt.function
+                    opt.function,
+                    opt.secret,
+                    opt.depends_on
                 )
             elif isinstance(opt, Namespace):
-                new_namespace[key] = opt.safe_copy()
+                copies[path] = destination[key] = opt._empty_copy(keep_docs)
+        return new_namespace
+
+    #--------------------------------------------------------------------------
+    def _empty_copy(self, keep_docs):
+        """return a new empty Namespace with the same flags as this one"""
+        if keep_docs:
+            new_namespace = Namespace(doc=self._doc)
+        else:
+            new_namespace = Namespace()
+        if self._reference_value_from:
+            new_namespace.ref_value_namespace()
         return new_namespace
 
     #--------------------------------------------------------------------------
@@ -6,7 +6,7 @@ import collections
 
 from configman.converters import (
     str_to_python_object,
-    from_string_converters,
+    converter_registry,
     to_str
 )
 from configman.config_exceptions import (
@@ -15,8 +15,71 @@ from configman.config_exceptions import (
 )
 
 
+#------------------------------------------------------------------------------
+def _flag_property(bit):
+    """create a property that stores a boolean as a single bit within an
+    Option's '_flags' integer"""
+    def get_flag(self):
+        return bool(self._flags & bit)
+
+    def set_flag(self, value):
+        if value:
+            self._flags |= bit
+        else:
+            self._flags &= ~bit
+    return property(get_flag, set_flag)
+
+
 #==============================================================================
 class Option(object):
+    # Options are numerous: an app with many plugins can have tens of
+    # thousands of them.  To keep each one small, there is no per instance
+    # __dict__ and all the boolean attributes are packed as bits into a
+    # single small integer.  Small integers are shared by the Python
+    # runtime, so the flags cost no memory beyond the slot that refers to them.
+    # Without a __dict__, an Option can't be given attributes of its own:
+    # code that tags Options should keep its tags in a mapping keyed by the
+    # Option's name.
+    __slots__ = (
+        'name',
+        'short_form',
+        'default',
+        'doc',
+        'from_string_converter',
+        'to_string_converter',
+        'value',
+        'reference_value_from',
+        '_flags',
+    )
+
+    # the attributes that define an Option in the order of the constructor
+    # parameters
+    attribute_names = (
+        'name',
+        'default',
+        'doc',
+        'from_string_converter',
+        'to_string_converter',
+        'value',
+        'short_form',
+        'exclude_from_print_conf',
+        'exclude_from_dump_conf',
+        'is_argument',
+        'likely_to_be_changed',
+        'not_for_definition',
+        'reference_value_from',
+        'secret',
+        'has_changed',
+    )
+
+    exclude_from_print_conf = _flag_property(1)
+    exclude_from_dump_conf = _flag_property(2)
+    is_argument = _flag_property(4)
+    likely_to_be_changed = _flag_property(8)
+    not_for_definition = _flag_property(16)
+    secret = _flag_property(32)
+    has_changed = _flag_property(64)
+
     #--------------------------------------------------------------------------
     def __init__(
         self,
@@ -36,6 +99,7 @@ class Option(object):
         secret=False,
         has_changed=False,
     ):
+        self._flags = 0
         self.name = name
         self.short_form = short_form
         self.default = default
@@ -101,12 +165,7 @@ class Option(object):
 
     #--------------------------------------------------------------------------
     def _deduce_converter(self, default):
-        default_type = type(default)
-
-        return from_string_converters.get(
-            default_type,
-            default_type
-        )
+        return converter_registry.get_from_string_converter(type(default))
 
     #--------------------------------------------------------------------------
     def set_value(self, val=None):
@@ -114,9 +173,14 @@ class Option(object):
             val = self.default
         if isinstance(val, basestring):
             try:
-                new_value = self.from_string_converter(val)
-                self.has_changed = new_value != self.value
-                self.value = new_value
+                if converter_registry.collect_statistics:
+                    new_value = converter_registry.timed_call(
+                        self.from_string_converter,
+                        val
+                    )
+                else:
+                    new_value = self.from_string_converter(val)
+                self.set_converted_value(new_value)
             except TypeError:
                 self.has_changed = val != self.value
                 self.value = val
@@ -136,6 +200,14 @@ class Option(object):
             self.has_changed = val != self.value
             self.value = val
 
+    #--------------------------------------------------------------------------
+    def set_converted_value(self, new_value):
+        """set the value from the result of having already applied the from
+        string converter to a string.  This allows many options that share a
+        converter to be converted together in a batch."""
+        self.has_changed = new_value != self.value
+        self.value = new_value
+
     #--------------------------------------------------------------------------
     def set_default(self, val, force=False):
         """this function allows a default to be set on an option that dosen't
@@ -175,35 +247,179 @@ class Option(object):
     #--------------------------------------------------------------------------
     def copy(self):
         """return a copy"""
-        o = Option(
-            name=self.name,
-            default=self.default,
-            doc=self.doc,
-            from_string_converter=self.from_string_converter,
-            to_string_converter=self.to_string_converter,
-            value=self.value,
-            short_form=self.short_form,
-            exclude_from_print_conf=self.exclude_from_print_conf,
-            exclude_from_dump_conf=self.exclude_from_dump_conf,
-            is_argument=self.is_argument,
-            likely_to_be_changed=self.likely_to_be_changed,
-            not_for_definition=self.not_for_definition,
-            reference_value_from=self.reference_value_from,
-            secret=self.secret,
-            has_changed=self.has_changed,
-        )
+        # copying the attributes directly is much faster than running the
+        # constructor again.  Only the parts of the constructor that could
+        # give a different result for attributes changed since construction
+        # are repeated here.
+        o = Option.__new__(Option)
+        for attribute in Option.__slots__:
+            setattr(o, attribute, getattr(self, attribute))
+        if isinstance(o.doc, basestring):
+            o.doc = o.doc.strip()
+        if o.from_string_converter is None and o.default is not None:
+            o.from_string_converter = o._deduce_converter(o.default)
+        elif isinstance(o.from_string_converter, basestring):
+            o.from_string_converter = str_to_python_object(
+                o.from_string_converter
+            )
         return o
 
+    #--------------------------------------------------------------------------
+    def __reduce__(self):
+        # the slots are pickled as a tuple without the trailing ones that
+        # hold their usual empty values, no flags or None.  Other falsy
+        # values, like a default of 0 or False, are kept.
+        state = [getattr(self, x) for x in Option.__slots__]
+        if not state[-1]:
+            state.pop()
+        while state and state[-1] is None:
+            state.pop()
+        return (_unpickle_option, tuple(state))
+
+    #--------------------------------------------------------------------------
+    def __setstate__(self, state):
+        # kept only to load the pickles made before Option had __reduce__,
+        # which hold the state tuple of the former __getstate__
+        for attribute, value in zip(Option.__slots__, state):
+            setattr(self, attribute, value)
+
+
+#------------------------------------------------------------------------------
+def _unpickle_option(*state):
+    """return an Option from the state made by Option.__reduce__"""
+    an_option = Option.__new__(Option)
+    # the slots, in the order of Option.__slots__, are assigned by unpacking
+    # rather than by a call to setattr for each.  Options are numerous.
+    (
+        an_option.name,
+        an_option.short_form,
+        an_option.default,
+        an_option.doc,
+        an_option.from_string_converter,
+        an_option.to_string_converter,
+        an_option.value,
+        an_option.reference_value_from,
+        an_option._flags,
+    ) = state + (None,) * (len(Option.__slots__) - len(state))
+    if an_option._flags is None:
+        an_option._flags = 0
+    return an_option
+
+
+# the value of 'depends_on' for an Aggregation whose dependencies are to be
+# discovered by recording the keys that its function reads
+DISCOVER_DEPENDENCIES = 'discover'
+
+
+#==============================================================================
+class _RecordingMapping(collections.Mapping):
+    """a read only view of a mapping of a config that records the keys, in
+    the form 'x.y.z', that are read through it.  A nested mapping is
+    returned as a view too.  Using anything that involves the whole of a
+    mapping, like its length or its keys, records the key of the mapping
+    itself."""
+    __slots__ = ('_mapping', '_prefix', '_is_local', '_reads')
+
+    #--------------------------------------------------------------------------
+    def __init__(self, mapping, is_local, reads, prefix=''):
+        self._mapping = mapping
+        self._is_local = is_local
+        self._reads = reads
+        self._prefix = prefix
+
+    #--------------------------------------------------------------------------
+    def _record(self, key):
+        self._reads.append((self._is_local, key))
+
+    #--------------------------------------------------------------------------
+    def _key(self, key):
+        if self._prefix:
+            return '%s.%s' % (self._prefix, key)
+        return key
+
+    #--------------------------------------------------------------------------
+    def _view(self, key, value):
+        if isinstance(value, collections.Mapping):
+            return _RecordingMapping(
+                value,
+                self._is_local,
+                self._reads,
+                self._key(key)
+            )
+        self._record(self._key(key))
+        return value
+
+    #--------------------------------------------------------------------------
+    def __getitem__(self, key):
+        try:
+            value = self._mapping[key]
+        except KeyError:
+            self._record(self._key(key))
+            raise
+        return self._view(key, value)
+
+    #--------------------------------------------------------------------------
+    def __getattr__(self, name):
+        if name.startswith('__') or hasattr(type(self._mapping), name):
+            # a method of the mapping rather than a key
+            self._record(self._prefix)
+            return getattr(self._mapping, name)
+        try:
+            value = getattr(self._mapping, name)
+        except KeyError:
+            self._record(self._key(name))
+            raise
+        return self._view(name, value)
+
+    #--------------------------------------------------------------------------
+    def __contains__(self, key):
+        self._record(self._key(key))
+        return key in self._mapping
+
+    #--------------------------------------------------------------------------
+    def __iter__(self):
+        self._record(self._prefix)
+        return iter(self._mapping)
+
+    #--------------------------------------------------------------------------
+    def __len__(self):
+        self._record(self._prefix)
+        return len(self._mapping)
+
 
 #==============================================================================
 class Aggregation(object):
+    __slots__ = (
+        'name',
+        'function',
+        'value',
+        'secret',
+        'depends_on',
+    )
+
     #--------------------------------------------------------------------------
     def __init__(
         self,
         name,
         function,
         secret=False,
+        depends_on=None,
     ):
+        """parameters:
+            name - the name of the Aggregation
+            function - a function, or the dotted name of one, that accepts
+                       the config, the local namespace and the commandline
+                       arguments and returns the value of the Aggregation
+            secret - True if the value is not to be shown
+            depends_on - the keys that the function reads.  If None, the
+                         function is called every time a config is made.
+                         Otherwise it is called again only if the value of
+                         one of these keys has changed.  It may be a sequence
+                         of keys, in the form 'x.y.z', relative to the
+                         namespace of the Aggregation, or
+                         DISCOVER_DEPENDENCIES for the keys to be recorded as
+                         the function reads them.  Only the reads made during
+                         the call are recorded."""
         self.name = name
         if isinstance(function, basestring):
             self.function = str_to_python_object(function)
@@ -211,10 +427,41 @@ class Aggregation(object):
             self.function = function
         self.value = None
         self.secret = secret
+        if (
+            depends_on is not None
+            and depends_on != DISCOVER_DEPENDENCIES
+        ):
+            depends_on = tuple(depends_on)
+        self.depends_on = depends_on
+
+    #--------------------------------------------------------------------------
+    def __getstate__(self):
+        return tuple(getattr(self, x) for x in Aggregation.__slots__)
+
+    #--------------------------------------------------------------------------
+    def __setstate__(self, state):
+        for attribute, value in zip(Aggregation.__slots__, state):
+            setattr(self, attribute, value)
 
     #--------------------------------------------------------------------------
     def aggregate(self, all_options, local_namespace, args):
+        """call the function to set the value of the Aggregation.  Return
+        the keys that the function depends on as a list of tuples: True if
+        the key is relative to the local namespace, False if it is relative
+        to the config, and the key in the form 'x.y.z'.  Return None if the
+        dependencies are unknown."""
+        if self.depends_on == DISCOVER_DEPENDENCIES:
+            reads = []
+            self.value = self.function(
+                _RecordingMapping(all_options, False, reads),
+                _RecordingMapping(local_namespace, True, reads),
+                args
+            )
+            return reads
         self.value = self.function(all_options, local_namespace, args)
+        if self.depends_on is None:
+            return None
+        return [(True, key) for key in self.depends_on]
 
     #--------------------------------------------------------------------------
     def __eq__(self, other):
@@ -2,22 +2,85 @@
 # License, v. 2.0. If a copy of the MPL was not distributed with this
 # file, You can obtain one at http://mozilla.org/MPL/2.0/.
 
+import weakref
+
 from configman.namespace import Namespace
 
 
 #==============================================================================
 class RequiredConfig(object):
+    # the merged requirements for each class keyed by the class.  Each value
+    # is a tuple of the fingerprint of the 'required_config' Namespaces that
+    # went into the merge, the generation of the merged Namespace, the merged
+    # Namespace itself and the 'required_config' Namespaces.
+    _required_config_cache = weakref.WeakKeyDictionary()
+
     #--------------------------------------------------------------------------
     @classmethod
     def get_required_config(cls):
-        result = Namespace()
+        """return a Namespace of the requirements of this class merged with
+        those of all the classes in its mro.  The merged Namespace is cached
+        per class and must be treated as read only.  The cache is discarded
+        if a key is added to or removed from any of the 'required_config'
+        Namespaces in the mro.  Changes to the Options themselves, like
+        'set_default', need no invalidation because the Options within the
+        merged Namespace are the very same objects."""
+        required_configs = []
         for a_class in reversed(cls.__mro__):
             try:
-                result.update(a_class.required_config)
+                required_configs.append(a_class.required_config)
             except AttributeError:
                 pass
+        fingerprint = cls._required_config_fingerprint(required_configs)
+        if fingerprint is not None:
+            try:
+                (
+                    cached_fingerprint,
+                    result_generation,
+                    result,
+                    unused_required_configs
+                ) = cls._required_config_cache[cls]
+                # the result's own generation is checked so that a caller
+                # that changes the merged Namespace doesn't corrupt the cache
+                # for everyone else
+                if (
+                    cached_fingerprint == fingerprint
+                    and result_generation == result._generation
+                ):
+                    return result
+            except KeyError:
+                pass
+        result = Namespace()
+        for a_required_config in required_configs:
+            result.update(a_required_config)
+        if fingerprint is not None:
+            # the requirement Namespaces are kept in the cache entry so that
+            # their ids in the fingerprint can't be reused by new objects
+            cls._required_config_cache[cls] = (
+                fingerprint,
+                result._generation,
+                result,
+                required_configs
+            )
         return result
 
+    #--------------------------------------------------------------------------
+    @staticmethod
+    def _required_config_fingerprint(required_configs):
+        """return a tuple identifying the current state of the keys of the
+        requirement Namespaces or None if any of the requirements is not a
+        Namespace and, therefore, can't be tracked."""
+        fingerprint = []
+        for a_required_config in required_configs:
+            try:
+                fingerprint.append(
+                    (id(a_required_config), a_required_config._generation)
+                )
+            except (AttributeError, KeyError):
+                # KeyError - a DotDict that isn't a Namespace
+                return None
+        return tuple(fingerprint)
+
     #--------------------------------------------------------------------------
     def config_assert(self, config):
         for a_parameter in self.required_config.keys():
@@ -0,0 +1,554 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""configurable factories and pools of resources, like database connections.
+
+A resource factory is a RequiredConfig class.  It is the value of an Option
+and is instantiated with its local config by an Aggregation, so the kind of
+pooling can be chosen at run time like any other class option.  The classes
+here generalize the 'Postgres' and 'PostgresPooled' classes of
+demo/advanced_demo3.py:
+
+    ResourceFactory - creates a new resource for each use and closes it
+                      afterwards
+    ThreadLocalResourcePool - keeps one resource for each thread, closing it
+                              when the thread ends
+    BoundedResourcePool - shares at most 'max_size' resources among all the
+                          threads
+
+The resources themselves are made by the function or class that is the value
+of the 'resource_creator' option, called with the local config.  Each use of
+a resource is a context:
+
+    required_config = Namespace()
+    add_resource(
+        required_config,
+        'database',
+        default=BoundedResourcePool,
+        creator=connect_to_postgres
+    )
+    ...
+    with config.database() as connection:
+        connection.query('select * from life')
+
+or, retrying with jittered backoff on the 'operational_exceptions':
+
+    config.database.run(lambda connection: connection.query('...'))
+
+A ConfigurationManager's 'context' closes the factories, and with them every
+resource that they hold, when it ends."""
+
+import collections
+import contextlib
+import functools
+import random
+import threading
+import time
+import weakref
+
+from configman.config_exceptions import ResourceUnavailableError
+from configman.converters import class_converter, str_to_list
+from configman.namespace import Namespace
+from configman.required_config import RequiredConfig
+
+
+#------------------------------------------------------------------------------
+def instantiate_resource_factory(class_option_name):
+    """return a function for an Aggregation that instantiates the resource
+    factory class that is the value of the Option 'class_option_name' with
+    the local config"""
+    def instantiate(config, local_config, args):
+        return local_config[class_option_name](local_config)
+    return instantiate
+
+
+#------------------------------------------------------------------------------
+def add_resource(
+    a_namespace,
+    name='resource',
+    default=None,
+    creator=None,
+    doc='the class of the resource factory'
+):
+    """add a resource to a Namespace: an Option '<name>_class' holding the
+    class of the resource factory and an Aggregation '<name>' that
+    instantiates it.
+
+    parameters:
+        a_namespace - the Namespace, often the 'required_config' of a class
+        name - the name of the Aggregation
+        default - the default resource factory class, ResourceFactory if None
+        creator - the default for the 'resource_creator' option of the
+                  factory: a function or class called with the local config
+                  that returns a new resource
+        doc - the doc string of the class Option"""
+    if default is None:
+        default = ResourceFactory
+    class_option_name = '%s_class' % name
+    a_namespace.add_option(
+        class_option_name,
+        default=default,
+        doc=doc,
+        from_string_converter=class_converter
+    )
+    if creator is not None:
+        a_namespace.add_option(
+            'resource_creator',
+            default=creator,
+            doc='a function or class called with the local config that '
+                'returns a new resource',
+            from_string_converter=class_converter
+        )
+    a_namespace.add_aggregation(
+        name,
+        instantiate_resource_factory(class_option_name)
+    )
+
+
+#==============================================================================
+class ResourceFactory(RequiredConfig):
+    """a factory that creates a new resource for each use and closes it at
+    the end of the use.  This is fine when an external connection manager
+    does the pooling."""
+    required_config = Namespace()
+    required_config.add_option(
+        'resource_creator',
+        default=None,
+        doc='a function or class called with the local config that returns '
+            'a new resource',
+        from_string_converter=class_converter
+    )
+    required_config.add_option(
+        'operational_exceptions',
+        default='',
+        doc='a list of the exception classes that mean that a resource has '
+            'failed and should be discarded, like a lost connection',
+        from_string_converter=functools.partial(
+            str_to_list,
+            item_converter=class_converter,
+            list_to_collection_converter=tuple
+        )
+    )
+    required_config.add_option(
+        'max_retries',
+        default=3,
+        doc='the number of times to retry creating a resource or running a '
+            'function with "run" after an operational exception',
+    )
+    required_config.add_option(
+        'backoff_base',
+        default=0.1,
+        doc='the seconds of the longest first delay before a retry, the '
+            'longest delay doubles with each retry',
+    )
+    required_config.add_option(
+        'backoff_max',
+        default=10.0,
+        doc='the most seconds to delay before a retry',
+    )
+
+    #--------------------------------------------------------------------------
+    def __init__(self, config):
+        """parameters:
+            config - the local config holding the options of this class"""
+        self.config = config
+        self.operational_exceptions = tuple(
+            config.get('operational_exceptions') or ()
+        )
+
+    #--------------------------------------------------------------------------
+    def backoff_delay(self, attempt):
+        """return the seconds to sleep before retry number 'attempt',
+        counting from 0.  The delay is random, up to an exponentially growing
+        limit, so that many clients retrying at once spread out."""
+        limit = min(
+            self.config.backoff_max,
+            self.config.backoff_base * 2 ** attempt
+        )
+        return random.uniform(0, limit)
+
+    #--------------------------------------------------------------------------
+    def _retrying(self, function, *args, **kwargs):
+        """call the function, retrying after an operational exception"""
+        attempt = 0
+        while True:
+            try:
+                return function(*args, **kwargs)
+            except self.operational_exceptions:
+                if attempt >= self.config.max_retries:
+                    raise
+            time.sleep(self.backoff_delay(attempt))
+            attempt += 1
+
+    #--------------------------------------------------------------------------
+    def create_resource(self):
+        """return a new resource from the 'resource_creator', retrying with
+        backoff after an operational exception"""
+        creator = self.config.resource_creator
+        if creator is None:
+            raise ResourceUnavailableError('no resource_creator is configured')
+        return self._retrying(creator, self.config)
+
+    #--------------------------------------------------------------------------
+    def close_resource(self, resource):
+        """close a resource, ignoring the failure of a broken one"""
+        try:
+            resource.close()
+        except self.operational_exceptions:
+            pass
+
+    #--------------------------------------------------------------------------
+    def acquire(self):
+        """return a resource for the exclusive use of the caller until it is
+        given back with 'release'"""
+        return self.create_resource()
+
+    #--------------------------------------------------------------------------
+    def release(self, resource, discard=False):
+        """give back a resource from 'acquire'.  If 'discard' is True, the
+        resource has failed and must not be used again."""
+        self.close_resource(resource)
+
+    #--------------------------------------------------------------------------
+    @contextlib.contextmanager
+    def __call__(self):
+        """return a context with a resource.  The resource is released at
+        the end of the context and discarded if the context ends with an
+        operational exception."""
+        resource = self.acquire()
+        with self._holding(resource):
+            yield resource
+
+    #--------------------------------------------------------------------------
+    @contextlib.contextmanager
+    def _holding(self, resource):
+        """return a context that releases an acquired resource at its end,
+        discarding it if the context ends with an operational exception"""
+        try:
+            yield resource
+        except self.operational_exceptions:
+            self.release(resource, discard=True)
+            raise
+        except:
+            self.release(resource)
+            raise
+        else:
+            self.release(resource)
+
+    #--------------------------------------------------------------------------
+    def run(self, function, *args, **kwargs):
+        """call the function with a resource and the given arguments and
+        return its result.  After an operational exception from the
+        function, the resource is discarded and the call is retried with a
+        new one, with backoff.  A failure to create a resource is retried by
+        'create_resource' alone, so the 'resource_creator' is called at most
+        'max_retries' + 1 times for each resource."""
+        attempt = 0
+        while True:
+            resource = self.acquire()
+            try:
+                with self._holding(resource):
+                    return function(resource, *args, **kwargs)
+            except self.operational_exceptions:
+                if attempt >= self.config.max_retries:
+                    raise
+            time.sleep(self.backoff_delay(attempt))
+            attempt += 1
+
+    #--------------------------------------------------------------------------
+    def close(self):
+        """close every resource held by this factory.  This one holds none."""
+        pass
+
+
+#==============================================================================
+class _ResourcePool(ResourceFactory):
+    """the options and checks shared by the pools"""
+    required_config = Namespace()
+    required_config.add_option(
+        'idle_timeout',
+        default=300.0,
+        doc='the seconds that a resource may go unused before it is closed '
+            'rather than reused, 0 for no limit',
+    )
+    required_config.add_option(
+        'health_check',
+        default=None,
+        doc='a function called with a resource before it is reused that '
+            'returns False if the resource is no longer usable',
+        from_string_converter=class_converter
+    )
+
+    #--------------------------------------------------------------------------
+    def __init__(self, config):
+        super(_ResourcePool, self).__init__(config)
+        self._closed = False
+
+    #--------------------------------------------------------------------------
+    def _usable(self, resource, last_used):
+        """True if a resource that was last used at the time 'last_used' may
+        be used again"""
+        idle_timeout = self.config.idle_timeout
+        if idle_timeout and time.time() - last_used > idle_timeout:
+            return False
+        health_check = self.config.get('health_check')
+        if health_check is None:
+            return True
+        try:
+            return health_check(resource)
+        except self.operational_exceptions:
+            return False
+
+    #--------------------------------------------------------------------------
+    def _check_open(self):
+        if self._closed:
+            raise ResourceUnavailableError('the resource pool is closed')
+
+
+#==============================================================================
+class _ThreadResource(object):
+    """the resource of one thread of a ThreadLocalResourcePool, kept in a
+    threading.local.  It goes away with its thread, and the weak reference
+    'key' to it then tells the pool to close the resource."""
+    __slots__ = ('resource', 'last_used', 'key', '__weakref__')
+
+    def __init__(self, resource):
+        self.resource = resource
+        # the time the resource was last released, None while in use
+        self.last_used = None
+        self.key = None
+
+
+#==============================================================================
+class ThreadLocalResourcePool(_ResourcePool):
+    """a pool that keeps one resource for each thread.  A thread always gets
+    its own resource back, so it needs no locking while it uses it.  The
+    resource of a thread is closed when the thread ends."""
+    required_config = Namespace()
+    required_config.add_option(
+        'max_size',
+        default=100,
+        doc='the most threads that may hold a resource at once, 0 for no '
+            'limit',
+    )
+
+    #--------------------------------------------------------------------------
+    def __init__(self, config):
+        super(ThreadLocalResourcePool, self).__init__(config)
+        # the _ThreadResource of the current thread is its 'holder'
+        self._local = threading.local()
+        # the resource of each thread by the weak reference to the
+        # _ThreadResource that holds it
+        self._resources = {}
+        self._lock = threading.Lock()
+
+    #--------------------------------------------------------------------------
+    def acquire(self):
+        self._check_open()
+        holder = getattr(self._local, 'holder', None)
+        if holder is not None:
+            if (
+                holder.last_used is None
+                or self._usable(holder.resource, holder.last_used)
+            ):
+                return holder.resource
+            self._discard(holder)
+        with self._lock:
+            max_size = self.config.get('max_size')
+            if max_size and len(self._resources) >= max_size:
+                raise ResourceUnavailableError(
+                    '%d threads already hold a resource' % max_size
+                )
+            # reserve a place for the new resource
+            key = object()
+            self._resources[key] = None
+        try:
+            resource = self.create_resource()
+        except:
+            with self._lock:
+                self._resources.pop(key, None)
+            raise
+        holder = _ThreadResource(resource)
+        holder.key = weakref.ref(holder, self._thread_ended)
+        with self._lock:
+            closed = self._closed or self._resources.pop(key, True) is True
+            if not closed:
+                self._resources[holder.key] = resource
+        if closed:
+            # the pool was closed while the resource was created
+            self.close_resource(resource)
+            self._check_open()
+        self._local.holder = holder
+        return resource
+
+    #--------------------------------------------------------------------------
+    def release(self, resource, discard=False):
+        holder = getattr(self._local, 'holder', None)
+        if holder is None or holder.resource is not resource:
+            # not the resource of this thread, or already discarded
+            if discard:
+                self.close_resource(resource)
+            return
+        if discard or self._closed:
+            self._discard(holder)
+            return
+        holder.last_used = time.time()
+
+    #--------------------------------------------------------------------------
+    def _discard(self, holder):
+        with self._lock:
+            self._resources.pop(holder.key, None)
+        # dropping the holder outside of the lock, its weak reference has
+        # nothing left to close
+        self._local.holder = None
+        self.close_resource(holder.resource)
+
+    #--------------------------------------------------------------------------
+    def _thread_ended(self, key):
+        """the callback of the weak reference to the holder of the resource
+        of a thread that has ended"""
+        with self._lock:
+            resource = self._resources.pop(key, None)
+        if resource is not None:
+            self.close_resource(resource)
+
+    #--------------------------------------------------------------------------
+    def close(self):
+        """close the resources of all the threads"""
+        with self._lock:
+            self._closed = True
+            resources = self._resources.values()
+            self._resources = {}
+        for resource in resources:
+            if resource is not None:
+                self.close_resource(resource)
+
+
+#==============================================================================
+class BoundedResourcePool(_ResourcePool):
+    """a pool of at most 'max_size' resources shared by all the threads.  A
+    thread waits for a resource when they are all in use."""
+    required_config = Namespace()
+    required_config.add_option(
+        'max_size',
+        default=10,
+        doc='the most resources to have open at once',
+    )
+    required_config.add_option(
+        'checkout_timeout',
+        default=30.0,
+        doc='the seconds to wait for a resource when all are in use',
+    )
+
+    #--------------------------------------------------------------------------
+    def __init__(self, config):
+        super(BoundedResourcePool, self).__init__(config)
+        # the idle resources with the times they were released, the most
+        # recently released last
+        self._idle = collections.deque()
+        # the number of resources open, idle or in use
+        self._size = 0
+        self._condition = threading.Condition()
+
+    #--------------------------------------------------------------------------
+    def acquire(self):
+        deadline = time.time() + self.config.checkout_timeout
+        while True:
+            with self._condition:
+                self._check_open()
+                expired = self._take_expired()
+                if expired:
+                    # closed outside of the lock before looking again
+                    pass
+                elif self._idle:
+                    resource, last_used = self._idle.pop()
+                elif self._size < self.config.max_size:
+                    # reserve a place for a new resource
+                    self._size += 1
+                    resource = last_used = None
+                else:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        raise ResourceUnavailableError(
+                            'all %d resources are in use'
+                            % self.config.max_size
+                        )
+                    self._condition.wait(remaining)
+                    continue
+            if expired:
+                self._close_all(expired)
+                continue
+            if resource is None:
+                try:
+                    return self.create_resource()
+                except:
+                    self._forget_one()
+                    raise
+            # the checks may be slow, they are made outside of the lock
+            if self._usable(resource, last_used):
+                return resource
+            self._discard(resource)
+
+    #--------------------------------------------------------------------------
+    def release(self, resource, discard=False):
+        if discard:
+            self._discard(resource)
+            return
+        expired = None
+        with self._condition:
+            if not self._closed:
+                self._idle.append((resource, time.time()))
+                expired = self._take_expired()
+                self._condition.notify()
+        if expired is None:
+            # the pool is closed
+            self._discard(resource)
+        else:
+            self._close_all(expired)
+
+    #--------------------------------------------------------------------------
+    def _take_expired(self):
+        """remove the idle resources that have been unused for longer than
+        the 'idle_timeout' and return them to be closed.  The oldest are at
+        the front of the idle resources.  It is called with the condition's
+        lock held."""
+        expired = []
+        idle_timeout = self.config.idle_timeout
+        if idle_timeout:
+            oldest_allowed = time.time() - idle_timeout
+            while self._idle and self._idle[0][1] < oldest_allowed:
+                expired.append(self._idle.popleft()[0])
+            if expired:
+                self._size -= len(expired)
+                self._condition.notify(len(expired))
+        return expired
+
+    #--------------------------------------------------------------------------
+    def _close_all(self, resources):
+        for resource in resources:
+            self.close_resource(resource)
+
+    #--------------------------------------------------------------------------
+    def _forget_one(self):
+        with self._condition:
+            self._size -= 1
+            self._condition.notify()
+
+    #--------------------------------------------------------------------------
+    def _discard(self, resource):
+        self._forget_one()
+        self.close_resource(resource)
+
+    #--------------------------------------------------------------------------
+    def close(self):
+        """close the idle resources now and the ones in use as they are
+        released"""
+        with self._condition:
+            self._closed = True
+            idle = self._idle
+            self._idle = collections.deque()
+            self._size -= len(idle)
+            self._condition.notify_all()
+        for resource, last_used in idle:
+            self.close_resource(resource)
@@ -0,0 +1,233 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""close the resources of a config in the reverse of the order in which they
+were created, the independent ones concurrently"""
+
+import collections
+import threading
+import time
+
+
+#==============================================================================
+class CloseResult(collections.namedtuple(
+    'CloseResult',
+    'key duration error timed_out'
+)):
+    """the outcome of closing one resource.
+
+    attributes:
+        key - the key of the resource in the config, in the form 'x.y.z'
+        duration - the seconds that the close took, or had taken when it
+                   timed out, 0.0 if it timed out before it started
+        error - the exception that the close raised, or None
+        timed_out - True if the close didn't finish within the timeout
+    """
+    __slots__ = ()
+
+
+#==============================================================================
+class ShutdownSummary(object):
+    """the outcome of closing all the resources of a config.
+
+    attributes:
+        results - a list of CloseResults in the order that the closes were
+                  started
+        duration - the seconds that the whole shutdown took
+    """
+
+    #--------------------------------------------------------------------------
+    def __init__(self):
+        self.results = []
+        self.duration = 0.0
+
+    #--------------------------------------------------------------------------
+    @property
+    def failures(self):
+        """the CloseResults of the closes that raised an exception"""
+        return [x for x in self.results if x.error is not None]
+
+    #--------------------------------------------------------------------------
+    @property
+    def timeouts(self):
+        """the CloseResults of the closes that didn't finish in time"""
+        return [x for x in self.results if x.timed_out]
+
+    #--------------------------------------------------------------------------
+    @property
+    def is_clean(self):
+        return not (self.failures or self.timeouts)
+
+    #--------------------------------------------------------------------------
+    def __str__(self):
+        lines = [
+            'closed %d resources in %.3fs, %d failed, %d timed out' % (
+                len(self.results),
+                self.duration,
+                len(self.failures),
+                len(self.timeouts)
+            )
+        ]
+        for a_result in sorted(
+            self.results,
+            key=lambda x: x.duration,
+            reverse=True
+        ):
+            if a_result.timed_out:
+                outcome = 'timed out'
+            elif a_result.error is not None:
+                outcome = 'failed: %s: %s' % (
+                    a_result.error.__class__.__name__,
+                    a_result.error
+                )
+            else:
+                outcome = 'ok'
+            lines.append('  %-30s %8.3fs %s' % (
+                a_result.key,
+                a_result.duration,
+                outcome
+            ))
+        return '\n'.join(lines)
+
+
+#------------------------------------------------------------------------------
+def _depends_on(dependencies, path):
+    """True if any of the dependencies, key tuples from the root of the
+    config, may refer to the resource at 'path' or to something within it.
+    Acquisition can find a key in an enclosing namespace, so the keys are
+    also compared by their last parts."""
+    for a_dependency in dependencies:
+        if (
+            a_dependency[:len(path)] == path
+            or path[:len(a_dependency)] == a_dependency
+            or (a_dependency and a_dependency[-1] == path[-1])
+        ):
+            return True
+    return False
+
+
+#------------------------------------------------------------------------------
+def close_order(resources):
+    """return the resources arranged in levels to be closed one level after
+    another.  A resource is closed before the resources that it depends on
+    and before the mapping that contains it.  The resources within a level
+    don't depend on one another.
+
+    parameters:
+        resources - a list of tuples of the path of a resource in the config,
+                    the resource and the key tuples that it depends on, in
+                    the order that the resources were created.  The
+                    dependencies are None if they are unknown, then the
+                    resource may depend on any resource created before it.
+    returns:
+        a list of lists of (path, resource) tuples"""
+    # the level of each resource is one more than the highest level of the
+    # resources that depend on it, so the last created are worked out first
+    levels_by_index = [0] * len(resources)
+    for index in xrange(len(resources) - 1, -1, -1):
+        path, a_resource, dependencies = resources[index]
+        for earlier_index in xrange(index):
+            earlier_path = resources[earlier_index][0]
+            if (
+                dependencies is None
+                or _depends_on(dependencies, earlier_path)
+                or path[:len(earlier_path)] == earlier_path
+            ):
+                levels_by_index[earlier_index] = max(
+                    levels_by_index[earlier_index],
+                    levels_by_index[index] + 1
+                )
+    levels = [[] for i in xrange(max(levels_by_index) + 1)] if resources \
+        else []
+    for (path, a_resource, dependencies), level in zip(
+        resources,
+        levels_by_index
+    ):
+        levels[level].append((path, a_resource))
+    return levels
+
+
+#------------------------------------------------------------------------------
+def _timed_close(a_resource):
+    """close the resource and return the seconds that it took and the
+    exception that it raised, if any"""
+    start = time.time()
+    try:
+        a_resource.close()
+    except Exception, x:
+        return time.time() - start, x
+    return time.time() - start, None
+
+
+#------------------------------------------------------------------------------
+def close_resources(levels, executor=None, timeout=None):
+    """close the resources level by level and return a ShutdownSummary.  A
+    failed close doesn't stop the others.
+
+    parameters:
+        levels - a list of lists of (path, resource) tuples from
+                 'close_order'
+        executor - an executor, like those from the module
+                   'concurrent.futures', in which the resources of a level
+                   are closed concurrently.  If None, they are closed one
+                   after another.
+        timeout - with an executor, the most seconds to wait for each
+                  resource to close, counted from the start of its close.
+                  A close that takes longer, or that isn't started that
+                  long after the closes before it in its level are over, is
+                  reported as timed out and left to the executor while the
+                  shutdown goes on.  If None, there is no limit."""
+    summary = ShutdownSummary()
+    start = time.time()
+    for a_level in levels:
+        if executor is None or (len(a_level) == 1 and timeout is None):
+            for path, a_resource in a_level:
+                duration, error = _timed_close(a_resource)
+                summary.results.append(
+                    CloseResult('.'.join(path), duration, error, False)
+                )
+            continue
+        # each close reports when it started and its outcome to a slot of
+        # its own, so the wait for it can be bounded without the futures
+        # supporting timeouts
+        slots = []
+        for path, a_resource in a_level:
+            began = threading.Event()
+            done = threading.Event()
+            started = []
+            outcome = []
+
+            def close_and_report(a_resource=a_resource, began=began,
+                                 done=done, started=started, outcome=outcome):
+                started.append(time.time())
+                began.set()
+                try:
+                    outcome.append(_timed_close(a_resource))
+                finally:
+                    done.set()
+            slots.append((path, began, done, started, outcome))
+            executor.submit(close_and_report)
+        for path, began, done, started, outcome in slots:
+            if timeout is None:
+                done.wait()
+            else:
+                # the timeout runs from the start of the close, not from its
+                # submission, as the executor may have fewer workers than
+                # there are closes.  The closes before this one are over or
+                # timed out by now, so it is given as long to start.
+                began.wait(timeout)
+                if started:
+                    done.wait(max(0.0, started[0] + timeout - time.time()))
+            if outcome:
+                duration, error = outcome[0]
+                timed_out = False
+            else:
+                duration = time.time() - started[0] if started else 0.0
+                error = None
+                timed_out = True
+            summary.results.append(
+                CloseResult('.'.join(path), duration, error, timed_out)
+            )
+    summary.duration = time.time() - start
+    return summary
@@ -0,0 +1,77 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""stand ins for the executors of 'concurrent.futures', which isn't part of
+Python 2.  They implement the part of the executor protocol that configman
+uses, 'submit' returning a future with a 'result' method.  They are shared
+by the tests and the benchmarks."""
+
+import Queue
+import threading
+
+
+#==============================================================================
+class ThreadFuture(object):
+    """the part of a concurrent.futures.Future that configman uses"""
+    def __init__(self):
+        self._done = threading.Event()
+        self._result = None
+        self._exception = None
+
+    def run(self, function, args, kwargs):
+        try:
+            self._result = function(*args, **kwargs)
+        except Exception, x:
+            self._exception = x
+        finally:
+            self._done.set()
+
+    def result(self):
+        self._done.wait()
+        if self._exception is not None:
+            raise self._exception
+        return self._result
+
+
+#==============================================================================
+class ThreadExecutor(object):
+    """an executor that runs each submitted function in its own thread.  The
+    functions submitted are kept in the list 'submitted'."""
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, function, *args, **kwargs):
+        self.submitted.append(function)
+        future = ThreadFuture()
+        a_thread = threading.Thread(
+            target=future.run,
+            args=(function, args, kwargs)
+        )
+        # a function left running, like a close that timed out, doesn't
+        # keep the process from ending
+        a_thread.daemon = True
+        a_thread.start()
+        return future
+
+
+#==============================================================================
+class WorkerPoolExecutor(object):
+    """an executor that runs the submitted functions in a fixed number of
+    worker threads, the rest wait in a queue"""
+    def __init__(self, workers):
+        self.queue = Queue.Queue()
+        for i in xrange(workers):
+            a_thread = threading.Thread(target=self._work)
+            a_thread.daemon = True
+            a_thread.start()
+
+    def _work(self):
+        while True:
+            future, function, args, kwargs = self.queue.get()
+            future.run(function, args, kwargs)
+
+    def submit(self, function, *args, **kwargs):
+        future = ThreadFuture()
+        self.queue.put((future, function, args, kwargs))
+        return future
@@ -5,15 +5,20 @@
 import sys
 import os
 import os.path
+import pickle
+import shutil
 import unittest
 from contextlib import contextmanager
 import io
 from cStringIO import StringIO
 import getopt
+import tempfile
+import warnings
 
 import mock
 
 import configman.config_manager as config_manager
+from configman.value_sources import for_mapping
 from configman.option import Option
 from configman.dotdict import (
     DotDict,
@@ -21,14 +26,20 @@ from configman.dotdict import (
     create_key_translating_dot_dict,
 )
 from configman import Namespace, RequiredConfig
+from configman import converters
+from configman.command_line import command_line
 from configman.converters import class_converter
 from configman.datetime_util import datetime_from_ISO_string
-from configman.config_exceptions import NotAnOptionError
+from configman.config_exceptions import (
+    NotAnOptionError,
+    CannotConvertError
+)
 from configman.value_sources.source_exceptions import (
     AllHandlersFailedException,
     UnknownFileExtensionException,
     NoHandlerForType
 )
+from configman.tests.executors import ThreadExecutor
 
 
 #==============================================================================
@@ -78,7 +89,6 @@ class BClass(RequiredConfig):
     )
 
 
-
 #==============================================================================
 class TestCase(unittest.TestCase):
 
@@ -1026,6 +1036,42 @@ c.string =   from ini
 
         self.assertRaises(AssertionError, c.config_assert, ({},))
 
+    #--------------------------------------------------------------------------
+    def test_RequiredConfig_get_required_config_is_cached(self):
+
+        class Alpha(config_manager.RequiredConfig):
+            required_config = Namespace()
+            required_config.add_option('a', default=None)
+
+        class Beta(Alpha):
+            required_config = Namespace()
+            required_config.add_option('b', default=2)
+
+        result = Beta.get_required_config()
+        self.assertEqual(sorted(result.keys()), ['a', 'b'])
+        self.assertTrue(Beta.get_required_config() is result)
+        self.assertTrue(Alpha.get_required_config() is not result)
+
+        # changes to the options are seen without invalidation
+        Alpha.required_config.a.set_default(17)
+        self.assertTrue(Beta.get_required_config() is result)
+        self.assertEqual(result.a.default, 17)
+
+        # adding a key to a class in the mro invalidates the cache
+        Alpha.required_config.add_option('c', default=3)
+        new_result = Beta.get_required_config()
+        self.assertTrue(new_result is not result)
+        self.assertEqual(sorted(new_result.keys()), ['a', 'b', 'c'])
+
+        # as does removing one
+        del Beta.required_config.b
+        self.assertEqual(sorted(Beta.get_required_config().keys()), ['a', 'c'])
+
+        # a caller changing the merged Namespace gets it invalidated
+        result = Beta.get_required_config()
+        result.add_option('x', default=0)
+        self.assertTrue('x' not in Beta.get_required_config())
+
     #--------------------------------------------------------------------------
     def test_app_name_from_app_obj(self):
         class MyApp(config_manager.RequiredConfig):
@@ -1202,6 +1248,7 @@ c.string =   from ini
         r = sorted(c._get_options())
         e = sorted([
             ('admin.expose_secrets', 'expose_secrets', False),
+            ('admin.explain', 'explain', ''),
             ('admin.print_conf', 'print_conf', None),
             ('admin.dump_conf', 'dump_conf', ''),
             ('admin.conf', 'conf', None),
@@ -2111,7 +2158,7 @@ c.string =   from ini
             self.assertTrue(
                 isinstance(cm.option_definitions[an_opt], Option)
             )
-        self.assertEqual(len(opts), 10)  # there must be exactly 10 options
+        self.assertEqual(len(opts), 11)  # there must be exactly 11 options
 
     #--------------------------------------------------------------------------
     @mock.patch('configman.config_manager.warnings')
@@ -2556,3 +2603,941 @@ c.string =   from ini
         self.assertTrue(config.option_definitions.robert.has_changed)
 
 
+
+    #--------------------------------------------------------------------------
+    def test_overlay_converts_in_batches(self):
+        int_list_converter = converters.str_to_typed_list(int)
+        batch_calls = []
+        original_batch = int_list_converter.batch
+
+        def counting_batch(input_strs):
+            batch_calls.append(list(input_strs))
+            return original_batch(input_strs)
+        int_list_converter.batch = counting_batch
+
+        n = config_manager.Namespace()
+        n.add_option(
+            'ports',
+            default='80',
+            from_string_converter=int_list_converter
+        )
+        n.add_option(
+            'other_ports',
+            default='8080, 8081',
+            from_string_converter=int_list_converter
+        )
+        n.add_option(
+            'bad_ports',
+            default='',
+            from_string_converter=int_list_converter
+        )
+        cm = config_manager.ConfigurationManager(
+            n,
+            [{'ports': '443, 444'}],
+            use_admin_controls=False,
+            use_auto_help=False,
+            argv_source=[]
+        )
+        self.assertEqual(len(batch_calls), 1)
+        self.assertEqual(
+            sorted(batch_calls[0]),
+            ['', '443, 444', '8080, 8081']
+        )
+        config = cm.get_config()
+        self.assertEqual(config.ports, [443, 444])
+        self.assertEqual(config.other_ports, [8080, 8081])
+        self.assertEqual(config.bad_ports, [])
+        self.assertTrue(cm.option_definitions.ports.has_changed)
+
+        # a failing batch falls back to individual conversion and reports
+        # the specific option that failed
+        self.assertRaises(
+            CannotConvertError,
+            config_manager.ConfigurationManager,
+            n,
+            [{'ports': '443, 444', 'bad_ports': 'x'}],
+            use_admin_controls=False,
+            use_auto_help=False,
+            argv_source=[]
+        )
+
+    #--------------------------------------------------------------------------
+    def test_overlay_leaves_definition_source_unchanged(self):
+        n = config_manager.Namespace()
+        n.add_option('a', default=1)
+        n.add_option('b', default='17', from_string_converter=int)
+        n.add_option('c', default=3)
+
+        cm = config_manager.ConfigurationManager(
+            n,
+            [{'a': '2'}],
+            use_admin_controls=False,
+            use_auto_help=False,
+            argv_source=[]
+        )
+        self.assertEqual(cm.option_definitions.a.value, 2)
+        self.assertEqual(cm.option_definitions.b.value, 17)
+        self.assertEqual(n.a.default, 1)
+        self.assertEqual(n.a.value, 1)
+        self.assertEqual(n.b.value, '17')
+        self.assertTrue(cm.option_definitions.c is not n.c)
+        self.assertTrue(cm.option_definitions.a is not n.a)
+
+    #--------------------------------------------------------------------------
+    def test_managers_from_the_same_required_config_are_independent(self):
+        class Component(RequiredConfig):
+            required_config = Namespace()
+            required_config.add_option('x', default=1)
+
+        cm1 = config_manager.ConfigurationManager(
+            Component.required_config,
+            values_source_list=[],
+            use_admin_controls=False,
+            use_auto_help=False,
+            argv_source=[]
+        )
+        cm1.option_definitions.x.set_default(77, force=True)
+        self.assertEqual(cm1.option_definitions.x.default, 77)
+        self.assertEqual(Component.required_config.x.default, 1)
+
+        cm2 = config_manager.ConfigurationManager(
+            Component.required_config,
+            values_source_list=[],
+            use_admin_controls=False,
+            use_auto_help=False,
+            argv_source=[]
+        )
+        self.assertEqual(cm2.option_definitions.x.default, 1)
+        self.assertEqual(cm2.get_config().x, 1)
+
+    #--------------------------------------------------------------------------
+    def test_update_published_config(self):
+        n = config_manager.Namespace()
+        n.add_option('a', default=1)
+        n.namespace('sub', doc='a sub namespace')
+        n.sub.add_option('b', default='x')
+        n.add_aggregation(
+            'total',
+            lambda config, local_config, args: config.a * 10
+        )
+        cm = config_manager.ConfigurationManager(
+            n,
+            [],
+            use_admin_controls=False,
+            use_auto_help=False,
+            argv_source=[]
+        )
+        first = cm.published_config
+        self.assertTrue(first is cm.published_config)
+        self.assertEqual(first.a, 1)
+        self.assertEqual(first.total, 10)
+        first_definitions = cm.option_definitions
+
+        second = cm.update_published_config({'a': '2', 'sub.b': 'y'})
+        self.assertTrue(second is cm.published_config)
+        self.assertEqual(second.a, 2)
+        self.assertEqual(second.sub.b, 'y')
+        self.assertEqual(second.total, 20)
+        # the earlier generation is untouched
+        self.assertEqual(first.a, 1)
+        self.assertEqual(first.sub.b, 'x')
+        self.assertEqual(first.total, 10)
+        self.assertEqual(first_definitions.a.value, 1)
+        self.assertEqual(cm.get_config().a, 2)
+
+        self.assertRaises(
+            NotAnOptionError,
+            cm.update_published_config,
+            {'nope': 1}
+        )
+        self.assertTrue(cm.published_config is second)
+
+        third = cm.publish_config()
+        self.assertTrue(third is not second)
+        self.assertEqual(third.a, 2)
+
+    #--------------------------------------------------------------------------
+    def test_value_sources_loaded_in_executor(self):
+        n = config_manager.Namespace()
+        n.add_option('a', default=1)
+        n.add_option('b', default=2)
+        executor = ThreadExecutor()
+        cm = config_manager.ConfigurationManager(
+            n,
+            [{'a': 10, 'b': 20}, {'b': 200}],
+            use_admin_controls=False,
+            use_auto_help=False,
+            argv_source=[],
+            value_source_executor=executor
+        )
+        self.assertEqual(len(executor.submitted), 2)
+        # the later source still wins
+        config = cm.get_config()
+        self.assertEqual(config.a, 10)
+        self.assertEqual(config.b, 200)
+
+        executor = ThreadExecutor()
+        self.assertRaises(
+            NoHandlerForType,
+            config_manager.ConfigurationManager,
+            n,
+            [{'a': 10}, 17],
+            use_admin_controls=False,
+            use_auto_help=False,
+            argv_source=[],
+            value_source_executor=executor
+        )
+
+    #--------------------------------------------------------------------------
+    def test_create_in_executor(self):
+        n = config_manager.Namespace()
+        n.add_option('a', default=1)
+        executor = ThreadExecutor()
+        a_future = config_manager.ConfigurationManager.create(
+            executor,
+            n,
+            [{'a': '3'}],
+            use_admin_controls=False,
+            use_auto_help=False,
+            argv_source=[]
+        )
+        self.assertEqual(
+            executor.submitted,
+            [config_manager.ConfigurationManager]
+        )
+        cm = a_future.result()
+        self.assertEqual(cm.get_config().a, 3)
+
+    #--------------------------------------------------------------------------
+    def test_compiled_definitions(self):
+        n = config_manager.Namespace()
+        n.add_option('a', default='1', from_string_converter=int)
+        n.namespace('sub', doc='the sub namespace')
+        n.sub.add_option('b', default='x')
+        n.sub.add_option('c', default='2', from_string_converter=int)
+        n.add_option(
+            'cls',
+            default='configman.tests.test_config_manager.T3',
+            from_string_converter=class_converter
+        )
+        compiled = config_manager.CompiledDefinitions(n)
+        self.assertEqual(compiled.option_definitions.a.value, 1)
+        self.assertTrue(
+            compiled.options_by_key['sub.c']
+            is compiled.option_definitions.sub.c
+        )
+
+        def tenant(values):
+            return config_manager.ConfigurationManager(
+                compiled,
+                [values],
+                use_admin_controls=True,
+                use_auto_help=False,
+                argv_source=[]
+            )
+        cm1 = tenant({'a': '10', 'sub.b': 'y'})
+        cm2 = tenant({'sub.c': '20', 'a': 17})
+        config1 = cm1.get_config()
+        config2 = cm2.get_config()
+        self.assertEqual(config1.a, 10)
+        self.assertEqual(config1.sub.b, 'y')
+        self.assertEqual(config1.sub.c, 2)
+        self.assertEqual(config2.a, 17)
+        self.assertEqual(config2.sub.b, 'x')
+        self.assertEqual(config2.sub.c, 20)
+        # the class was expanded for each tenant
+        self.assertEqual(config1.cls, T3)
+        self.assertEqual(config1.ccc.x, 99)
+        self.assertEqual(config2.ccc.x, 99)
+        self.assertTrue('admin' in config2)
+        # the compiled Options are copied and left untouched
+        self.assertTrue(
+            cm1.option_definitions.sub.c
+            is not compiled.option_definitions.sub.c
+        )
+        self.assertTrue(
+            cm1.option_definitions.a is not compiled.option_definitions.a
+        )
+        self.assertEqual(compiled.option_definitions.a.value, 1)
+        self.assertEqual(compiled.option_definitions.sub.b.value, 'x')
+
+        # the same as without compiling
+        cm3 = config_manager.ConfigurationManager(
+            n,
+            [{'a': '10', 'sub.b': 'y'}],
+            use_admin_controls=True,
+            use_auto_help=False,
+            argv_source=[]
+        )
+        self.assertEqual(cm3.get_config(), config1)
+
+    #--------------------------------------------------------------------------
+    def test_compiled_definitions_with_equal_values(self):
+        conversions = []
+
+        def counting_int(a_string):
+            conversions.append(a_string)
+            return int(a_string)
+
+        n = config_manager.Namespace()
+        n.add_option('a', default='10', from_string_converter=counting_int)
+        n.add_option('b', default='2', from_string_converter=counting_int)
+        compiled = config_manager.CompiledDefinitions(n)
+        del conversions[:]
+        # a value source giving a default again, as an equal string built
+        # anew, leaves the Option compiled
+        cm = config_manager.ConfigurationManager(
+            compiled,
+            [{'a': ''.join(['1', '0']), 'b': '3'}],
+            use_admin_controls=False,
+            use_auto_help=False,
+            argv_source=[]
+        )
+        self.assertEqual(conversions, ['3'])
+        config = cm.get_config()
+        self.assertEqual(config.a, 10)
+        self.assertEqual(config.b, 3)
+        self.assertTrue(config_manager._same_value('10', ''.join(['1', '0'])))
+        self.assertFalse(config_manager._same_value(1, True))
+
+    #--------------------------------------------------------------------------
+    def test_explain(self):
+        n = config_manager.Namespace()
+        n.add_option('a', default=1)
+        n.add_option('b', default=2)
+        n.add_option('c', default=3)
+        n.add_option('password', default='fred', secret=True)
+        n.namespace('sub')
+        n.sub.add_option('d', default='x')
+        conf_pathname = os.path.join(tempfile.gettempdir(), 'explain.conf')
+        with open(conf_pathname, 'w') as f:
+            f.write('# comment\nb=20\nsub.d=y\npassword=wilma\n')
+        try:
+            cm = config_manager.ConfigurationManager(
+                n,
+                [conf_pathname, {'c': 30}, {'b': '200'}],
+                use_admin_controls=True,
+                use_auto_help=False,
+                argv_source=[]
+            )
+            self.assertEqual(cm.explain('a'), {
+                'key': 'a',
+                'value': '1',
+                'source': 'default',
+                'source_index': None,
+                'line': None,
+                'raw_value': None,
+            })
+            # the last source wins
+            explanation = cm.explain('b')
+            self.assertEqual(explanation['value'], '200')
+            self.assertEqual(explanation['source'], 'mapping')
+            self.assertEqual(explanation['source_index'], 2)
+            self.assertEqual(explanation['raw_value'], '200')
+            self.assertEqual(cm.explain('c')['raw_value'], '30')
+            explanation = cm.explain('sub.d')
+            self.assertEqual(explanation['source'], conf_pathname)
+            self.assertEqual(explanation['line'], 3)
+            self.assertEqual(explanation['raw_value'], 'y')
+            explanation = cm.explain('password')
+            self.assertEqual(explanation['value'], '*' * 16)
+            self.assertEqual(explanation['raw_value'], '*' * 16)
+            self.assertRaises(NotAnOptionError, cm.explain, 'nope')
+            self.assertRaises(NotAnOptionError, cm.explain, 'sub')
+
+            explanations = cm.explain_all()
+            self.assertEqual(explanations['sub.d'], cm.explain('sub.d'))
+            self.assertTrue('admin.strict' in explanations)
+
+            s = StringIO()
+            cm.print_explanation('sub.d', output_stream=s)
+            self.assertEqual(
+                s.getvalue(),
+                'sub.d=y\n'
+                '    from %s line 3 (value source 0)\n'
+                '    given as y\n' % conf_pathname
+            )
+
+            s = StringIO()
+            with mock.patch('configman.config_manager.sys.stdout', s):
+                self.assertRaises(
+                    SystemExit,
+                    config_manager.ConfigurationManager,
+                    n,
+                    [conf_pathname, command_line],
+                    use_admin_controls=True,
+                    use_auto_help=False,
+                    argv_source=['--admin.explain=b']
+                )
+            self.assertEqual(
+                s.getvalue(),
+                'b=20\n'
+                '    from %s line 2 (value source 0)\n'
+                '    given as 20\n' % conf_pathname
+            )
+        finally:
+            os.remove(conf_pathname)
+
+    #--------------------------------------------------------------------------
+    def test_output_summary_cache(self):
+        cache_directory = tempfile.mkdtemp()
+        cache_pathname = os.path.join(cache_directory, 'help.cache')
+
+        def make_manager(default):
+            n = config_manager.Namespace()
+            n.add_option('a', default=default, doc='the a', short_form='A')
+            n.add_option('password', default='fred')
+            return config_manager.ConfigurationManager(
+                n,
+                [],
+                use_admin_controls=True,
+                use_auto_help=False,
+                argv_source=[],
+                app_name='cached',
+                help_cache_pathname=cache_pathname
+            )
+        try:
+            cm = make_manager(1)
+            s = StringIO()
+            cm.output_summary(output_stream=s)
+            first_output = s.getvalue()
+            self.assertTrue('(default: 1)' in first_output)
+            self.assertTrue('(default: *********)' in first_output)
+            self.assertTrue(os.path.isfile(cache_pathname))
+
+            # a new manager with the same definitions and values serves the
+            # help from the cache on disk
+            # without making the rows
+            cm = make_manager(1)
+            with mock.patch.object(
+                config_manager.ConfigurationManager,
+                '_help_rows',
+                side_effect=AssertionError('not from the cache')
+            ):
+                s = StringIO()
+                cm.output_summary(output_stream=s)
+                self.assertEqual(s.getvalue(), first_output)
+
+            # a changed value makes the cache stale
+            cm = make_manager(2)
+            s = StringIO()
+            cm.output_summary(output_stream=s)
+            self.assertTrue('(default: 2)' in s.getvalue())
+            s = StringIO()
+            with mock.patch.object(
+                config_manager.ConfigurationManager,
+                '_render_help',
+                side_effect=AssertionError('not from the cache')
+            ):
+                # the second time comes from memory
+                cm.output_summary(output_stream=s)
+            self.assertTrue('(default: 2)' in s.getvalue())
+        finally:
+            shutil.rmtree(cache_directory)
+
+    #--------------------------------------------------------------------------
+    def test_stable_form_of_classes_made_at_run_time(self):
+        stable_form = config_manager._stable_form
+        self.assertEqual(
+            stable_form(T3),
+            'configman.tests.test_config_manager.T3'
+        )
+        to_classes = converters.str_to_classes_in_namespaces()
+        t3_proxy = to_classes('configman.tests.test_config_manager.T3')
+        other_proxy = to_classes('configman.tests.test_config_manager.T2')
+        self.assertNotEqual(stable_form(t3_proxy), stable_form(other_proxy))
+        self.assertEqual(
+            stable_form(t3_proxy),
+            stable_form(to_classes('configman.tests.test_config_manager.T3'))
+        )
+
+        # without a 'to_str', the keys of the requirements tell them apart
+        def make_class(key):
+            class Local(RequiredConfig):
+                required_config = Namespace()
+                required_config.add_option(key)
+            return Local
+        self.assertNotEqual(
+            stable_form(make_class('x')),
+            stable_form(make_class('y'))
+        )
+
+    #--------------------------------------------------------------------------
+    def test_overlay_asks_each_value_source_once_per_pass(self):
+        n = Namespace()
+        for i in range(20):
+            n.add_option('option_%d' % i, default=i)
+        n.namespace('db')
+        n.db.add_option('host', default='localhost')
+        n.db.add_option('port', default=5432)
+
+        get_values = for_mapping.ValueSource.get_values
+        with mock.patch.object(
+            for_mapping.ValueSource,
+            'get_values',
+            autospec=True,
+            side_effect=get_values
+        ) as mocked_get_values:
+            cm = config_manager.ConfigurationManager(
+                [n],
+                values_source_list=[
+                    {'option_3': '33', 'port': '6543'},
+                    {'option_3': '333', 'db': {'host': 'db1'}},
+                ],
+                argv_source=[],
+                use_auto_help=False,
+                use_admin_controls=False,
+                value_source_object_hook=DotDictWithAcquisition,
+            )
+        config = cm.get_config()
+        # the later value source wins
+        self.assertEqual(config.option_3, 333)
+        # 'port' is acquired by 'db.port'
+        self.assertEqual(config.db.port, 6543)
+        self.assertEqual(config.db.host, 'db1')
+        self.assertEqual(config.option_4, 4)
+        # each of the two value sources is asked once for the overlay and
+        # once for the mismatch check
+        self.assertEqual(mocked_get_values.call_count, 4)
+
+    #--------------------------------------------------------------------------
+    def test_overlay_with_key_translating_value_source_mapping(self):
+        n = Namespace()
+        n.namespace('db')
+        n.db.add_option('host', default='localhost')
+        translating_dot_dict = create_key_translating_dot_dict(
+            'TranslatingDotDict',
+            (('-', '.'),)
+        )
+        cm = config_manager.ConfigurationManager(
+            [n],
+            values_source_list=[{'db': {'host': 'db1'}}],
+            argv_source=[],
+            use_auto_help=False,
+            use_admin_controls=False,
+            value_source_object_hook=translating_dot_dict,
+        )
+        self.assertEqual(cm.get_config().db.host, 'db1')
+        self.assertEqual(
+            config_manager.ConfigurationManager._find_value_source_hits(
+                translating_dot_dict({'db': {'host': 'db2'}}),
+                ['db-host', 'db.port']
+            ),
+            {'db-host': 'db2'}
+        )
+
+    #--------------------------------------------------------------------------
+    def test_reference_value_graph_levels(self):
+        graph = config_manager.ReferenceValueGraph()
+        graph.add_link('app.host', 'resource.postgresql.host')
+        graph.add_link('report.host', 'resource.postgresql.host')
+        graph.add_link('resource.postgresql.host', 'common.host')
+        self.assertEqual(
+            graph.levels(['x', 'common.host']),
+            [
+                ['x', 'common.host'],
+                ['resource.postgresql.host'],
+                ['app.host', 'report.host'],
+            ]
+        )
+        self.assertEqual(
+            graph.levels(['report.host', 'y']),
+            [['y'], ['report.host']]
+        )
+        self.assertEqual(
+            graph.new_namespaces('resource.postgresql.host'),
+            ['resource.postgresql', 'resource']
+        )
+        self.assertEqual(graph.new_namespaces('resource.postgresql.port'), [])
+        self.assertEqual(
+            graph.new_namespaces('resource.rabbitmq.host'),
+            ['resource.rabbitmq']
+        )
+
+    #--------------------------------------------------------------------------
+    def test_shared_resource_references(self):
+        n = Namespace()
+        for i in range(200):
+            n.namespace('app_%d' % i)
+            n['app_%d' % i].add_option(
+                'host',
+                default='localhost',
+                reference_value_from='resource.postgresql'
+            )
+            n['app_%d' % i].add_option(
+                'port',
+                default=5432,
+                reference_value_from='resource.postgresql'
+            )
+        cm = config_manager.ConfigurationManager(
+            [n],
+            values_source_list=[
+                {'resource.postgresql.host': 'db1'},
+                {'app_7.host': 'db7'},
+            ],
+            argv_source=[],
+        )
+        config = cm.get_config()
+        self.assertEqual(config.resource.postgresql.host, 'db1')
+        self.assertEqual(config.app_0.host, 'db1')
+        self.assertEqual(config.app_199.host, 'db1')
+        self.assertEqual(config.app_7.host, 'db7')
+        self.assertEqual(config.app_3.port, 5432)
+        self.assertTrue(
+            cm.option_definitions.resource._reference_value_from
+        )
+        self.assertTrue(
+            cm.option_definitions.resource.postgresql._reference_value_from
+        )
+        self.assertEqual(cm.explain('app_0.host')['source'], 'mapping')
+
+    #--------------------------------------------------------------------------
+    def test_reference_to_an_existing_option(self):
+        n = Namespace()
+        n.namespace('common')
+        n.common.add_option('host', default='localhost')
+        n.namespace('app')
+        n.app.add_option(
+            'host',
+            default='nowhere',
+            reference_value_from='common'
+        )
+        cm = config_manager.ConfigurationManager(
+            [n],
+            values_source_list=[{'common.host': 'db1'}],
+            argv_source=[],
+        )
+        self.assertEqual(cm.get_config().app.host, 'db1')
+
+    #--------------------------------------------------------------------------
+    def test_get_config_is_cached(self):
+        calls = []
+
+        def count_calls(all_options, local_namespace, args):
+            calls.append(1)
+            return all_options.a * 2
+
+        def add_one(all_options, local_namespace, args):
+            return all_options.doubled + 1
+
+        n = Namespace()
+        n.add_option('a', default=1)
+        n.add_aggregation('doubled', count_calls)
+        n.add_aggregation('doubled_plus_one', add_one)
+        cm = config_manager.ConfigurationManager(
+            [n],
+            values_source_list=[],
+            argv_source=[],
+            cache_config=True,
+        )
+        config = cm.get_config()
+        # the aggregations are evaluated once, each sees the ones before it
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(config.doubled, 2)
+        self.assertEqual(config.doubled_plus_one, 3)
+        self.assertTrue(cm.get_config() is config)
+        self.assertEqual(len(calls), 1)
+
+        # a config of another mapping class is cached separately
+        dot_dict_config = cm.get_config(mapping_class=DotDict)
+        self.assertTrue(type(dot_dict_config) is DotDict)
+        self.assertTrue(cm.get_config(mapping_class=DotDict)
+                        is dot_dict_config)
+
+        # changing an option makes a new config
+        cm.option_definitions.set_value('a', 5)
+        new_config = cm.get_config()
+        self.assertFalse(new_config is config)
+        self.assertEqual(new_config.a, 5)
+        self.assertEqual(new_config.doubled, 10)
+        self.assertEqual(new_config.doubled_plus_one, 11)
+        self.assertEqual(config.a, 1)
+
+        # as does adding one
+        cm.option_definitions.add_option('b', default=2)
+        self.assertEqual(cm.get_config().b, 2)
+
+        # a context has a config of its own
+        with cm.context() as context_config:
+            self.assertFalse(context_config is cm.get_config())
+
+        # assigning to the attributes of an Option makes a new config too
+        config = cm.get_config()
+        cm.option_definitions.a.value = 7
+        self.assertEqual(cm.get_config().a, 7)
+        config = cm.get_config()
+        cm.option_definitions.a.value = 7.0
+        self.assertEqual(type(cm.get_config().a), float)
+
+        # changes to the definitions of another manager don't
+        config = cm.get_config()
+        another_cm = config_manager.ConfigurationManager(
+            [n],
+            values_source_list=[],
+            argv_source=[],
+            cache_config=True,
+        )
+        another_cm.option_definitions.set_value('a', 3)
+        self.assertTrue(cm.get_config() is config)
+
+    #--------------------------------------------------------------------------
+    def test_get_config_is_not_cached_by_default(self):
+        n = Namespace()
+        n.add_option('a', default=1)
+        cm = config_manager.ConfigurationManager(
+            [n],
+            values_source_list=[],
+            argv_source=[],
+        )
+        config = cm.get_config()
+        config.a = 2
+        self.assertFalse(cm.get_config() is config)
+        self.assertEqual(cm.get_config().a, 1)
+
+    #--------------------------------------------------------------------------
+    def test_aggregations_with_dependencies(self):
+        calls = []
+
+        def dsn(all_options, local_namespace, args):
+            calls.append('dsn')
+            return '%s:%s' % (local_namespace.host, local_namespace.port)
+
+        def label(all_options, local_namespace, args):
+            calls.append('label')
+            return '%s@%s' % (all_options.app_name, all_options.db.dsn)
+
+        def everything(all_options, local_namespace, args):
+            calls.append('everything')
+            return len(all_options.db)
+
+        n = Namespace()
+        n.add_option('app_name', default='app')
+        n.add_option('unrelated', default=1)
+        n.namespace('db')
+        n.db.add_option('host', default='localhost')
+        n.db.add_option('port', default=5432)
+        n.db.add_aggregation('dsn', dsn, depends_on=['host', 'port'])
+        n.add_aggregation(
+            'label',
+            label,
+            depends_on=config_manager.DISCOVER_DEPENDENCIES
+        )
+        n.add_aggregation(
+            'everything',
+            everything,
+            depends_on=config_manager.DISCOVER_DEPENDENCIES
+        )
+        cm = config_manager.ConfigurationManager(
+            [n],
+            values_source_list=[],
+            argv_source=[],
+        )
+        config = cm.get_config()
+        self.assertEqual(config.db.dsn, 'localhost:5432')
+        self.assertEqual(config.label, 'app@localhost:5432')
+        self.assertEqual(config.everything, 3)
+        self.assertEqual(calls, ['dsn', 'label', 'everything'])
+
+        # a change that none of them depend on
+        del calls[:]
+        cm.option_definitions.set_value('unrelated', 2)
+        config = cm.get_config()
+        self.assertEqual(config.unrelated, 2)
+        self.assertEqual(config.label, 'app@localhost:5432')
+        self.assertEqual(calls, [])
+
+        # a change to the dependencies of 'dsn' changes 'label' in turn, and
+        # 'everything' depends on the whole of 'db'
+        del calls[:]
+        cm.option_definitions.set_value('db.host', 'db1')
+        config = cm.get_config()
+        self.assertEqual(config.db.dsn, 'db1:5432')
+        self.assertEqual(config.label, 'app@db1:5432')
+        self.assertEqual(calls, ['dsn', 'label', 'everything'])
+
+        # a reload with a new value reevaluates only what depends on it
+        del calls[:]
+        config = cm.update_published_config({'app_name': 'other'})
+        self.assertEqual(config.label, 'other@db1:5432')
+        self.assertEqual(config.db.dsn, 'db1:5432')
+        self.assertEqual(calls, ['label'])
+
+        # a context evaluates them all for itself
+        del calls[:]
+        with cm.context():
+            self.assertEqual(sorted(calls), ['dsn', 'everything', 'label'])
+
+    #--------------------------------------------------------------------------
+    def test_get_config_after_a_context_does_not_reuse_closed_values(self):
+        class Resource(object):
+            def __init__(self):
+                self.closed = False
+
+            def close(self):
+                self.closed = True
+
+        n = Namespace()
+        n.add_option('x', default=1)
+        n.add_aggregation(
+            'pool',
+            lambda all_options, local_namespace, args: Resource(),
+            depends_on=['x']
+        )
+        cm = config_manager.ConfigurationManager(
+            [n],
+            values_source_list=[],
+            argv_source=[],
+        )
+        with cm.context() as config:
+            pool_of_the_context = config.pool
+        self.assertTrue(pool_of_the_context.closed)
+        config = cm.get_config()
+        self.assertTrue(config.pool is not pool_of_the_context)
+        self.assertFalse(config.pool.closed)
+
+        # nor does a context replace the value that get_config reuses
+        with cm.context():
+            pass
+        cm.option_definitions.set_value('x', 1)
+        self.assertFalse(cm.get_config().pool.closed)
+
+    #--------------------------------------------------------------------------
+    def test_aggregations_in_an_executor(self):
+        def make_aggregation(name):
+            def an_aggregation(all_options, local_namespace, args):
+                return '%s %s' % (name, all_options.x)
+            return an_aggregation
+
+        n = Namespace()
+        n.add_option('x', default=1)
+        for name in ('a', 'b', 'c'):
+            n.add_aggregation(
+                name,
+                make_aggregation(name),
+                depends_on=['x']
+            )
+        n.add_aggregation(
+            'd',
+            lambda all_options, local_namespace, args: all_options.c * 2,
+            depends_on=['c']
+        )
+        executor = ThreadExecutor()
+        cm = config_manager.ConfigurationManager(
+            [n],
+            values_source_list=[],
+            argv_source=[],
+            aggregation_executor=executor,
+        )
+        config = cm.get_config()
+        self.assertEqual(config.a, 'a 1')
+        self.assertEqual(config.c, 'c 1')
+        self.assertEqual(config.d, 'c 1c 1')
+        # 'a', 'b' and 'c' are independent, 'd' depends on 'c'
+        self.assertEqual(len(executor.submitted), 3)
+
+        cm.option_definitions.set_value('x', 2)
+        config = cm.get_config()
+        self.assertEqual(config.b, 'b 2')
+        self.assertEqual(config.d, 'c 2c 2')
+        self.assertEqual(len(executor.submitted), 6)
+
+    #--------------------------------------------------------------------------
+    def test_context_closes_in_reverse_dependency_order(self):
+        closed = []
+
+        class Resource(object):
+            def __init__(self, name, error=None):
+                self.name = name
+                self.error = error
+
+            def close(self):
+                closed.append(self.name)
+                if self.error is not None:
+                    raise self.error
+
+        def make_resource(name, error=None):
+            def an_aggregation(all_options, local_namespace, args):
+                return Resource(name, error)
+            return an_aggregation
+
+        n = Namespace()
+        n.add_option('plain', default=Resource('plain'))
+        n.add_aggregation('pool', make_resource('pool'), depends_on=[])
+        n.add_aggregation(
+            'cache',
+            make_resource('cache', ValueError('broken')),
+            depends_on=[]
+        )
+        n.add_aggregation('app', make_resource('app'), depends_on=['pool'])
+        n.add_aggregation('last', make_resource('last'))
+        executor = ThreadExecutor()
+        cm = config_manager.ConfigurationManager(
+            [n],
+            values_source_list=[],
+            argv_source=[],
+            close_executor=executor,
+            close_timeout=5.0,
+        )
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            try:
+                with cm.context() as config:
+                    self.assertEqual(config.app.name, 'app')
+            except ValueError, x:
+                self.assertEqual(str(x), 'broken')
+            else:
+                self.fail('the failed close was not raised')
+        # 'last' may depend on anything, 'app' depends on 'pool' and the
+        # failure of 'cache' doesn't stop the rest
+        self.assertEqual(closed[0], 'last')
+        self.assertEqual(sorted(closed[1:4]), ['app', 'cache', 'plain'])
+        self.assertEqual(closed[4], 'pool')
+        summary = cm.shutdown_summary
+        self.assertEqual([x.key for x in summary.failures], ['cache'])
+        self.assertEqual(len(summary.results), 5)
+        self.assertEqual(len(caught), 1)
+        self.assertTrue('1 failed' in str(caught[0].message))
+        # each close had a timeout, so each went to the executor
+        self.assertEqual(len(executor.submitted), 5)
+
+        # an exception from within the context is not hidden by a close
+        del closed[:]
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore')
+                with cm.context():
+                    raise KeyError('within')
+        except KeyError, x:
+            self.assertEqual(x.args, ('within',))
+        self.assertEqual(len(closed), 5)
+
+    #--------------------------------------------------------------------------
+    def test_pickled_config(self):
+        n = Namespace()
+        n.add_option('user', default='fred')
+        n.add_option(
+            'cls',
+            default='configman.tests.test_config_manager.T1',
+            from_string_converter=class_converter
+        )
+        n.namespace('db')
+        n.db.add_option('port', default=5432)
+        n.db.add_aggregation(
+            'dsn',
+            lambda config, local_config, args: '%s@%s' % (
+                local_config.user,
+                local_config.port
+            )
+        )
+        cm = config_manager.ConfigurationManager(
+            [n],
+            values_source_list=[{'db': {'port': '6543'}}],
+            argv_source=[],
+        )
+        config = cm.get_config()
+        config2 = pickle.loads(pickle.dumps(config, pickle.HIGHEST_PROTOCOL))
+        self.assertEqual(config2, config)
+        self.assertTrue(config2.cls is T1)
+        self.assertEqual(config2.db.dsn, 'fred@6543')
+        # acquisition finds the keys of the enclosing namespaces
+        self.assertEqual(config2.db.user, 'fred')
@@ -6,6 +6,9 @@
 import unittest
 import tempfile
 import datetime
+import array
+import collections
+import json
 
 from configman import converters
 from configman import RequiredConfig, Namespace, ConfigurationManager
@@ -279,6 +282,90 @@ class TestCase(unittest.TestCase):
                            config[x].kls)
             )
 
+    #--------------------------------------------------------------------------
+    def test_classes_in_namespaces_converter_is_cached(self):
+        converter_fn = converters.classes_in_namespaces_converter('HH%d')
+        with converters.reusing_class_list_proxies():
+            result = converter_fn(
+                'configman.tests.test_converters.Foo,'
+                'configman.tests.test_converters.Bar'
+            )
+            # whitespace differences don't matter, nor does the converter
+            # instance as long as its parameters are the same
+            self.assertTrue(
+                converters.classes_in_namespaces_converter('HH%d')(
+                    ' configman.tests.test_converters.Foo, '
+                    'configman.tests.test_converters.Bar '
+                ) is result
+            )
+            # any difference in the parameters or class list is a new class
+            self.assertTrue(
+                converters.classes_in_namespaces_converter('HH%d', 'kls')(
+                    'configman.tests.test_converters.Foo,'
+                    'configman.tests.test_converters.Bar'
+                ) is not result
+            )
+            self.assertTrue(
+                converters.classes_in_namespaces_converter(
+                    'HH%d',
+                    instantiate_classes=True
+                )(
+                    'configman.tests.test_converters.Foo,'
+                    'configman.tests.test_converters.Bar'
+                ) is not result
+            )
+            self.assertTrue(
+                converter_fn('configman.tests.test_converters.Foo')
+                is not result
+            )
+            # a nested block shares the proxies of the outer one
+            with converters.reusing_class_list_proxies():
+                self.assertTrue(
+                    converter_fn(
+                        'configman.tests.test_converters.Foo,'
+                        'configman.tests.test_converters.Bar'
+                    ) is result
+                )
+        # outside of the block, every conversion makes a new class with its
+        # own requirements
+        another_result = converter_fn(
+            'configman.tests.test_converters.Foo,'
+            'configman.tests.test_converters.Bar'
+        )
+        self.assertTrue(another_result is not result)
+        another_result.required_config.HH0.cls.default = 'changed'
+        self.assertEqual(
+            result.required_config.HH0.cls.default,
+            'configman.tests.test_converters.Foo'
+        )
+
+    #--------------------------------------------------------------------------
+    def test_class_list_proxies_are_not_shared_by_managers(self):
+        n = Namespace()
+        n.add_option(
+            'kls_list',
+            default='configman.tests.test_converters.Foo',
+            from_string_converter=converters.classes_in_namespaces_converter(
+                'kls%d'
+            )
+        )
+
+        def manager():
+            return ConfigurationManager(
+                n,
+                values_source_list=[],
+                argv_source=[],
+                use_admin_controls=False,
+                use_auto_help=False
+            )
+        cm1 = manager()
+        cm2 = manager()
+        self.assertTrue(
+            cm1.option_definitions.kls_list.value
+            is not cm2.option_definitions.kls_list.value
+        )
+        self.assertEqual(cm1.get_config().kls0.cls, Foo)
+
     #--------------------------------------------------------------------------
     def test_to_str_to_regular_expression(self):
         import re
@@ -309,6 +396,51 @@ class TestCase(unittest.TestCase):
             [u'P\xefter', u'L\xa3rs']
         )
     #--------------------------------------------------------------------------
+    def test_str_to_typed_list(self):
+        function = converters.str_to_typed_list(int)
+        self.assertEqual(function(''), [])
+        self.assertEqual(function('1, 2,3 '), [1, 2, 3])
+        self.assertEqual(function('"8080, 8081"'), [8080, 8081])
+        self.assertRaises(ValueError, function, '1, two')
+
+        function = converters.str_to_typed_list(float, item_separator=':')
+        self.assertEqual(function('1.5:2'), [1.5, 2.0])
+
+        function = converters.str_to_typed_list(int, as_array=True)
+        result = function('1, 2, 3')
+        self.assertTrue(isinstance(result, array.array))
+        self.assertEqual(result.typecode, 'l')
+        self.assertEqual(list(result), [1, 2, 3])
+        self.assertEqual(converters.to_str(result), '1, 2, 3')
+
+        self.assertRaises(
+            converters.CannotConvertError,
+            converters.str_to_typed_list,
+            str,
+            as_array=True
+        )
+
+    #--------------------------------------------------------------------------
+    def test_batch_convert(self):
+        function = converters.str_to_typed_list(int)
+        self.assertEqual(
+            converters.batch_convert(function, ['1, 2', '', '3']),
+            [[1, 2], [], [3]]
+        )
+        function = converters.str_to_typed_list(int, as_array=True)
+        results = converters.batch_convert(function, ['1, 2', '3'])
+        self.assertEqual([list(x) for x in results], [[1, 2], [3]])
+        self.assertEqual(
+            converters.batch_convert(converters.list_converter, ['a, b', 'c']),
+            [['a', 'b'], ['c']]
+        )
+        # converters without a batch entry point are applied one at a time
+        self.assertEqual(
+            converters.batch_convert(int, ['1', '2']),
+            [1, 2]
+        )
+
+    #--------------------------------------------------------------------------
     def test_to_str(self):
         to_str = converters.to_str
         self.assertEqual(to_str(int), 'int')
@@ -490,3 +622,125 @@ class TestCase(unittest.TestCase):
         import re
         r = re.compile('.*')
         self.assertEqual(converters.to_str(r), '.*')
+
+    #--------------------------------------------------------------------------
+    def test_converter_registry_mro_resolution(self):
+        class MyDict(dict):
+            pass
+
+        class MyInt(int):
+            pass
+
+        class Unknown(object):
+            pass
+
+        registry = converters.ConverterRegistry(
+            {dict: json.loads},
+            {},
+            resolve_by_mro=True
+        )
+        # a subclass resolves to the converter of its base
+        self.assertTrue(registry.get_from_string_converter(MyDict)
+                        is json.loads)
+        self.assertTrue(MyDict in registry._from_string_cache)
+        # a type that is its own converter is replaced by the subclass
+        registry.register_from_string_converter(int, int)
+        self.assertTrue(registry.get_from_string_converter(MyInt) is MyInt)
+        # unknown types convert with themselves
+        self.assertTrue(registry.get_from_string_converter(Unknown)
+                        is Unknown)
+        self.assertTrue(registry.get_to_string_converter(Unknown)
+                        is converters.arbitrary_object_to_string)
+
+        # registering a converter invalidates the cached resolutions
+        registry.register_to_string_converter(dict, json.dumps)
+        self.assertEqual(registry._from_string_cache, {})
+        self.assertTrue(registry.get_to_string_converter(MyDict)
+                        is json.dumps)
+        self.assertEqual(
+            registry.convert_to_str(MyDict(a=1)),
+            '{"a": 1}'
+        )
+
+    #--------------------------------------------------------------------------
+    def test_converter_registry_exact_type_resolution(self):
+        # by default, subclasses don't get the converters of their bases
+        Point = collections.namedtuple('Point', 'x y')
+        registry = converters.ConverterRegistry(
+            {dict: json.loads, tuple: converters.str_to_list},
+            {tuple: converters.list_to_str}
+        )
+        self.assertTrue(
+            registry.get_from_string_converter(collections.OrderedDict)
+            is collections.OrderedDict
+        )
+        self.assertTrue(registry.get_from_string_converter(Point) is Point)
+        self.assertTrue(
+            registry.get_to_string_converter(Point)
+            is converters.arbitrary_object_to_string
+        )
+        self.assertEqual(
+            registry.convert_to_str(Point(1, 2)),
+            str(Point(1, 2))
+        )
+        self.assertEqual(
+            converters.to_str(collections.OrderedDict(a=1)),
+            str(collections.OrderedDict(a=1))
+        )
+
+    #--------------------------------------------------------------------------
+    def test_arbitrary_object_to_string_of_classes_and_functions(self):
+        class Local(object):
+            pass
+
+        for a_thing in (Local, converters.to_str):
+            first = converters.arbitrary_object_to_string(a_thing)
+            self.assertTrue(
+                converters._class_and_function_strings[a_thing] is first
+            )
+            self.assertTrue(
+                converters.arbitrary_object_to_string(a_thing) is first
+            )
+        self.assertEqual(
+            converters.arbitrary_object_to_string(converters.to_str),
+            'configman.converters.to_str'
+        )
+
+        # a class with a 'to_str' of its own is asked every time
+        class Named(object):
+            name = 'first'
+
+            @classmethod
+            def to_str(cls):
+                return cls.name
+
+        self.assertEqual(converters.arbitrary_object_to_string(Named), 'first')
+        Named.name = 'second'
+        self.assertEqual(
+            converters.arbitrary_object_to_string(Named),
+            'second'
+        )
+
+    #--------------------------------------------------------------------------
+    def test_converter_registry_statistics(self):
+        registry = converters.ConverterRegistry(
+            {},
+            {int: str, list: converters.list_to_str}
+        )
+        self.assertEqual(registry.convert_to_str(17), '17')
+        self.assertEqual(registry.statistics, {})
+        registry.collect_statistics = True
+        self.assertEqual(registry.convert_to_str(17), '17')
+        self.assertEqual(registry.convert_to_str(18), '18')
+        self.assertEqual(registry.convert_to_str([1, 2]), '1, 2')
+        self.assertEqual(registry.statistics[str][0], 2)
+        self.assertEqual(registry.statistics[converters.list_to_str][0], 1)
+        report = registry.statistics_report()
+        self.assertEqual(
+            sorted((name, calls) for name, calls, seconds in report),
+            [('configman.converters.list_to_str', 1), ('str', 2)]
+        )
+        self.assertRaises(ValueError, registry.timed_call, int, 'x')
+        self.assertEqual(registry.statistics[int][0], 1)
+        registry.reset_statistics()
+        self.assertEqual(registry.statistics, {})
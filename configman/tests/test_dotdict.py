@@ -2,15 +2,21 @@
 # License, v. 2.0. If a copy of the MPL was not distributed with this
 # file, You can obtain one at http://mozilla.org/MPL/2.0/.
 
+import pickle
+import sys
 import unittest
 from configman.dotdict import (
     DotDict,
     DotDictWithAcquisition,
     iteritems_breadth_first,
     configman_keys,
-    create_key_translating_dot_dict
+    create_key_translating_dot_dict,
+    compile_key_translator,
+    walk_tree,
+    BREADTH_FIRST,
+    PRE_ORDER,
+    POST_ORDER,
 )
-from configman.orderedset import OrderedSet
 from configman import Namespace
 
 
@@ -400,7 +406,7 @@ class TestCase(unittest.TestCase):
         d['a.b.d'] = 8
         d['a.x'] = 99
         d['b'] = 21
-        self.assertTrue(isinstance(d._key_order, OrderedSet))
+        self.assertTrue(isinstance(d._key_order, list))
         # the keys should be in order of insertion within each level of the
         # nested dicts
         keys_in_breadth_first_order = [
@@ -422,7 +428,7 @@ class TestCase(unittest.TestCase):
         d['a-a.b_b.d-d'] = 8
         d['a_a.x-x'] = 99
         d['b-b'] = 21
-        self.assertTrue(isinstance(d._key_order, OrderedSet))
+        self.assertTrue(isinstance(d._key_order, list))
         # the keys should be in order of insertion within each level of the
         # nested dicts
         keys_in_breadth_first_order = [
@@ -468,7 +474,7 @@ class TestCase(unittest.TestCase):
         d['a-a.b_b.d-d'] = 8
         d['a_a.x-x'] = 99
         d['b-b'] = 21
-        self.assertTrue(isinstance(d._key_order, OrderedSet))
+        self.assertTrue(isinstance(d._key_order, list))
         # the keys should be in order of insertion within each level of the
         # nested dicts
         keys_in_breadth_first_order = [
@@ -531,7 +537,7 @@ class TestCase(unittest.TestCase):
         d['a-a'].b_b.add_aggregation('d-d', lambda x, y, z: True)
         d['a_a'].add_option('x-x')
         d.add_option('b-b')
-        self.assertTrue(isinstance(d._key_order, OrderedSet))
+        self.assertTrue(isinstance(d._key_order, list))
         # the keys should be in order of insertion within each level of the
         # nested dicts
         keys_in_breadth_first_order = [
@@ -575,3 +581,262 @@ class TestCase(unittest.TestCase):
         self.assertTrue(
             isinstance(d.a_a.b_b, HyphenUnderscoreNamespace)
         )
+
+    #--------------------------------------------------------------------------
+    def test_compile_key_translator(self):
+        # independent substitutions are done in a single pass
+        translator = compile_key_translator((('-', '_'), ('+', '.')))
+        self.assertEqual(translator.__name__, 'regex_translator')
+        self.assertEqual(translator('a-b+c'), 'a_b.c')
+        self.assertEqual(translator('nothing'), 'nothing')
+        # '_' is part of '__', so these are done one after another
+        translator = compile_key_translator((('-', '_'), ('__', '.')))
+        self.assertEqual(translator.__name__, 'sequential_translator')
+        self.assertEqual(translator('a-b__c'), 'a_b.c')
+        self.assertEqual(translator('a-_b'), 'a.b')
+        # removing a substring can join the parts of another
+        translator = compile_key_translator((('-', ''), ('ab', 'Z')))
+        self.assertEqual(translator('a-b'), 'Z')
+        # substitutions that feed one another keep the sequential semantics
+        translator = compile_key_translator((('a', 'xy'), ('yb', 'z')))
+        self.assertEqual(translator('ab'), 'xz')
+        translator = compile_key_translator((('bc', 'y'), ('ab', 'x')))
+        self.assertEqual(translator('abc'), 'ay')
+        translator = compile_key_translator(())
+        self.assertEqual(translator('a-b'), 'a-b')
+
+    #--------------------------------------------------------------------------
+    def test_translating_key_dot_dict_cache_and_item_access(self):
+        EnvironmentDict = create_key_translating_dot_dict(
+            "EnvironmentDict",
+            (('__', '.'),),
+            max_cache_size=3
+        )
+        OtherDict = create_key_translating_dot_dict(
+            "OtherDict",
+            (('-', '_'),),
+        )
+        d = EnvironmentDict()
+        d['db__host'] = 'localhost'
+        d['db__port'] = 5432
+        self.assertEqual(d.db.host, 'localhost')
+        self.assertEqual(d['db.port'], 5432)
+        # each generated class owns its own bounded cache
+        self.assertTrue(
+            EnvironmentDict._translation_cache
+            is not OtherDict._translation_cache
+        )
+        self.assertTrue(len(EnvironmentDict._translation_cache) <= 3)
+        self.assertEqual(EnvironmentDict.translate_key('a__b'), 'a.b')
+        self.assertEqual(EnvironmentDict._translation_cache['a__b'], 'a.b')
+        self.assertEqual(OtherDict._translation_cache.get('a__b'), None)
+
+        # the square bracket operator translates the whole key, so the
+        # translated separator makes nested keys
+        self.assertEqual(list(d), ['db'])
+        self.assertEqual(list(d.db), ['host', 'port'])
+        self.assertEqual(d['db__host'], 'localhost')
+        self.assertTrue('db__port' in d)
+        d['db__port'] = 5433
+        self.assertEqual(d.db.port, 5433)
+        self.assertEqual(list(d.db), ['host', 'port'])
+        del d['db__host']
+        self.assertEqual(list(d.db), ['port'])
+        self.assertTrue('db__host' not in d)
+        self.assertRaises(KeyError, d.__getitem__, 'db__host')
+
+    #--------------------------------------------------------------------------
+    def test_key_order_survives_replacement_and_deletion(self):
+        d = DotDict()
+        d.a = 1
+        d.b = 2
+        d.c = 3
+        d.a = 4
+        self.assertEqual(list(d), ['a', 'b', 'c'])
+        del d.b
+        d.b = 5
+        self.assertEqual(list(d), ['a', 'c', 'b'])
+        self.assertEqual(len(d), 3)
+        # attributes stored directly in __dict__ are never keys
+        d.__dict__['_private'] = 6
+        d._private = 7
+        self.assertEqual(list(d), ['a', 'c', 'b'])
+        self.assertRaises(AttributeError, d.__delattr__, 'x')
+
+    #--------------------------------------------------------------------------
+    def test_key_order_survives_many_deletions(self):
+        d = DotDict()
+        keys = ['k%d' % i for i in range(100)]
+        for key in keys:
+            d[key] = key
+        # from the end, from the middle and from the front
+        for key in keys[:79:-1] + keys[40:60] + keys[:20]:
+            del d[key]
+            keys.remove(key)
+            self.assertEqual(len(d), len(keys))
+        self.assertEqual(list(d), keys)
+        d.k0 = 'again'
+        keys.append('k0')
+        self.assertEqual(list(d), keys)
+        self.assertEqual(d.keys(), keys)
+        del d.k30
+        keys.remove('k30')
+        self.assertEqual(list(d), keys)
+        for key in list(d):
+            del d[key]
+        self.assertEqual(list(d), [])
+        self.assertEqual(len(d), 0)
+
+    #--------------------------------------------------------------------------
+    def test_construction_assigns_each_leaf_once(self):
+        assignments = []
+
+        class CountingDotDict(DotDict):
+            def __setattr__(self, key, value):
+                assignments.append(key)
+                super(CountingDotDict, self).__setattr__(key, value)
+
+        source = {
+            'a': 1,
+            'b': {
+                'c': 2,
+                'd': {'e': 3, 'f': 4},
+            },
+            'g.h': 5,
+        }
+        d = CountingDotDict(source)
+        self.assertEqual(
+            sorted(assignments),
+            ['a', 'b', 'c', 'd', 'e', 'f', 'g', 'h']
+        )
+        self.assertEqual(
+            sorted(d.keys_breadth_first()),
+            ['a', 'b.c', 'b.d.e', 'b.d.f', 'g.h']
+        )
+        self.assertTrue(isinstance(d.b.d, CountingDotDict))
+        self.assertEqual(d['b.d.f'], 4)
+
+    #--------------------------------------------------------------------------
+    def test_namespace_construction_from_nested_mapping(self):
+        n = Namespace(initializer={'x': {'y': {'z': 1}}, 'w': 2})
+        self.assertTrue(isinstance(n.x, Namespace))
+        self.assertTrue(isinstance(n.x.y, Namespace))
+        self.assertEqual(n.x._doc, '')
+        self.assertEqual(n['x.y.z'].default, 1)
+        self.assertEqual(n.w.default, 2)
+
+    #--------------------------------------------------------------------------
+    def test_walk_tree_orders(self):
+        d = DotDict()
+        d['a'] = 1
+        d['b.c'] = 2
+        d['b.d.e'] = 3
+        d['f'] = 4
+
+        self.assertEqual(
+            [('.'.join(p), v) for p, v in walk_tree(d)],
+            [('a', 1), ('f', 4), ('b.c', 2), ('b.d.e', 3)]
+        )
+        self.assertEqual(
+            ['.'.join(p) for p, v in walk_tree(
+                d,
+                order=PRE_ORDER,
+                include_branches=True
+            )],
+            ['a', 'b', 'b.c', 'b.d', 'b.d.e', 'f']
+        )
+        self.assertEqual(
+            ['.'.join(p) for p, v in walk_tree(
+                d,
+                order=POST_ORDER,
+                include_branches=True
+            )],
+            ['a', 'b.c', 'b.d.e', 'b.d', 'b', 'f']
+        )
+        self.assertEqual(
+            ['.'.join(p) for p, v in walk_tree(
+                d,
+                order=PRE_ORDER,
+                sort=lambda items: sorted(items, reverse=True)
+            )],
+            ['f', 'b.d.e', 'b.c', 'a']
+        )
+
+    #--------------------------------------------------------------------------
+    def test_walk_tree_deeper_than_the_recursion_limit(self):
+        depth = sys.getrecursionlimit() + 100
+        d = DotDict()
+        current = d
+        for i in range(depth):
+            current['leaf'] = i
+            current['next'] = DotDict()
+            current = current['next']
+        for order in (BREADTH_FIRST, PRE_ORDER, POST_ORDER):
+            paths = [p for p, v in walk_tree(d, order=order)]
+            self.assertEqual(len(paths), depth)
+            self.assertEqual(len(paths[-1]), depth)
+        keys = list(d.keys_breadth_first())
+        self.assertEqual(len(keys), depth)
+        self.assertEqual(keys[1], 'next.leaf')
+
+    #--------------------------------------------------------------------------
+    def test_pickling(self):
+        for protocol in (0, 2):
+            d = DotDict()
+            d['b.c'] = 1
+            d.a = walk_tree
+            d2 = pickle.loads(pickle.dumps(d, protocol))
+            self.assertTrue(type(d2) is DotDict)
+            self.assertEqual(d2.keys(), ['b', 'a'])
+            self.assertEqual(d2.b.c, 1)
+            self.assertTrue(d2.a is walk_tree)
+
+            # the parents are rebuilt, so acquisition works on the copy
+            d = DotDictWithAcquisition()
+            d.x = 10
+            d['y.z.w'] = 'w'
+            d.shared = d.y
+            d2 = pickle.loads(pickle.dumps(d, protocol))
+            self.assertTrue(type(d2.y.z) is DotDictWithAcquisition)
+            self.assertEqual(d2.y.z.x, 10)
+            self.assertEqual(d2['y.z.w'], 'w')
+            self.assertTrue(d2.shared is d2.y)
+            d2.x = 20
+            self.assertEqual(d2.y.z.x, 20)
+            self.assertEqual(d.y.z.x, 10)
+
+    #--------------------------------------------------------------------------
+    def test_pickling_key_translating_dot_dicts(self):
+        EnvironmentDict = create_key_translating_dot_dict(
+            'EnvironmentDict',
+            [['__', '.']],
+            base_class=DotDictWithAcquisition
+        )
+        self.assertTrue(
+            create_key_translating_dot_dict(
+                'EnvironmentDict',
+                (('__', '.'),),
+                base_class=DotDictWithAcquisition
+            ) is EnvironmentDict
+        )
+        TranslatingNamespace = create_key_translating_dot_dict(
+            'TranslatingNamespace',
+            (('-', '_'),),
+            base_class=Namespace
+        )
+        for protocol in (0, 2):
+            d = EnvironmentDict()
+            d.x = 10
+            d['db__host'] = 'localhost'
+            d2 = pickle.loads(pickle.dumps(d, protocol))
+            self.assertTrue(type(d2) is EnvironmentDict)
+            self.assertTrue(type(d2.db) is EnvironmentDict)
+            self.assertEqual(d2['db__host'], 'localhost')
+            self.assertEqual(d2.db.x, 10)
+
+            n = TranslatingNamespace(doc='translated')
+            n.add_option('a-b', default=1)
+            n2 = pickle.loads(pickle.dumps(n, protocol))
+            self.assertTrue(type(n2) is TranslatingNamespace)
+            self.assertEqual(n2._doc, 'translated')
+            self.assertEqual(n2['a-b'].default, 1)
@@ -0,0 +1,150 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+import pickle
+import threading
+import time
+import unittest
+
+from configman import ConfigurationManager, Namespace
+from configman import converters
+from configman.lazy_instance import LazyInstance, materialized
+
+
+#==============================================================================
+class Backend(object):
+    constructed = []
+    closed = []
+
+    def __init__(self, config):
+        time.sleep(0.01)  # let other threads pile up
+        self.config = config
+        self.name = config.get('name', 'backend')
+        Backend.constructed.append(self)
+
+    def __call__(self, x):
+        return '%s %s' % (self.name, x)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def close(self):
+        Backend.closed.append(self)
+
+
+#==============================================================================
+class OtherBackend(Backend):
+    pass
+
+
+#==============================================================================
+class TestCase(unittest.TestCase):
+
+    #--------------------------------------------------------------------------
+    def setUp(self):
+        Backend.constructed = []
+        Backend.closed = []
+
+    #--------------------------------------------------------------------------
+    def test_constructed_on_first_use(self):
+        lazy = LazyInstance(Backend, {'name': 'alpha'})
+        self.assertTrue(isinstance(lazy, Backend))
+        self.assertFalse(isinstance(lazy, OtherBackend))
+        self.assertTrue(materialized(lazy) is None)
+        self.assertTrue('not constructed' in repr(lazy))
+        self.assertEqual(Backend.constructed, [])
+
+        self.assertEqual(lazy.name, 'alpha')
+        self.assertEqual(len(Backend.constructed), 1)
+        self.assertTrue(materialized(lazy) is Backend.constructed[0])
+        self.assertEqual(lazy('x'), 'alpha x')
+        with lazy as instance:
+            self.assertTrue(instance is Backend.constructed[0])
+        lazy.name = 'beta'
+        self.assertEqual(Backend.constructed[0].name, 'beta')
+        self.assertEqual(len(Backend.constructed), 1)
+
+        # anything else is returned as it is
+        an_object = object()
+        self.assertTrue(materialized(an_object) is an_object)
+
+    #--------------------------------------------------------------------------
+    def test_constructed_once_by_many_threads(self):
+        lazy = LazyInstance(Backend, {})
+        names = []
+
+        def use():
+            names.append(lazy.name)
+
+        threads = [threading.Thread(target=use) for i in range(20)]
+        for a_thread in threads:
+            a_thread.start()
+        for a_thread in threads:
+            a_thread.join()
+        self.assertEqual(names, ['backend'] * 20)
+        self.assertEqual(len(Backend.constructed), 1)
+
+    #--------------------------------------------------------------------------
+    def test_instances_from_classes_in_namespaces(self):
+        n = Namespace()
+        n.add_option(
+            'backends',
+            default=(
+                'configman.tests.test_lazy_instance.Backend, '
+                'configman.tests.test_lazy_instance.OtherBackend, '
+                'configman.tests.test_lazy_instance.Backend'
+            ),
+            from_string_converter=converters.str_to_classes_in_namespaces(
+                'backend%d',
+                'cls',
+                instantiate_classes=True,
+                lazy_instances=True
+            )
+        )
+        cm = ConfigurationManager(n, values_source_list=[], argv_source=[])
+        with cm.context() as config:
+            self.assertTrue(
+                isinstance(config.backend1.cls_instance, OtherBackend)
+            )
+            self.assertEqual(Backend.constructed, [])
+            self.assertEqual(config.backend2.cls_instance('y'), 'backend y')
+            self.assertEqual(len(Backend.constructed), 1)
+        # only the instance that was used is closed
+        self.assertEqual(Backend.closed, Backend.constructed)
+
+    #--------------------------------------------------------------------------
+    def test_eager_instances_from_classes_in_namespaces(self):
+        n = Namespace()
+        n.add_option(
+            'backends',
+            default='configman.tests.test_lazy_instance.Backend',
+            # the instances are eager by default
+            from_string_converter=converters.str_to_classes_in_namespaces(
+                'backend%d',
+                'cls',
+                instantiate_classes=True
+            )
+        )
+        cm = ConfigurationManager(n, values_source_list=[], argv_source=[])
+        config = cm.get_config()
+        self.assertEqual(len(Backend.constructed), 1)
+        self.assertTrue(type(config.backend0.cls_instance) is Backend)
+
+    #--------------------------------------------------------------------------
+    def test_pickling(self):
+        lazy = LazyInstance(Backend, {'name': 'alpha'})
+        lazy2 = pickle.loads(pickle.dumps(lazy, 2))
+        self.assertTrue(materialized(lazy2) is None)
+        self.assertEqual(Backend.constructed, [])
+        self.assertEqual(lazy2.name, 'alpha')
+        self.assertEqual(len(Backend.constructed), 1)
+
+        # a constructed instance is pickled with it
+        lazy3 = pickle.loads(pickle.dumps(lazy2, 2))
+        self.assertTrue(type(materialized(lazy3)) is Backend)
+        self.assertEqual(lazy3.name, 'alpha')
+        self.assertEqual(len(Backend.constructed), 1)
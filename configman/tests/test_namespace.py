@@ -5,12 +5,13 @@
 import unittest
 import datetime
 import functools
+import pickle
 
 import configman.config_manager as config_manager
 from configman.datetime_util import datetime_from_ISO_string
 
 from configman.option import Option
-from configman.orderedset import OrderedSet
+from configman.converters import class_converter
 
 
 #==============================================================================
@@ -249,7 +250,7 @@ class TestCase(unittest.TestCase):
         d.a.b.add_option('d')
         d.a.add_option('x')
         d.add_aggregation('b', lambda x, y, z: None)
-        self.assertTrue(isinstance(d._key_order, OrderedSet))
+        self.assertTrue(isinstance(d._key_order, list))
         # the keys should be in order of insertion within each level of the
         # nested dicts
         keys_in_breadth_first_order = [
@@ -260,3 +261,81 @@ class TestCase(unittest.TestCase):
             [k for k in d.keys_breadth_first(include_dicts=True)]
         )
 
+
+    #--------------------------------------------------------------------------
+    def test_safe_copy_is_independent(self):
+        n = config_manager.Namespace()
+        n.add_option('a', default=1)
+        n.namespace('x')
+        n.x.add_option('b', default='hello')
+        n.x.add_aggregation('c', lambda x, y, z: None)
+
+        n2 = n.safe_copy()
+        self.assertTrue(n2.x is not n.x)
+        self.assertTrue(n2.x.c is not n.x.c)
+        self.assertTrue(n2.a is not n.a)
+        self.assertTrue(n2.x.b is not n.x.b)
+        self.assertEqual(n2.a.default, 1)
+        self.assertEqual(n2.x.b.value, 'hello')
+
+        n2.set_value('x.b', 'goodbye')
+        self.assertEqual(n2.x.b.value, 'goodbye')
+        self.assertEqual(n.x.b.value, 'hello')
+
+        # changes made directly to the copied Options stay in the copy
+        n2.a.set_default(5, force=True)
+        n2.x.b.doc = 'changed'
+        self.assertEqual(n2.a.default, 5)
+        self.assertEqual(n.a.default, 1)
+        self.assertEqual(n.x.b.doc, None)
+
+        n.a.default = 2
+        self.assertEqual(n.a.default, 2)
+        self.assertEqual(n2.a.default, 5)
+
+    #--------------------------------------------------------------------------
+    def test_safe_copy_with_reference_value_from(self):
+        n = config_manager.Namespace()
+        n.add_option('a', default=1)
+        n.add_option('b', default=2, reference_value_from='other')
+        n2 = n.safe_copy('resource')
+        self.assertTrue(n2.a is not n.a)
+        self.assertEqual(n2.a.reference_value_from, 'resource')
+        self.assertEqual(n.a.reference_value_from, None)
+        self.assertEqual(n2.b.reference_value_from, 'other')
+
+    #--------------------------------------------------------------------------
+    def test_pickling(self):
+        n = config_manager.Namespace(doc='the top')
+        n.add_option('a', default=1, doc='an a', secret=True)
+        n.add_option(
+            'cls',
+            default=Option,
+            from_string_converter=class_converter
+        )
+        n.namespace('sub', doc='below')
+        n.sub.add_option('b', default='x', reference_value_from='other')
+        n.sub.add_aggregation('agg', 'configman.converters.to_str')
+        n.sub.shared = n.a
+        object.__setattr__(n.sub, '_reference_value_from', True)
+        for protocol in (0, 2):
+            n2 = pickle.loads(pickle.dumps(n, protocol))
+            self.assertEqual(n2._doc, 'the top')
+            self.assertEqual(n2.sub._doc, 'below')
+            self.assertTrue(n2.sub._reference_value_from)
+            self.assertFalse(n2._reference_value_from)
+            self.assertEqual(n2.keys(), ['a', 'cls', 'sub'])
+            self.assertEqual(n2.a, n.a)
+            self.assertTrue(n2.a.secret)
+            self.assertTrue(n2.sub.shared is n2.a)
+            self.assertTrue(n2.cls.default is Option)
+            self.assertTrue(
+                n2.cls.from_string_converter is class_converter
+            )
+            self.assertEqual(n2.sub.b.reference_value_from, 'other')
+            self.assertEqual(n2.sub.b.value, 'x')
+            self.assertEqual(n2.sub.agg, n.sub.agg)
+            # the copy is a working Namespace
+            n2.sub.b.set_value('y')
+            self.assertEqual(n2.sub.b.value, 'y')
+            self.assertEqual(n.sub.b.value, 'x')
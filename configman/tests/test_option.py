@@ -6,6 +6,8 @@ from decimal import Decimal
 import datetime
 import unittest
 import re
+import copy_reg
+import pickle
 
 from configman.converters import (
     boolean_converter,
@@ -19,7 +21,7 @@ from configman.datetime_util import (
     timedelta_to_str,
 )
 
-from configman.option import Option
+from configman.option import Option, Aggregation
 from configman.config_exceptions import CannotConvertError, OptionError
 
 
@@ -428,3 +430,70 @@ class TestCase(unittest.TestCase):
         )
         o2 = o.copy()
         self.assertEqual(o, o2)
+
+    #--------------------------------------------------------------------------
+    def test_option_is_compact(self):
+        o = Option(
+            'x',
+            default=1,
+            secret=True,
+            is_argument=True,
+        )
+        self.assertFalse(hasattr(o, '__dict__'))
+        self.assertRaises(AttributeError, setattr, o, 'not_an_attribute', 1)
+        self.assertTrue(o.secret)
+        self.assertTrue(o.is_argument)
+        self.assertFalse(o.exclude_from_print_conf)
+        self.assertFalse(o.has_changed)
+        o.has_changed = True
+        o.secret = False
+        self.assertTrue(o.has_changed)
+        self.assertFalse(o.secret)
+        self.assertTrue(o.is_argument)
+
+        o2 = o.copy()
+        self.assertEqual(o2, o)
+        self.assertTrue(o2.has_changed)
+        self.assertTrue(o2.is_argument)
+        self.assertFalse(o2.secret)
+        o2.set_value(5)
+        self.assertEqual(o2.value, 5)
+        self.assertEqual(o.value, 1)
+
+        for protocol in (0, 2):
+            o3 = pickle.loads(pickle.dumps(o, protocol))
+            self.assertEqual(o3, o)
+            self.assertTrue(o3.is_argument)
+            self.assertFalse(o3.secret)
+
+        # falsy values survive the trimming of the empty trailing slots
+        for falsy in (0, False, 0.0, '', []):
+            o4 = Option('f', default=falsy)
+            o4.reference_value_from = falsy
+            for protocol in (0, 2):
+                o5 = pickle.loads(pickle.dumps(o4, protocol))
+                self.assertEqual(o5.default, falsy)
+                self.assertEqual(type(o5.default), type(falsy))
+                self.assertEqual(o5.value, falsy)
+                self.assertEqual(type(o5.value), type(falsy))
+                self.assertEqual(o5.reference_value_from, falsy)
+                self.assertEqual(o5._flags, 0)
+
+        # pickles made with the former __getstate__ still load
+        class FormerOption(object):
+            def __reduce__(self):
+                return (
+                    copy_reg._reconstructor,
+                    (Option, object, None),
+                    tuple(getattr(o, x) for x in Option.__slots__)
+                )
+        for protocol in (0, 2):
+            o6 = pickle.loads(pickle.dumps(FormerOption(), protocol))
+            self.assertEqual(o6, o)
+            self.assertTrue(o6.is_argument)
+
+        a = Aggregation('a', 'configman.converters.to_str', secret=True)
+        self.assertFalse(hasattr(a, '__dict__'))
+        a2 = pickle.loads(pickle.dumps(a, 0))
+        self.assertEqual(a2, a)
+        self.assertTrue(a2.secret)
@@ -0,0 +1,360 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+import threading
+import time
+import unittest
+
+import mock
+
+from configman import ConfigurationManager, Namespace
+from configman.config_exceptions import ResourceUnavailableError
+from configman.dotdict import DotDict
+from configman import resources
+from configman.resources import (
+    ResourceFactory,
+    ThreadLocalResourcePool,
+    BoundedResourcePool,
+    add_resource,
+)
+
+
+#==============================================================================
+class LostConnection(Exception):
+    pass
+
+
+#==============================================================================
+class Connection(object):
+    opened = []
+
+    def __init__(self, config):
+        self.closed = False
+        Connection.opened.append(self)
+
+    def close(self):
+        self.closed = True
+
+
+#------------------------------------------------------------------------------
+def local_config(a_class, **kwargs):
+    """return a local config of the defaults of the class with some of them
+    changed"""
+    config = DotDict()
+    for key, an_option in a_class.get_required_config().iteritems():
+        config[key] = an_option.default
+    config.resource_creator = Connection
+    config.operational_exceptions = (LostConnection,)
+    config.backoff_base = 0.0
+    config.update(kwargs)
+    return config
+
+
+#==============================================================================
+class TestCase(unittest.TestCase):
+
+    #--------------------------------------------------------------------------
+    def setUp(self):
+        Connection.opened = []
+
+    #--------------------------------------------------------------------------
+    def test_factory_creates_a_resource_for_each_use(self):
+        factory = ResourceFactory(local_config(ResourceFactory))
+        with factory() as first:
+            self.assertFalse(first.closed)
+        with factory() as second:
+            pass
+        self.assertTrue(first is not second)
+        self.assertTrue(first.closed and second.closed)
+
+    #--------------------------------------------------------------------------
+    def test_no_resource_creator(self):
+        factory = ResourceFactory(
+            local_config(ResourceFactory, resource_creator=None)
+        )
+        self.assertRaises(ResourceUnavailableError, factory.acquire)
+
+    #--------------------------------------------------------------------------
+    def test_thread_local_pool(self):
+        pool = ThreadLocalResourcePool(local_config(ThreadLocalResourcePool))
+        with pool() as first:
+            pass
+        with pool() as second:
+            pass
+        self.assertTrue(first is second)
+        self.assertFalse(first.closed)
+
+        used = []
+
+        def use():
+            with pool() as a_resource:
+                used.append(a_resource)
+        a_thread = threading.Thread(target=use)
+        a_thread.start()
+        a_thread.join()
+        self.assertTrue(used[0] is not first)
+
+        pool.close()
+        self.assertTrue(first.closed and used[0].closed)
+        self.assertRaises(ResourceUnavailableError, pool.acquire)
+
+    #--------------------------------------------------------------------------
+    def test_thread_local_pool_closes_when_the_thread_ends(self):
+        pool = ThreadLocalResourcePool(local_config(ThreadLocalResourcePool))
+        used = []
+
+        def use():
+            with pool() as a_resource:
+                used.append(a_resource)
+        for i in range(2):
+            a_thread = threading.Thread(target=use)
+            a_thread.start()
+            a_thread.join()
+            # the thread's locals go a moment after 'join' returns
+            deadline = time.time() + 5.0
+            while not used[i].closed and time.time() < deadline:
+                time.sleep(0.001)
+            self.assertTrue(used[i].closed)
+            self.assertEqual(pool._resources, {})
+        # a later thread, even with the same ident, gets a new resource
+        self.assertTrue(used[1] is not used[0])
+
+    #--------------------------------------------------------------------------
+    def test_thread_local_pool_max_size(self):
+        pool = ThreadLocalResourcePool(local_config(
+            ThreadLocalResourcePool,
+            max_size=1
+        ))
+        first = pool.acquire()
+        failures = []
+
+        def use():
+            try:
+                pool.acquire()
+            except ResourceUnavailableError, x:
+                failures.append(x)
+        a_thread = threading.Thread(target=use)
+        a_thread.start()
+        a_thread.join()
+        self.assertEqual(len(failures), 1)
+        self.assertEqual(len(Connection.opened), 1)
+
+        # a discarded resource makes room for one in another thread
+        pool.release(first, discard=True)
+        self.assertTrue(first.closed)
+        a_thread = threading.Thread(target=use)
+        a_thread.start()
+        a_thread.join()
+        self.assertEqual(len(failures), 1)
+        self.assertEqual(len(Connection.opened), 2)
+
+    #--------------------------------------------------------------------------
+    def test_bounded_pool_reuses_and_waits(self):
+        pool = BoundedResourcePool(local_config(
+            BoundedResourcePool,
+            max_size=2,
+            checkout_timeout=0.05
+        ))
+        first = pool.acquire()
+        second = pool.acquire()
+        self.assertTrue(first is not second)
+        self.assertRaises(ResourceUnavailableError, pool.acquire)
+
+        # a waiting thread gets the resource as soon as it is released
+        got = []
+
+        def wait_for_one():
+            got.append(pool.acquire())
+        pool.config.checkout_timeout = 5.0
+        a_thread = threading.Thread(target=wait_for_one)
+        a_thread.start()
+        time.sleep(0.01)
+        pool.release(second)
+        a_thread.join()
+        self.assertTrue(got[0] is second)
+        self.assertEqual(len(Connection.opened), 2)
+
+        # a discarded resource makes room for a new one
+        pool.release(first, discard=True)
+        self.assertTrue(first.closed)
+        third = pool.acquire()
+        self.assertEqual(len(Connection.opened), 3)
+
+        pool.release(third)
+        pool.close()
+        self.assertTrue(third.closed)
+        # a resource in use when the pool closed is closed when released
+        self.assertFalse(second.closed)
+        pool.release(second)
+        self.assertTrue(second.closed)
+        self.assertRaises(ResourceUnavailableError, pool.acquire)
+
+    #--------------------------------------------------------------------------
+    def test_idle_timeout_and_health_check(self):
+        healthy = set()
+        pool = BoundedResourcePool(local_config(
+            BoundedResourcePool,
+            idle_timeout=60.0,
+            health_check=lambda resource: resource in healthy
+        ))
+        first = pool.acquire()
+        healthy.add(first)
+        pool.release(first)
+        self.assertTrue(pool.acquire() is first)
+        pool.release(first)
+
+        healthy.clear()
+        second = pool.acquire()
+        self.assertTrue(second is not first)
+        self.assertTrue(first.closed)
+        healthy.add(second)
+        pool.release(second)
+
+        pool.config.idle_timeout = 0.01
+        time.sleep(0.02)
+        third = pool.acquire()
+        self.assertTrue(third is not second)
+        self.assertTrue(second.closed)
+
+    #--------------------------------------------------------------------------
+    def test_bounded_pool_closes_every_expired_resource(self):
+        pool = BoundedResourcePool(local_config(
+            BoundedResourcePool,
+            idle_timeout=60.0
+        ))
+        resources = [pool.acquire() for i in range(3)]
+        for a_resource in resources:
+            pool.release(a_resource)
+        pool.config.idle_timeout = 0.01
+        time.sleep(0.02)
+        # releasing one resource closes all those that have expired, not
+        # only the one that would be reused next
+        fresh = pool.acquire()
+        self.assertTrue(all(r.closed for r in resources))
+        self.assertEqual(pool._size, 1)
+        pool.release(fresh)
+        self.assertFalse(fresh.closed)
+        self.assertEqual(len(pool._idle), 1)
+
+    #--------------------------------------------------------------------------
+    def test_an_operational_exception_discards_the_resource(self):
+        pool = BoundedResourcePool(local_config(BoundedResourcePool))
+        try:
+            with pool() as first:
+                raise LostConnection()
+        except LostConnection:
+            pass
+        self.assertTrue(first.closed)
+        # other exceptions give the resource back
+        try:
+            with pool() as second:
+                raise KeyError('x')
+        except KeyError:
+            pass
+        self.assertFalse(second.closed)
+        with pool() as third:
+            self.assertTrue(third is second)
+
+    #--------------------------------------------------------------------------
+    def test_run_retries_with_backoff(self):
+        pool = BoundedResourcePool(local_config(
+            BoundedResourcePool,
+            max_retries=2,
+            backoff_base=1.0,
+            backoff_max=1.5
+        ))
+        calls = []
+
+        def flaky(connection, x):
+            calls.append(connection)
+            if len(calls) < 3:
+                raise LostConnection()
+            return x * 2
+
+        with mock.patch.object(resources.time, 'sleep') as mocked_sleep:
+            self.assertEqual(pool.run(flaky, 21), 42)
+            delays = [args[0] for args, kwargs in mocked_sleep.call_args_list]
+        self.assertEqual(len(delays), 2)
+        self.assertTrue(0 <= delays[0] <= 1.0)
+        self.assertTrue(0 <= delays[1] <= 1.5)
+        # each failure discarded its resource
+        self.assertEqual(len(set(calls)), 3)
+        self.assertTrue(calls[0].closed and calls[1].closed)
+
+        # after 'max_retries' the operational exception is raised
+        del calls[:]
+
+        def lost(connection):
+            calls.append(connection)
+            raise LostConnection()
+        with mock.patch.object(resources.time, 'sleep'):
+            self.assertRaises(LostConnection, pool.run, lost)
+        self.assertEqual(len(calls), 3)
+
+    #--------------------------------------------------------------------------
+    def test_run_retries_a_failing_creator_once_over(self):
+        creator_calls = []
+
+        def unreachable(config):
+            creator_calls.append(config)
+            raise LostConnection()
+
+        for a_class in (
+            ResourceFactory,
+            ThreadLocalResourcePool,
+            BoundedResourcePool
+        ):
+            del creator_calls[:]
+            factory = a_class(local_config(
+                a_class,
+                resource_creator=unreachable,
+                max_retries=3
+            ))
+            with mock.patch.object(resources.time, 'sleep') as mocked_sleep:
+                self.assertRaises(
+                    LostConnection,
+                    factory.run,
+                    lambda connection: None
+                )
+            self.assertEqual(len(creator_calls), 4)
+            self.assertEqual(mocked_sleep.call_count, 3)
+
+    #--------------------------------------------------------------------------
+    def test_configured_and_closed_by_the_context(self):
+        n = Namespace()
+        add_resource(
+            n,
+            'database',
+            default=BoundedResourcePool,
+            creator=Connection
+        )
+        cm = ConfigurationManager(
+            n,
+            values_source_list=[{'max_size': '5'}],
+            argv_source=[],
+        )
+        with cm.context() as config:
+            self.assertTrue(isinstance(config.database, BoundedResourcePool))
+            self.assertEqual(config.max_size, 5)
+            with config.database() as connection:
+                self.assertTrue(isinstance(connection, Connection))
+            self.assertFalse(connection.closed)
+        self.assertTrue(connection.closed)
+
+        # the kind of pool is chosen like any other class
+        cm = ConfigurationManager(
+            n,
+            values_source_list=[{
+                'database_class': 'configman.resources.ThreadLocalResourcePool'
+            }],
+            argv_source=[],
+        )
+        with cm.context() as config:
+            self.assertTrue(
+                isinstance(config.database, ThreadLocalResourcePool)
+            )
+            with config.database() as connection:
+                pass
+            self.assertFalse(connection.closed)
+        self.assertTrue(connection.closed)
@@ -0,0 +1,118 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+import time
+import unittest
+
+from configman.shutdown import close_order, close_resources
+from configman.tests.executors import ThreadExecutor, WorkerPoolExecutor
+
+
+#==============================================================================
+class Resource(object):
+    def __init__(self, name, log, delay=0.0, error=None):
+        self.name = name
+        self.log = log
+        self.delay = delay
+        self.error = error
+
+    def close(self):
+        time.sleep(self.delay)
+        self.log.append(self.name)
+        if self.error is not None:
+            raise self.error
+
+
+#==============================================================================
+class TestCase(unittest.TestCase):
+
+    #--------------------------------------------------------------------------
+    def test_close_order(self):
+        log = []
+        a, b, c, d, e = [Resource(x, log) for x in 'abcde']
+        levels = close_order([
+            (('a',), a, ()),
+            (('db', 'b'), b, ()),
+            # depends on 'a', acquired from its own namespace
+            (('db', 'c'), c, [('db', 'a')]),
+            # depends on the whole of 'db'
+            (('d',), d, [('db',)]),
+            # unknown dependencies, created after everything else
+            (('e',), e, None),
+        ])
+        self.assertEqual(
+            [[path for path, x in a_level] for a_level in levels],
+            [[('e',)], [('d',)], [('db', 'b'), ('db', 'c')], [('a',)]]
+        )
+        self.assertEqual(close_order([]), [])
+
+        # a mapping is closed after what it contains
+        levels = close_order([
+            (('db',), a, ()),
+            (('db', 'b'), b, ()),
+            (('x',), c, ()),
+        ])
+        self.assertEqual(
+            [[path for path, x in a_level] for a_level in levels],
+            [[('db', 'b'), ('x',)], [('db',)]]
+        )
+
+    #--------------------------------------------------------------------------
+    def test_failures_do_not_stop_the_shutdown(self):
+        log = []
+        levels = [
+            [(('a',), Resource('a', log, error=ValueError('broken')))],
+            [(('b',), Resource('b', log))],
+        ]
+        summary = close_resources(levels)
+        self.assertEqual(log, ['a', 'b'])
+        self.assertEqual([x.key for x in summary.failures], ['a'])
+        self.assertFalse(summary.is_clean)
+        self.assertTrue('failed: ValueError: broken' in str(summary))
+        self.assertTrue(
+            str(summary).startswith('closed 2 resources in ')
+        )
+
+    #--------------------------------------------------------------------------
+    def test_concurrent_closes_with_a_timeout(self):
+        log = []
+        levels = [
+            [
+                (('slow',), Resource('slow', log, delay=1.0)),
+                (('x',), Resource('x', log, delay=0.05)),
+                (('y',), Resource('y', log, delay=0.05)),
+            ],
+            [(('z',), Resource('z', log))],
+        ]
+        start = time.time()
+        summary = close_resources(levels, ThreadExecutor(), timeout=0.3)
+        self.assertTrue(time.time() - start < 0.8)
+        # the level after waits for the level before, but not for the close
+        # that timed out
+        self.assertEqual(sorted(log[:2]), ['x', 'y'])
+        self.assertEqual(log[2], 'z')
+        self.assertEqual([x.key for x in summary.timeouts], ['slow'])
+        self.assertEqual(summary.failures, [])
+        self.assertEqual(
+            [x.key for x in summary.results],
+            ['slow', 'x', 'y', 'z']
+        )
+
+    #--------------------------------------------------------------------------
+    def test_timeout_counts_from_the_start_of_each_close(self):
+        log = []
+        levels = [
+            [
+                (('r%d' % i,), Resource('r%d' % i, log, delay=0.05))
+                for i in xrange(10)
+            ],
+            [(('last',), Resource('last', log))],
+        ]
+        # only two closes run at once, the rest wait for a worker longer
+        # than the timeout
+        summary = close_resources(levels, WorkerPoolExecutor(2), timeout=0.12)
+        self.assertEqual(summary.timeouts, [])
+        self.assertEqual(sorted(log[:10]), ['r%d' % i for i in xrange(10)])
+        self.assertEqual(log[10], 'last')
+        self.assertTrue(all(x.duration < 0.12 for x in summary.results))
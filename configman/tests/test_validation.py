@@ -0,0 +1,136 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from configman.config_manager import CompiledDefinitions
+from configman.namespace import Namespace
+from configman.validation import (
+    collect_report,
+    validate,
+    validate_many,
+    ValidationResult,
+)
+
+
+#==============================================================================
+class TestCase(unittest.TestCase):
+
+    #--------------------------------------------------------------------------
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.definitions = Namespace()
+        self.definitions.add_option('port', default=80)
+        self.definitions.namespace('db')
+        self.definitions.db.add_option('host', default='localhost')
+        self.definitions.add_option('target', default=None, is_argument=True)
+
+    #--------------------------------------------------------------------------
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    #--------------------------------------------------------------------------
+    def _write(self, name, values):
+        pathname = os.path.join(self.directory, name)
+        with open(pathname, 'w') as f:
+            json.dump(values, f)
+        return pathname
+
+    #--------------------------------------------------------------------------
+    def _paths(self):
+        return [
+            self._write('good.json', {'port': '8080', 'target': 'x'}),
+            self._write('unknown.json', {'prot': '8080', 'target': 'x'}),
+            self._write('bad.json', {'port': 'eighty', 'target': 'x'}),
+            self._write('missing.json', {'db': {'host': 'db1'}}),
+            os.path.join(self.directory, 'nonexistent.json'),
+        ]
+
+    #--------------------------------------------------------------------------
+    def _check_results(self, results, paths):
+        self.assertEqual([r.path for r in results], paths)
+        good, unknown, bad, missing, nonexistent = results
+        self.assertTrue(isinstance(good, ValidationResult))
+        self.assertTrue(good.is_valid)
+        self.assertEqual(unknown.unknown_keys, ['prot'])
+        self.assertFalse(unknown.is_valid)
+        self.assertEqual(len(bad.conversion_errors), 1)
+        self.assertTrue('eighty' in bad.conversion_errors[0])
+        self.assertEqual(missing.missing_arguments, ['target'])
+        self.assertEqual(missing.unknown_keys, [])
+        self.assertEqual(len(nonexistent.errors), 1)
+        self.assertFalse(nonexistent.is_valid)
+
+    #--------------------------------------------------------------------------
+    def test_validate_many_in_this_process(self):
+        paths = self._paths()
+        results = validate_many(self.definitions, paths, workers=1)
+        self._check_results(results, paths)
+
+    #--------------------------------------------------------------------------
+    def test_validate_many_in_a_process_pool(self):
+        paths = self._paths()
+        results = validate_many(
+            CompiledDefinitions(self.definitions),
+            paths,
+            workers=2
+        )
+        self._check_results(results, paths)
+
+    #--------------------------------------------------------------------------
+    def test_validate_leaves_definitions_unchanged(self):
+        compiled = CompiledDefinitions(self.definitions)
+        result = validate(
+            self._write('good.json', {'port': '8080', 'target': 'x'}),
+            compiled
+        )
+        self.assertTrue(result.is_valid)
+        self.assertEqual(compiled.option_definitions.port.value, 80)
+        self.assertEqual(compiled.option_definitions.target.value, None)
+
+    #--------------------------------------------------------------------------
+    def test_collect_report(self):
+        self.definitions.add_option('workers', default=4)
+        self.definitions.db.add_option('port', default=5432)
+        pathname = os.path.join(self.directory, 'fleet.conf')
+        with open(pathname, 'w') as f:
+            f.write(
+                '# a broken config\n'
+                'port=eighty\n'
+                'workres=2\n'
+                '\n'
+                'db.port=many\n'
+                'host=db1\n'
+            )
+        report = collect_report(
+            self.definitions,
+            [pathname, {'workers': 'lots', 'colour': 'red'}]
+        )
+        self.assertFalse(report.is_valid)
+        self.assertEqual(report.unknown_keys, ['colour', 'workres'])
+        conf_source, mapping_source = report.sources
+        self.assertEqual(conf_source['source'], pathname)
+        self.assertEqual(conf_source['unknown_keys'], ['workres'])
+        self.assertEqual(conf_source['acquired_keys'], {'host': ['db.host']})
+        self.assertEqual(mapping_source['source'], 'mapping')
+        self.assertEqual(mapping_source['unknown_keys'], ['colour'])
+
+        errors = dict((x['key'], x) for x in report.conversion_errors)
+        self.assertEqual(sorted(errors), ['db.port', 'port', 'workers'])
+        self.assertEqual(errors['port']['source'], pathname)
+        self.assertEqual(errors['port']['line'], 2)
+        self.assertEqual(errors['port']['value'], 'eighty')
+        self.assertEqual(errors['db.port']['line'], 5)
+        self.assertEqual(errors['workers']['source'], 'mapping')
+        self.assertEqual(errors['workers']['line'], None)
+        self.assertTrue('lots' in errors['workers']['message'])
+        # the report is machine readable
+        self.assertEqual(
+            json.loads(json.dumps(report.as_dict())),
+            report.as_dict()
+        )
@@ -0,0 +1,272 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""validate many config files against the same option definitions"""
+
+import collections
+import multiprocessing
+import os
+
+from configman.config_manager import (
+    ConfigurationManager,
+    CompiledDefinitions,
+)
+from configman.option import Option
+from configman.value_sources import (
+    value_source_name,
+    value_source_line_number,
+)
+
+
+#==============================================================================
+class ValidationResult(collections.namedtuple(
+    'ValidationResult',
+    'path unknown_keys conversion_errors missing_arguments errors'
+)):
+    """the outcome of validating one config file.
+
+    attributes:
+        path - the pathname of the config file
+        unknown_keys - a sorted list of the keys that match no option
+        conversion_errors - a list of the messages of all the
+                            CannotConvertErrors
+        missing_arguments - a list of the names of the options marked
+                            'is_argument' that have no value
+        errors - a list of the messages of any other failures, like a file
+                 that could not be read
+    """
+    __slots__ = ()
+
+    #--------------------------------------------------------------------------
+    @property
+    def is_valid(self):
+        return not (
+            self.unknown_keys
+            or self.conversion_errors
+            or self.missing_arguments
+            or self.errors
+        )
+
+
+#==============================================================================
+class ValidationReport(object):
+    """everything found wrong with the values from the value sources.
+
+    attributes:
+        sources - a list with a dict for each value source that was checked
+                  for mismatches with these keys:
+                      'source' - the name of the value source
+                      'unknown_keys' - a sorted list of the keys that match
+                                       no option
+                      'acquired_keys' - a dict of the keys that matched only
+                                        by acquisition to the sorted lists of
+                                        the option keys that they matched
+        conversion_errors - a list with a dict for each option that failed
+                            to convert with these keys:
+                                'key' - the name of the option
+                                'value' - the value that failed to convert
+                                'source' - the name of the value source that
+                                           supplied the value or None if it
+                                           was the option's own default
+                                'line' - the line number in the source, if
+                                         the value source knows it, or None
+                                'message' - the message of the
+                                            CannotConvertError
+    """
+
+    #--------------------------------------------------------------------------
+    def __init__(self):
+        self.sources = []
+        self.conversion_errors = []
+
+    #--------------------------------------------------------------------------
+    @property
+    def unknown_keys(self):
+        """a sorted list of the unknown keys from all the value sources"""
+        unknown_keys = set()
+        for a_source in self.sources:
+            unknown_keys.update(a_source['unknown_keys'])
+        return sorted(unknown_keys)
+
+    #--------------------------------------------------------------------------
+    @property
+    def is_valid(self):
+        return not (self.unknown_keys or self.conversion_errors)
+
+    #--------------------------------------------------------------------------
+    def as_dict(self):
+        """return the report as a dict that can be serialized as json"""
+        return {
+            'is_valid': self.is_valid,
+            'sources': self.sources,
+            'conversion_errors': self.conversion_errors,
+        }
+
+
+#==============================================================================
+class ValidatingConfigurationManager(ConfigurationManager):
+    """a ConfigurationManager that doesn't stop at the first problem with the
+    values from its value sources.  It finishes the overlay and collects the
+    keys that match no option, the keys matched by acquisition and every
+    failed conversion into a ValidationReport, its 'report' attribute."""
+
+    #--------------------------------------------------------------------------
+    def __init__(self, *args, **kwargs):
+        self.report = ValidationReport()
+        super(ValidatingConfigurationManager, self).__init__(*args, **kwargs)
+
+    #--------------------------------------------------------------------------
+    def _conversion_failed(self, key, error):
+        try:
+            source_index, raw_value = self._provenance[key]
+        except KeyError:
+            source = None
+            line = None
+        else:
+            a_value_source = self.values_source_list[source_index]
+            source = value_source_name(a_value_source)
+            line = value_source_line_number(a_value_source, key)
+        value = self.option_definitions[key].default
+        if not isinstance(value, basestring):
+            value = repr(value)
+        self.report.conversion_errors.append({
+            'key': key,
+            'value': value,
+            'source': source,
+            'line': line,
+            'message': str(error),
+        })
+        return True
+
+    #--------------------------------------------------------------------------
+    def _check_for_mismatches(self, known_keys):
+        for a_value_source, unmatched_keys, acquired_keys in \
+                self._find_mismatches(known_keys):
+            self.report.sources.append({
+                'source': value_source_name(a_value_source),
+                'unknown_keys': sorted(unmatched_keys),
+                'acquired_keys': acquired_keys,
+            })
+
+
+#------------------------------------------------------------------------------
+def collect_report(definition_source, values_source_list, **kwargs):
+    """overlay all the value sources onto the definitions and return a
+    ValidationReport of everything that was wrong with their values.  The
+    remaining keyword arguments are given to the ConfigurationManager.  By
+    default, there are neither command line arguments, help nor admin
+    options.  A command line with an unknown switch still raises
+    NotAnOptionError."""
+    kwargs.setdefault('argv_source', [])
+    kwargs.setdefault('use_auto_help', False)
+    kwargs.setdefault('use_admin_controls', False)
+    config_manager = ValidatingConfigurationManager(
+        definition_source,
+        values_source_list,
+        **kwargs
+    )
+    return config_manager.report
+
+
+# the CompiledDefinitions used by 'validate'.  It is set in each worker
+# process by the initializer of the process pool, once per worker rather than
+# sent along with every path.  Forked workers inherit the initializer's
+# arguments, so they don't need to unpickle it either.
+_compiled_definitions = None
+
+
+#------------------------------------------------------------------------------
+def _set_compiled_definitions(compiled_definitions):
+    global _compiled_definitions
+    _compiled_definitions = compiled_definitions
+
+
+#------------------------------------------------------------------------------
+def validate(path, definitions=None):
+    """validate one config file and return a ValidationResult
+
+    parameters:
+        path - the pathname of a config file of any type that configman
+               can read
+        definitions - the CompiledDefinitions to validate against.  If None,
+                      those given to the process pool are used."""
+    if definitions is None:
+        definitions = _compiled_definitions
+    unknown_keys = []
+    conversion_errors = []
+    missing_arguments = []
+    errors = []
+    if not os.path.isfile(path):
+        # some value sources only warn about a missing file
+        errors.append("%s doesn't exist" % path)
+        return ValidationResult(
+            path,
+            unknown_keys,
+            conversion_errors,
+            missing_arguments,
+            errors
+        )
+    try:
+        config_manager = ValidatingConfigurationManager(
+            definitions,
+            values_source_list=[path],
+            argv_source=[],
+            use_auto_help=False,
+            use_admin_controls=False,
+        )
+        unknown_keys = config_manager.report.unknown_keys
+        conversion_errors = [
+            x['message'] for x in config_manager.report.conversion_errors
+        ]
+        for key in config_manager.option_definitions.keys_breadth_first():
+            an_option = config_manager.option_definitions[key]
+            if (
+                isinstance(an_option, Option)
+                and an_option.is_argument
+                and an_option.value is None
+            ):
+                missing_arguments.append(key)
+    except Exception, x:
+        errors.append('%s: %s' % (x.__class__.__name__, x))
+    return ValidationResult(
+        path,
+        unknown_keys,
+        conversion_errors,
+        missing_arguments,
+        errors
+    )
+
+
+#------------------------------------------------------------------------------
+def validate_many(definitions, paths, workers=None):
+    """validate many config files against the same definitions and return a
+    list of ValidationResults in the order of the paths.  The definitions are
+    compiled once, then the files are validated in a pool of processes.
+
+    parameters:
+        definitions - a definition source, a list of them, or a
+                      CompiledDefinitions
+        paths - a sequence of pathnames of config files
+        workers - the number of processes.  If None, the number of cpus is
+                  used.  If 1, the files are validated in this process."""
+    paths = list(paths)
+    if not isinstance(definitions, CompiledDefinitions):
+        definitions = CompiledDefinitions(definitions)
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+    if workers <= 1:
+        return [validate(a_path, definitions) for a_path in paths]
+    pool = multiprocessing.Pool(
+        workers,
+        initializer=_set_compiled_definitions,
+        initargs=(definitions,)
+    )
+    try:
+        return pool.map(validate, paths, chunksize=max(
+            1,
+            len(paths) // (workers * 4)
+        ))
+    finally:
+        pool.close()
+        pool.join()
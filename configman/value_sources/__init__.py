@@ -106,8 +106,26 @@ for a_handler in for_handlers:
 
 
 #------------------------------------------------------------------------------
-def wrap_with_value_source_api(value_source_list, a_config_manager):
-    wrapped_sources = []
+def wrap_with_value_source_api(
+    value_source_list,
+    a_config_manager,
+    executor=None
+):
+    """wrap each of the sources in the list with the ValueSource of a handler
+    that can use it.  Creating a ValueSource may read a file or import a
+    module.  If an executor is given, the ValueSources are created in it
+    concurrently, otherwise they are created one after another.
+
+    parameters:
+        value_source_list - a sequence of sources of values
+        a_config_manager - the ConfigurationManager to which the sources
+                           belong
+        executor - (optional) an object with a 'submit' method that works
+                   like that of the executors from 'concurrent.futures'.  It
+                   must not be the executor running the ConfigurationManager
+                   construction itself unless it has workers to spare.
+    """
+    sources = []
     for a_source in value_source_list:
         if a_source is ConfigFileFutureProxy:
             a_source = a_config_manager._get_option('admin.conf').default
@@ -128,28 +146,69 @@ def wrap_with_value_source_api(value_source_list, a_config_manager):
             # this means the source is degenerate - like the case where
             # the config file name has not been specified
             continue
-        handlers = type_handler_dispatch.get_handlers(a_source)
-        wrapped_source = None
-        error_history = []
-        for a_handler in handlers:
-            try:
-                wrapped_source = a_handler.ValueSource(a_source,
-                                                       a_config_manager)
-                break
-            except (ValueException, CannotConvertError), x:
-                # a failure is not necessarily fatal, we need to try all of
-                # the handlers.  It's only fatal when they've all failed
-                exception_as_str = str(x)
-                if exception_as_str:
-                    error_history.append(str(x))
-        if wrapped_source is None:
-            if error_history:
-                errors = '; '.join(error_history)
-                raise AllHandlersFailedException(errors)
-            else:
-                raise NoHandlerForType(type(a_source))
-        wrapped_sources.append(wrapped_source)
-    return wrapped_sources
+        sources.append(a_source)
+
+    if executor is None:
+        return [
+            wrap_value_source(source, a_config_manager)
+            for source in sources
+        ]
+    futures = [
+        executor.submit(wrap_value_source, source, a_config_manager)
+        for source in sources
+    ]
+    # the order of the sources determines which values win, so the results
+    # are collected in the original order
+    return [a_future.result() for a_future in futures]
+
+
+#------------------------------------------------------------------------------
+def wrap_value_source(a_source, a_config_manager):
+    """return the ValueSource of the first handler that accepts the source"""
+    handlers = type_handler_dispatch.get_handlers(a_source)
+    error_history = []
+    for a_handler in handlers:
+        try:
+            return a_handler.ValueSource(a_source, a_config_manager)
+        except (ValueException, CannotConvertError), x:
+            # a failure is not necessarily fatal, we need to try all of
+            # the handlers.  It's only fatal when they've all failed
+            exception_as_str = str(x)
+            if exception_as_str:
+                error_history.append(str(x))
+    if error_history:
+        errors = '; '.join(error_history)
+        raise AllHandlersFailedException(errors)
+    else:
+        raise NoHandlerForType(type(a_source))
+
+
+#------------------------------------------------------------------------------
+def value_source_name(a_value_source):
+    """return a name for a value source to use in reports: the pathname of
+    a config file or the kind of the value source"""
+    try:
+        return a_value_source.source_name
+    except AttributeError:
+        module_name = a_value_source.__class__.__module__.split('.')[-1]
+        if module_name.startswith('for_'):
+            module_name = module_name[4:]
+        return module_name
+
+
+#------------------------------------------------------------------------------
+def value_source_line_number(a_value_source, key):
+    """return the line number of the key in the value source, or None if the
+    value source doesn't know it.  The value source may have the key in a
+    shorter form, by acquisition."""
+    line_numbers = getattr(a_value_source, 'line_numbers', {})
+    key_parts = key.split('.')
+    for i in range(len(key_parts)):
+        try:
+            return line_numbers['.'.join(key_parts[i:])]
+        except KeyError:
+            pass
+    return None
 
 
 #------------------------------------------------------------------------------
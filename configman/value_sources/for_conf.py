@@ -21,7 +21,11 @@ from configman.value_sources.source_exceptions import (
     ValueException,
     CantHandleTypeException
 )
-from configman.dotdict import DotDict
+from configman.dotdict import (
+    DotDict,
+    walk_tree,
+    PRE_ORDER,
+)
 from configman.memoize import memoize
 
 function_type = type(lambda x: x)  # TODO: just how do you express the Fuction
@@ -55,17 +59,21 @@ class ValueSource(object):
         ):
             # we're trusting the string represents a filename
             opener = functools.partial(open, candidate)
+            self.source_name = candidate
         elif isinstance(candidate, function_type):
             # we're trusting that the function when called with no parameters
             # will return a Context Manager Type.
             opener = candidate
+            self.source_name = getattr(candidate, '__name__', repr(candidate))
         else:
             raise CantHandleTypeException()
         self.values = {}
+        # the line number on which each key appears
+        self.line_numbers = {}
         try:
             with opener() as f:
                 previous_key = None
-                for line in f:
+                for line_number, line in enumerate(f, 1):
                     if line.strip().startswith('#') or not line.strip():
                         continue
                     if line[0] in ' \t' and previous_key:
@@ -77,6 +85,7 @@ class ValueSource(object):
                     try:
                         key, value = line.split("=", 1)
                         self.values[key.strip()] = value.strip()
+                        self.line_numbers[key.strip()] = line_number
                         previous_key = key
                     except ValueError:
                         self.values[line] = ''
@@ -98,48 +107,55 @@ class ValueSource(object):
     #--------------------------------------------------------------------------
     @staticmethod
     def write(source_dict, namespace_name=None, output_stream=sys.stdout):
+        if namespace_name:
+            prefix = (namespace_name,)
+        else:
+            prefix = ()
+        for path, value in walk_tree(
+            source_dict,
+            order=PRE_ORDER,
+            include_branches=True,
+            branch_type=namespace.Namespace,
+            sort=ValueSource._write_order
+        ):
+            if isinstance(value, Option):
+                an_option = value
+                option_name = '.'.join(prefix + path[:-1] + (an_option.name,))
+                print >>output_stream, "# name: %s" % option_name
+                print >>output_stream, "# doc: %s" % an_option.doc
+                option_value = str(an_option)
+                if isinstance(option_value, unicode):
+                    option_value = option_value.encode('utf8')
+
+                if an_option.likely_to_be_changed:
+                    option_format = '%s=%r\n'
+                else:
+                    option_format = '# %s=%r\n'
+                print >>output_stream, option_format % (
+                  option_name,
+                  option_value
+                )
+            else:
+                print >> output_stream, '#%s' % ('-' * 79)
+                print >> output_stream, '# %s - %s\n' % (
+                    '.'.join(prefix + path),
+                    value._doc
+                )
+
+    #--------------------------------------------------------------------------
+    @staticmethod
+    def _write_order(items):
+        """the Options of a Namespace, sorted by name, come first, followed
+        by its nested Namespaces"""
         options = [
-            value
-            for value in source_dict.values()
+            (key, value)
+            for key, value in items
             if isinstance(value, Option)
         ]
-        options.sort(cmp=lambda x, y: cmp(x.name, y.name))
+        options.sort(key=lambda item: item[1].name)
         namespaces = [
             (key, value)
-            for key, value in source_dict.items()
+            for key, value in items
             if isinstance(value, namespace.Namespace)
         ]
-        for an_option in options:
-            if namespace_name:
-                option_name = "%s.%s" % (namespace_name, an_option.name)
-            else:
-                option_name = an_option.name
-            print >>output_stream, "# name: %s" % option_name
-            print >>output_stream, "# doc: %s" % an_option.doc
-            option_value = str(an_option)
-            if isinstance(option_value, unicode):
-                option_value = option_value.encode('utf8')
-
-            if an_option.likely_to_be_changed:
-                option_format = '%s=%r\n'
-            else:
-                option_format = '# %s=%r\n'
-            print >>output_stream, option_format % (
-              option_name,
-              option_value
-            )
-        for key, a_namespace in namespaces:
-            if namespace_name:
-                namespace_label = ''.join((namespace_name, '.', key))
-            else:
-                namespace_label = key
-            print >> output_stream, '#%s' % ('-' * 79)
-            print >> output_stream, '# %s - %s\n' % (
-                namespace_label,
-                a_namespace._doc
-            )
-            ValueSource.write(
-              a_namespace,
-              namespace_name=namespace_label,
-              output_stream=output_stream
-            )
+        return options + namespaces
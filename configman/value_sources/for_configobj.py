@@ -16,7 +16,11 @@ from configman.value_sources.source_exceptions import (
 from configman.namespace import Namespace
 from configman.option import Option
 
-from configman.dotdict import DotDict
+from configman.dotdict import (
+    DotDict,
+    walk_tree,
+    PRE_ORDER,
+)
 from configman.memoize import memoize
 
 file_name_extension = 'ini'
@@ -145,6 +149,7 @@ class ValueSource(object):
             isinstance(source, basestring) and
             source.endswith(file_name_extension)
         ):
+            self.source_name = source
             try:
                 self.config_obj = ConfigObjWithIncludes(source)
             except Exception, x:
@@ -192,53 +197,25 @@ class ValueSource(object):
     @staticmethod
     def _write_ini(source_dict, namespace_name=None, level=0, indent_size=4,
                    output_stream=sys.stdout):
-        """this function prints the components of a configobj ini file.  It is
-        recursive for outputing the nested sections of the ini file."""
-        options = [
-            value
-            for value in source_dict.values()
-            if isinstance(value, Option)
-        ]
-        options.sort(cmp=lambda x, y: cmp(x.name, y.name))
-        indent_spacer = " " * (level * indent_size)
-        for an_option in options:
-            print >>output_stream, "%s# %s" % (indent_spacer, an_option.doc)
-            option_value = str(an_option)
-            if isinstance(option_value, unicode):
-                option_value = option_value.encode('utf8')
-
-            if an_option.reference_value_from:
-                print >>output_stream, (
-                    '%s# see "%s.%s" for the default or override it here' % (
-                        indent_spacer,
-                        an_option.reference_value_from,
-                        an_option.name
-                    )
-                )
-
-            if an_option.likely_to_be_changed or an_option.has_changed:
-                option_format = '%s%s=%s\n'
-            else:
-                option_format = '%s#%s=%s\n'
-
-            if isinstance(option_value, basestring) and ',' in option_value:
-                # quote lists unless they're already quoted
-                if option_value[0] not in '\'"':
-                    option_value = '"%s"' % option_value
-
-            print >>output_stream, option_format % (
-                indent_spacer,
-                an_option.name,
-                option_value
-            )
-        next_level = level + 1
-        namespaces = [
-            (key, value)
-            for key, value in source_dict.items()
-            if isinstance(value, Namespace)
-        ]
-        namespaces.sort(key=ValueSource._namespace_reference_value_from_sort)
-        for key, namespace in namespaces:
+        """this function prints the components of a configobj ini file,
+        walking the nested Namespaces for the nested sections of the ini
+        file."""
+        for path, value in walk_tree(
+            source_dict,
+            order=PRE_ORDER,
+            include_branches=True,
+            branch_type=Namespace,
+            sort=ValueSource._write_order
+        ):
+            # the level of the section that holds this item
+            item_level = level + len(path) - 1
+            indent_spacer = " " * (item_level * indent_size)
+            if isinstance(value, Option):
+                ValueSource._write_option(value, indent_spacer, output_stream)
+                continue
+            key = path[-1]
+            namespace = value
+            next_level = item_level + 1
             next_level_spacer = " " * next_level * indent_size
             print >>output_stream, "%s%s%s%s\n" % (
                 indent_spacer,
@@ -256,19 +233,54 @@ class ValueSource(object):
                     % (next_level_spacer, key)
                 )
 
-            if namespace_name:
-                ValueSource._write_ini(
-                    source_dict=namespace,
-                    namespace_name="%s.%s" % (namespace_name, key),
-                    level=level+1,
-                    indent_size=indent_size,
-                    output_stream=output_stream
-                )
-            else:
-                ValueSource._write_ini(
-                    source_dict=namespace,
-                    namespace_name=key,
-                    level=level+1,
-                    indent_size=indent_size,
-                    output_stream=output_stream
+    #--------------------------------------------------------------------------
+    @staticmethod
+    def _write_option(an_option, indent_spacer, output_stream):
+        print >>output_stream, "%s# %s" % (indent_spacer, an_option.doc)
+        option_value = str(an_option)
+        if isinstance(option_value, unicode):
+            option_value = option_value.encode('utf8')
+
+        if an_option.reference_value_from:
+            print >>output_stream, (
+                '%s# see "%s.%s" for the default or override it here' % (
+                    indent_spacer,
+                    an_option.reference_value_from,
+                    an_option.name
                 )
+            )
+
+        if an_option.likely_to_be_changed or an_option.has_changed:
+            option_format = '%s%s=%s\n'
+        else:
+            option_format = '%s#%s=%s\n'
+
+        if isinstance(option_value, basestring) and ',' in option_value:
+            # quote lists unless they're already quoted
+            if option_value[0] not in '\'"':
+                option_value = '"%s"' % option_value
+
+        print >>output_stream, option_format % (
+            indent_spacer,
+            an_option.name,
+            option_value
+        )
+
+    #--------------------------------------------------------------------------
+    @staticmethod
+    def _write_order(items):
+        """the Options of a Namespace, sorted by name, come first, followed
+        by its nested Namespaces with the reference value Namespaces first"""
+        options = [
+            (key, value)
+            for key, value in items
+            if isinstance(value, Option)
+        ]
+        options.sort(key=lambda item: item[1].name)
+        namespaces = [
+            (key, value)
+            for key, value in items
+            if isinstance(value, Namespace)
+        ]
+        namespaces.sort(key=ValueSource._namespace_reference_value_from_sort)
+        return options + namespaces
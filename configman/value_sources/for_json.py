@@ -52,6 +52,7 @@ class ValueSource(object):
             isinstance(source, basestring)
             and source.endswith(file_name_extension)
         ):
+            self.source_name = source
             try:
                 with open(source) as fp:
                     self.values = json.load(fp)
@@ -92,7 +93,8 @@ class ValueSource(object):
             for x in qkey.split('.'):
                 d = d[x]
             if isinstance(val, Option):
-                for okey, oval in val.__dict__.iteritems():
+                for okey in Option.attribute_names:
+                    oval = getattr(val, okey)
                     try:
                         d[okey] = to_string_converters[type(oval)](oval)
                     except KeyError:
@@ -14,7 +14,7 @@ from types import NoneType
 from collections import defaultdict
 
 from configman.namespace import Namespace
-from configman.dotdict import DotDict
+from configman.dotdict import DotDict, walk_tree
 from configman.option import Option, Aggregation
 from configman.converters import (
     to_str,
@@ -295,14 +295,13 @@ class ValueSource(object):
         symbols_to_ignore = set()
 
         # look ahead to see what sort of imports we're going to have to do
-        for key in source_mapping.keys_breadth_first():
-            value = source_mapping[key]
+        for path, value in walk_tree(source_mapping, branch_type=DotDict):
 
             if isinstance(value, Aggregation):
                 # Aggregations don't get included, skip on
                 continue
 
-            if '.' in key:
+            if len(path) > 1:
                 # this indicates that there are things in nested namespaces,
                 # we will use the DotDict class to represent namespaces
                 set_of_classes_needing_imports.add(DotDict)
@@ -453,11 +452,15 @@ class ValueSource(object):
 
         # finally, as the last step, we need to write out the keys and values
         # will be used by a future configman as Options and values.
-        sorted_keys = sorted(
-            source_mapping.keys_breadth_first(include_dicts=True)
+        sorted_items = sorted(
+            ('.'.join(path), value)
+            for path, value in walk_tree(
+                source_mapping,
+                include_branches=True,
+                branch_type=DotDict
+            )
         )
-        for key in sorted_keys:
-            value = source_mapping[key]
+        for key, value in sorted_items:
             if isinstance(value, Namespace):
                 ValueSource.write_namespace(key, value, output_stream)
             elif isinstance(value, Option):